@@ -1,14 +1,14 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 # filename: _internal.py
-# modified: 2019-09-08
+# modified: 2026-10-18
 
 import os
 import gzip
 
 def mkdir(path):
     if not os.path.exists(path):
-        os.mkdir(path)
+        os.makedirs(path, exist_ok=True)
 
 def get_abs_path(*paths):
     return os.path.normpath(os.path.abspath(os.path.join(os.path.dirname(__file__), *paths)))
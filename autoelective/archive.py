@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: archive.py
+# modified: 2026-10-18
+
+"""
+请求转储的归档格式
+
+一个归档是一个目录，所有文件都只追加写入：
+
+    bodies.dat    响应体，以 sha1 去重后 zlib 压缩拼接，相同的页面只保存一次
+    entries.dat   每条记录的其余字段 (请求/响应头、url 等)，每条一行 JSON
+    names.txt     接口名与异常类名，每行一个，行号即 id (从 1 开始，0 表示空)
+    index.bin     定长的索引，每条记录 INDEX_DTYPE.itemsize 字节，最后写入
+
+index.bin 可以直接用 numpy 读入并过滤，查找记录时不需要解压或反序列化任何数据；
+写入中断时，未写入索引的部分在下次打开时被忽略
+
+    python -m autoelective.archive list log/request/<学号> --endpoint SupplyCancel.do --status 200
+    python -m autoelective.archive show log/request/<学号> 20261017_233000:12
+    python -m autoelective.archive extract log/request/<学号> 20261017_233000:12 -o page.html
+    python -m autoelective.archive import log/request/<学号> log/request/<学号>/*.gz log/web/<学号>/*.html
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import base64
+import hashlib
+import fnmatch
+import pickle
+import gzip
+from optparse import OptionParser
+from urllib.parse import urlparse
+import numpy as np
+
+INDEX_DTYPE = np.dtype([
+    ("time", "<f8"),
+    ("status", "<u2"),
+    ("endpoint", "<u2"),       # id in names.txt
+    ("exception", "<u2"),      # id in names.txt, 0 for none
+    ("body_hash", "S20"),      # sha1 of the uncompressed body
+    ("entry_offset", "<u8"),
+    ("entry_length", "<u4"),
+    ("body_offset", "<u8"),
+    ("body_length", "<u4"),    # compressed length
+])
+
+BODY_COMPRESSLEVEL = 6
+
+_INDEX_FILE = "index.bin"
+_NAMES_FILE = "names.txt"
+_ENTRIES_FILE = "entries.dat"
+_BODIES_FILE = "bodies.dat"
+
+
+def get_endpoint(url):
+    """ url 路径的最后一段，例如 SupplyCancel.do """
+    path = urlparse(url).path.rstrip("/")
+    return path[path.rfind("/")+1:] or "/"
+
+
+def _encode_body(body):
+    if body is None or isinstance(body, str):
+        return body
+    return { "base64": base64.b64encode(body).decode("ascii") }
+
+def _decode_body(body):
+    if isinstance(body, dict):
+        return base64.b64decode(body["base64"])
+    return body
+
+
+class RequestDump(object):
+    """ 一次请求与响应中用于调试的字段，不持有 Response / Session 等对象 """
+
+    __slots__ = ['time','method','url','request_headers','request_body',
+                 'status_code','reason','headers','encoding','content','elapsed','exception']
+
+    def __init__(self, time, method, url, request_headers, request_body,
+                 status_code, reason, headers, encoding, content, elapsed, exception=None):
+        self.time = time
+        self.method = method
+        self.url = url
+        self.request_headers = request_headers  # [(key, value)]
+        self.request_body = request_body        # bytes / str / None
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers                  # [(key, value)]
+        self.encoding = encoding
+        self.content = content                  # bytes
+        self.elapsed = elapsed                  # seconds
+        self.exception = exception              # exception class name
+
+    @classmethod
+    def from_response(cls, r, exception=None):
+        req = r.request
+        return cls(
+            time=time.time(),
+            method=req.method,
+            url=r.url,
+            request_headers=list(req.headers.items()),
+            request_body=req.body,
+            status_code=r.status_code,
+            reason=r.reason,
+            headers=list(r.headers.items()),
+            encoding=r.encoding,
+            content=r.content,
+            elapsed=r.elapsed.total_seconds(),
+            exception=exception,
+        )
+
+    def to_dict(self):
+        return { k: getattr(self, k) for k in self.__slots__ }
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**d)
+
+    def __repr__(self):
+        return "RequestDump(%s %s, %s, %d bytes)" % (self.method, self.url, self.status_code, len(self.content))
+
+
+def is_archive(path):
+    return os.path.isfile(os.path.join(path, _INDEX_FILE))
+
+
+class Archive(object):
+    """
+    mode="r" 只读，mode="a" 追加写入（不存在时创建）；同一时刻只应有一个写入者
+    """
+
+    def __init__(self, path, mode="r"):
+        assert mode in ("r", "a")
+        self._path = path
+        self._mode = mode
+        if mode == "a" and not os.path.exists(path):
+            os.makedirs(path)
+        self._names = []      # [name], id = index + 1
+        self._name_ids = {}   # { name: id }
+        self._bodies = None   # { body_hash: (offset, length) }, built when appending
+        self._index = None
+        self._appended = []   # index rows appended since the last access of .index
+        self._files = {}
+        self._load()
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def names(self):
+        return self._names
+
+    def _file(self, name):
+        return os.path.join(self._path, name)
+
+    def _load(self):
+        names_file = self._file(_NAMES_FILE)
+        names_size = 0  # bytes of the complete lines
+        if os.path.exists(names_file):
+            with open(names_file, "rb") as fp:
+                data = fp.read()
+            names_size = data.rfind(b"\n") + 1  # drop an incomplete last line
+            self._names = data[:names_size].decode("utf-8").split("\n")[:-1]
+        self._name_ids = { name: ix + 1 for ix, name in enumerate(self._names) }
+
+        index_file = self._file(_INDEX_FILE)
+        if os.path.exists(index_file):
+            n = os.path.getsize(index_file) // INDEX_DTYPE.itemsize
+            self._index = np.fromfile(index_file, dtype=INDEX_DTYPE, count=n)
+        else:
+            self._index = np.zeros(0, dtype=INDEX_DTYPE)
+
+        if self._mode == "a":
+            if os.path.exists(index_file) and os.path.getsize(index_file) != len(self._index) * INDEX_DTYPE.itemsize:
+                with open(index_file, "r+b") as fp:
+                    fp.truncate(len(self._index) * INDEX_DTYPE.itemsize)
+            if os.path.exists(names_file) and os.path.getsize(names_file) != names_size:
+                with open(names_file, "r+b") as fp:  # otherwise the next name is appended to the fragment
+                    fp.truncate(names_size)
+            self._bodies = { row["body_hash"]: (int(row["body_offset"]), int(row["body_length"])) for row in self._index }
+            for name in (_INDEX_FILE, _ENTRIES_FILE, _BODIES_FILE):
+                self._files[name] = open(self._file(name), "ab")
+            self._files[_NAMES_FILE] = open(names_file, "a", encoding="utf-8")
+
+    def close(self):
+        for fp in self._files.values():
+            fp.close()
+        self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self._index) + len(self._appended)
+
+    @property
+    def index(self):
+        """ numpy structured array，dtype 为 INDEX_DTYPE """
+        if len(self._appended) > 0:
+            self._index = np.concatenate([self._index] + self._appended)
+            self._appended = []
+        return self._index
+
+    @property
+    def size(self):
+        return sum( os.path.getsize(self._file(name)) for name in (_INDEX_FILE, _NAMES_FILE, _ENTRIES_FILE, _BODIES_FILE)
+                    if os.path.exists(self._file(name)) )
+
+    def name(self, id):
+        return self._names[id - 1] if id > 0 else None
+
+    def _get_name_id(self, name):
+        if not name:
+            return 0
+        id = self._name_ids.get(name)
+        if id is None:
+            fp = self._files[_NAMES_FILE]
+            fp.write(name.replace("\n", " ") + "\n")
+            fp.flush()
+            self._names.append(name)
+            id = self._name_ids[name] = len(self._names)
+        return id
+
+    def append(self, dump):
+        """ 写入一条 RequestDump，返回其序号 """
+        content = dump.content or b""
+        body_hash = hashlib.sha1(content).digest()
+        body = self._bodies.get(body_hash)
+        if body is None:
+            fp = self._files[_BODIES_FILE]
+            data = zlib.compress(content, BODY_COMPRESSLEVEL)
+            body = self._bodies[body_hash] = (fp.tell(), len(data))
+            fp.write(data)
+            fp.flush()
+
+        entry = json.dumps({
+            "method": dump.method,
+            "url": dump.url,
+            "request_headers": dump.request_headers,
+            "request_body": _encode_body(dump.request_body),
+            "reason": dump.reason,
+            "headers": dump.headers,
+            "encoding": dump.encoding,
+            "elapsed": dump.elapsed,
+        }, ensure_ascii=False).encode("utf-8") + b"\n"
+        fp = self._files[_ENTRIES_FILE]
+        entry_offset = fp.tell()
+        fp.write(entry)
+        fp.flush()
+
+        row = np.zeros(1, dtype=INDEX_DTYPE)
+        row["time"] = dump.time
+        row["status"] = dump.status_code or 0
+        row["endpoint"] = self._get_name_id(get_endpoint(dump.url))
+        row["exception"] = self._get_name_id(dump.exception)
+        row["body_hash"] = body_hash
+        row["entry_offset"] = entry_offset
+        row["entry_length"] = len(entry)
+        row["body_offset"], row["body_length"] = body
+        fp = self._files[_INDEX_FILE]
+        fp.write(row.tobytes())
+        fp.flush()
+        self._appended.append(row)
+        return len(self) - 1
+
+    def query(self, endpoint=None, status=None, exception=None, since=None, until=None):
+        """
+        返回满足条件的记录序号 (numpy array)
+
+        endpoint / exception 支持通配符，例如 "electSupplement*"；status 为 int 或 int 的序列；
+        since / until 为 unix 时间戳
+        """
+        index = self.index
+        mask = np.ones(len(index), dtype=np.bool_)
+        for field, pattern in (("endpoint", endpoint), ("exception", exception)):
+            if pattern is None:
+                continue
+            ids = [ ix + 1 for ix, name in enumerate(self._names) if fnmatch.fnmatchcase(name, pattern) ]
+            mask &= np.isin(index[field], ids)
+        if status is not None:
+            mask &= np.isin(index["status"], [status] if isinstance(status, int) else list(status))
+        if since is not None:
+            mask &= index["time"] >= since
+        if until is not None:
+            mask &= index["time"] < until
+        return np.flatnonzero(mask)
+
+    def _read(self, name, offset, length):
+        with open(self._file(name), "rb") as fp:
+            fp.seek(offset)
+            return fp.read(length)
+
+    def get_body(self, ix):
+        row = self.index[ix]
+        return zlib.decompress(self._read(_BODIES_FILE, int(row["body_offset"]), int(row["body_length"])))
+
+    def get(self, ix):
+        """ 第 ix 条记录的 RequestDump """
+        row = self.index[ix]
+        entry = json.loads(self._read(_ENTRIES_FILE, int(row["entry_offset"]), int(row["entry_length"])))
+        return RequestDump(
+            time=float(row["time"]),
+            method=entry["method"],
+            url=entry["url"],
+            request_headers=entry["request_headers"],
+            request_body=_decode_body(entry["request_body"]),
+            status_code=int(row["status"]),
+            reason=entry["reason"],
+            headers=entry["headers"],
+            encoding=entry["encoding"],
+            content=self.get_body(ix),
+            elapsed=entry["elapsed"],
+            exception=self.name(int(row["exception"])),
+        )
+
+
+def list_archives(path):
+    """ path 本身是归档时返回 [path]，否则返回其中的归档目录，按名称（即创建时间）排序 """
+    if is_archive(path):
+        return [path]
+    if not os.path.isdir(path):
+        return []
+    return [ os.path.join(path, name) for name in sorted(os.listdir(path)) if is_archive(os.path.join(path, name)) ]
+
+
+def _load_dump_file(file):
+    """ 逐个文件保存的旧格式：pickle 的 Response，或 RequestDump.to_dict() """
+    with gzip.open(file, "rb") as fp:
+        obj = pickle.load(fp)
+    if isinstance(obj, dict):
+        return RequestDump.from_dict(obj)
+    dump = RequestDump.from_response(obj)
+    dump.time = os.path.getmtime(file)
+    return dump
+
+def _import_file(archive, file, endpoint_url):
+    if file.endswith(".gz"):
+        dump = _load_dump_file(file)
+    else:  # pages saved to log/web/ on UnexceptedHTMLFormat
+        with open(file, "rb") as fp:
+            content = fp.read()
+        dump = RequestDump(os.path.getmtime(file), "GET", endpoint_url, [], None,
+                           200, "OK", [("Content-Type", "text/html;charset=UTF-8")], "UTF-8", content, 0.0,
+                           exception="UnexceptedHTMLFormat")
+    return archive.append(dump)
+
+
+def _parse_time(s):
+    if s is None:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return time.mktime(time.strptime(s, fmt))
+        except ValueError:
+            pass
+    raise ValueError("unsupported time format %r, use YYYY-mm-dd [HH:MM[:SS]]" % s)
+
+
+def _find(path, key):
+    """ key 为 list 输出的 "归档名:序号" """
+    name, _, ix = key.rpartition(":")
+    for file in list_archives(path):
+        if os.path.basename(file) == name or (name == "" and is_archive(path)):
+            return Archive(file), int(ix)
+    raise KeyError("archive entry %s was not found in %s" % (key, path))
+
+
+def main(argv=None):
+    parser = OptionParser(usage="%prog {list,show,extract,import} PATH [KEY | FILE ...] [options]")
+    parser.add_option("--endpoint", help="filter by endpoint, wildcards allowed, e.g. SupplyCancel.do")
+    parser.add_option("--status", type="int", help="filter by HTTP status")
+    parser.add_option("--exception", help="filter by exception class, wildcards allowed")
+    parser.add_option("--since", help="YYYY-mm-dd [HH:MM[:SS]]")
+    parser.add_option("--until", help="YYYY-mm-dd [HH:MM[:SS]]")
+    parser.add_option("--limit", type="int", default=0, help="show only the last N entries")
+    parser.add_option("-o", "--output", metavar="FILE", help="write the body of `extract` to FILE instead of stdout")
+    parser.add_option("--url", default="https://elective.pku.edu.cn/elective2008/edu/pku/stu/elective/controller/supplement/SupplyCancel.do",
+                      help="url recorded for imported .html pages")
+    options, args = parser.parse_args(argv)
+    if len(args) < 2:
+        parser.error("command and PATH are required")
+    command, path = args[0], args[1]
+
+    if command == "list":
+        since, until = _parse_time(options.since), _parse_time(options.until)
+        rows = []
+        for file in list_archives(path):
+            archive = Archive(file)
+            name = os.path.basename(file)
+            for ix in archive.query(options.endpoint, options.status, options.exception, since, until):
+                row = archive.index[ix]
+                rows.append("%s:%-6d %s  %3d  %-28s %-24s %8d  %s" % (
+                    name, ix, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["time"])), row["status"],
+                    archive.name(int(row["endpoint"])), archive.name(int(row["exception"])) or "-",
+                    row["body_length"], row["body_hash"].hex()[:12]))
+        if options.limit > 0:
+            rows = rows[-options.limit:]
+        print("\n".join(rows))
+
+    elif command == "show":
+        archive, ix = _find(path, args[2])
+        dump = archive.get(ix)
+        print("%s %s" % (dump.method, dump.url))
+        for k, v in dump.request_headers:
+            print("%s: %s" % (k, v))
+        if dump.request_body:
+            print()
+            print(dump.request_body)
+        print()
+        print("%s %s (%.3f s)%s" % (dump.status_code, dump.reason, dump.elapsed,
+                                    "" if dump.exception is None else "  [%s]" % dump.exception))
+        for k, v in dump.headers:
+            print("%s: %s" % (k, v))
+        print()
+        print("<%d bytes>" % len(dump.content))
+
+    elif command == "extract":
+        archive, ix = _find(path, args[2])
+        body = archive.get_body(ix)
+        if options.output is None:
+            sys.stdout.buffer.write(body)
+        else:
+            with open(options.output, "wb") as fp:
+                fp.write(body)
+
+    elif command == "import":
+        with Archive(path, "a") as archive:
+            for file in args[2:]:
+                ix = _import_file(archive, file, options.url)
+                print("%s -> %s:%d" % (file, os.path.basename(path), ix))
+
+    else:
+        parser.error("unknown command %s" % command)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: model.py
+# modified: 2026-10-18
+
+"""
+验证码类型判别的本地模型 (颜色 + 干扰线两个小 CNN)
+
+导入本模块会导入 torch，请通过 registry.model_registry 获取已加载的模型，不要直接导入；
+不需要 torch 的实现见 numpy_model.py
+"""
+
+import torch
+import torch.nn as nn
+from .numpy_model import CATEGORY_MAP, preprocess_image
+
+
+class ColorClassifier(nn.Module):
+    def __init__(self, num_colors=3):
+        super().__init__()
+        self.features = nn.Sequential(
+            nn.Conv2d(3, 8, kernel_size=5, stride=2, padding=2),
+            nn.ReLU(),
+            nn.BatchNorm2d(8),
+            nn.Conv2d(8, 16, kernel_size=3, stride=2, padding=1),
+            nn.ReLU(),
+            nn.BatchNorm2d(16),
+            nn.MaxPool2d(2, 2),
+            nn.Conv2d(16, 16, kernel_size=3, padding=1),
+            nn.ReLU(),
+            nn.BatchNorm2d(16),
+            nn.AdaptiveAvgPool2d((4, 2))
+        )
+        self.classifier = nn.Sequential(
+            nn.Linear(16 * 4 * 2, 32),
+            nn.ReLU(),
+            nn.Dropout(0.2),
+            nn.Linear(32, num_colors)
+        )
+    
+    def forward(self, x):
+        x = self.features(x)
+        x = x.flatten(1)
+        return self.classifier(x)
+
+
+class LineClassifier(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.features = nn.Sequential(
+            nn.Conv2d(3, 8, kernel_size=3, stride=2, padding=1),
+            nn.ReLU(),
+            nn.MaxPool2d(2, 2),
+            nn.Conv2d(8, 16, kernel_size=3, stride=2, padding=1),
+            nn.ReLU(),
+            nn.AdaptiveAvgPool2d((4, 2))
+        )
+        self.classifier = nn.Sequential(
+            nn.Linear(16 * 4 * 2, 16),
+            nn.ReLU(),
+            nn.Linear(16, 2)
+        )
+    
+    def forward(self, x):
+        x = self.features(x)
+        x = x.flatten(1)
+        return self.classifier(x)
+
+
+class TwoStageClassifier:
+    def __init__(self, color_model_path=None, line_model_path=None):
+        self.color_model = ColorClassifier()
+        self.line_model = LineClassifier()
+        
+        if color_model_path:
+            self.color_model.load_state_dict(torch.load(color_model_path, map_location='cpu'))
+        if line_model_path:
+            self.line_model.load_state_dict(torch.load(line_model_path, map_location='cpu'))
+        
+        self.color_model.eval()
+        self.line_model.eval()
+        
+    def _preprocess_image(self, image):
+        """预处理图片，返回 [1, 3, H, W] 的 tensor"""
+        return torch.from_numpy(preprocess_image(image)).unsqueeze(0)
+        
+    def predict(self, image):
+        """image: PIL Image 对象"""
+        image_tensor = self._preprocess_image(image)
+        
+        with torch.no_grad():
+            color_logits = self.color_model(image_tensor)
+            color_pred = torch.argmax(color_logits, dim=1).item()
+            
+            line_logits = self.line_model(image_tensor)
+            line_pred = torch.argmax(line_logits, dim=1).item()
+            
+            return CATEGORY_MAP[(color_pred, line_pred)]
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: numpy_model.py
+# modified: 2026-10-18
+
+"""
+验证码类型判别模型的 NumPy 实现，不需要 torch
+
+与 model.py 中的 ColorClassifier / LineClassifier 结构相同，只实现推理 (eval 模式) 需要的层：
+卷积 (im2col + 矩阵乘法)、ReLU、BatchNorm (使用 running 统计量)、MaxPool、AdaptiveAvgPool、全连接
+
+参数从 .npz 读取，由 .pth 导出一次即可 (导出时需要 torch)：
+
+    python -m autoelective.captcha.numpy_model [--models DIR]
+
+[client] captcha_backend = numpy 时由 registry.model_registry 加载
+"""
+
+import os
+from functools import lru_cache
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from PIL import Image
+
+IMAGE_SIZE = (130, 52)  # (W, H)
+MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32).reshape(3, 1, 1)
+STD = np.array([0.229, 0.224, 0.225], dtype=np.float32).reshape(3, 1, 1)
+BN_EPS = 1e-5
+
+CATEGORY_MAP = {  # (color, line): category
+    (0, 0): 0,
+    (0, 1): 1,
+    (1, 0): 2,
+    (1, 1): 3,
+    (2, 0): 4,
+    (2, 1): 5,
+}
+
+#
+# 与 nn.Sequential 中的下标一一对应，参数名为 features.<ix>.* / classifier.<ix>.*
+# Dropout 在推理时不起作用，只占位
+#
+COLOR_FEATURES = (
+    ("conv", 2, 2), ("relu",), ("bn",),
+    ("conv", 2, 1), ("relu",), ("bn",),
+    ("maxpool", 2),
+    ("conv", 1, 1), ("relu",), ("bn",),
+    ("avgpool", (4, 2)),
+)
+COLOR_CLASSIFIER = (("linear",), ("relu",), ("dropout",), ("linear",))
+
+LINE_FEATURES = (
+    ("conv", 2, 1), ("relu",),
+    ("maxpool", 2),
+    ("conv", 2, 1), ("relu",),
+    ("avgpool", (4, 2)),
+)
+LINE_CLASSIFIER = (("linear",), ("relu",), ("linear",))
+
+
+def preprocess_image(image):
+    """ 预处理图片，返回 [3, H, W] 的 float32 数组，与 TwoStageClassifier._preprocess_image 相同 """
+    image = image.resize(IMAGE_SIZE, Image.LANCZOS)
+    img_array = np.array(image, dtype=np.float32) / 255.0
+    img_array = img_array.transpose(2, 0, 1)
+    return (img_array - MEAN) / STD
+
+
+def conv2d(x, weight, bias, stride, padding):
+    """ x: [C, H, W], weight: [O, C, k, k] -> [O, H', W'] """
+    O, C, k, _ = weight.shape
+    if padding > 0:
+        x = np.pad(x, ((0, 0), (padding, padding), (padding, padding)))
+    windows = sliding_window_view(x, (k, k), axis=(1, 2))[:, ::stride, ::stride]  # [C, H', W', k, k]
+    H, W = windows.shape[1:3]
+    cols = windows.transpose(0, 3, 4, 1, 2).reshape(C * k * k, H * W)  # im2col
+    out = weight.reshape(O, -1) @ cols
+    out += bias[:, None]
+    return out.reshape(O, H, W)
+
+
+def max_pool2d(x, size):
+    """ kernel_size = stride = size，逐个窗口位置取 maximum，比 reshape 后 max(axis) 快得多 """
+    C, H, W = x.shape
+    H, W = H // size * size, W // size * size
+    out = None
+    for i in range(size):
+        for j in range(size):
+            s = x[:, i:H:size, j:W:size]
+            out = s.copy() if out is None else np.maximum(out, s, out=out)
+    return out
+
+
+@lru_cache(maxsize=None)
+def _get_pool_matrix(n, m):
+    """ [m, n]，与 torch 的划分相同：第 i 个区间为 [floor(i * n / m), ceil((i + 1) * n / m)) """
+    P = np.zeros((m, n), dtype=np.float32)
+    for i in range(m):
+        start, end = (i * n) // m, -((-(i + 1) * n) // m)
+        P[i, start:end] = 1.0 / (end - start)
+    return P
+
+
+def adaptive_avg_pool2d(x, output_size):
+    C, H, W = x.shape
+    h, w = output_size
+    return _get_pool_matrix(H, h) @ x @ _get_pool_matrix(W, w).T
+
+
+class NumpyClassifier(object):
+
+    def __init__(self, features, classifier, params):
+        self._layers = []  # [(func, args)]
+        for prefix, spec in (("features", features), ("classifier", classifier)):
+            for ix, layer in enumerate(spec):
+                if prefix == "classifier" and ix == 0:
+                    self._layers.append((np.ravel, ()))
+                name = "%s.%d." % (prefix, ix)
+                kind = layer[0]
+                if kind == "conv":
+                    self._layers.append((conv2d, (params[name + "weight"], params[name + "bias"], layer[1], layer[2])))
+                elif kind == "bn":
+                    scale = params[name + "weight"] / np.sqrt(params[name + "running_var"] + BN_EPS)
+                    shift = params[name + "bias"] - params[name + "running_mean"] * scale
+                    self._layers.append((self._batch_norm, (scale[:, None, None], shift[:, None, None])))
+                elif kind == "relu":
+                    self._layers.append((self._relu, ()))
+                elif kind == "maxpool":
+                    self._layers.append((max_pool2d, (layer[1],)))
+                elif kind == "avgpool":
+                    self._layers.append((adaptive_avg_pool2d, (layer[1],)))
+                elif kind == "linear":
+                    self._layers.append((self._linear, (params[name + "weight"], params[name + "bias"])))
+                elif kind != "dropout":
+                    raise ValueError("unknown layer %r" % kind)
+
+    @staticmethod
+    def _relu(x):
+        return np.maximum(x, 0, out=x)
+
+    @staticmethod
+    def _batch_norm(x, scale, shift):
+        x *= scale
+        x += shift
+        return x
+
+    @staticmethod
+    def _linear(x, weight, bias):
+        return weight @ x + bias
+
+    def __call__(self, x):
+        """ x: [3, H, W] -> logits """
+        for func, args in self._layers:
+            x = func(x, *args)
+        return x
+
+
+def load_params(path):
+    with np.load(path) as data:
+        return { k: data[k].astype(np.float32) for k in data.files if not k.endswith("num_batches_tracked") }
+
+
+class NumpyTwoStageClassifier(object):
+    """ 与 model.TwoStageClassifier 接口相同，参数为 .npz 文件 """
+
+    def __init__(self, color_model_path, line_model_path):
+        self.color_model = NumpyClassifier(COLOR_FEATURES, COLOR_CLASSIFIER, load_params(color_model_path))
+        self.line_model = NumpyClassifier(LINE_FEATURES, LINE_CLASSIFIER, load_params(line_model_path))
+
+    def _preprocess_image(self, image):
+        return preprocess_image(image)
+
+    def predict(self, image):
+        """image: PIL Image 对象"""
+        x = self._preprocess_image(image)
+        color_pred = int(np.argmax(self.color_model(x)))
+        line_pred = int(np.argmax(self.line_model(x)))
+        return CATEGORY_MAP[(color_pred, line_pred)]
+
+
+def export_state_dict(pth_path, npz_path):
+    """ 把 torch.save 保存的 state dict 导出为 .npz (需要 torch) """
+    import torch
+    state_dict = torch.load(pth_path, map_location='cpu')
+    np.savez(npz_path, **{ k: v.numpy() for k, v in state_dict.items() })
+
+
+def main():
+    from optparse import OptionParser
+    from .._internal import get_abs_path
+
+    parser = OptionParser(usage="python -m autoelective.captcha.numpy_model [options]")
+    parser.add_option("--models", metavar="DIR", default=get_abs_path("models"),
+                      help="directory of color_model.pth and line_model.pth (default autoelective/models)")
+    options, _ = parser.parse_args()
+
+    for name in ("color_model", "line_model"):
+        pth = os.path.join(options.models, name + ".pth")
+        npz = os.path.join(options.models, name + ".npz")
+        export_state_dict(pth, npz)
+        print("%s -> %s" % (pth, npz))
+
+
+if __name__ == '__main__':
+    main()
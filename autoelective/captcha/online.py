@@ -9,12 +9,10 @@ from io import BytesIO
 import json
 import requests
 from PIL import Image, ImageOps
-import torch
-import torch.nn as nn
-import numpy as np
 
 from .captcha import Captcha
-from ..config import BaseConfig
+from .registry import model_registry
+from ..config import BaseConfig, AutoElectiveConfig
 from .._internal import get_abs_path
 from ..exceptions import OperationFailedError, OperationTimeoutError, RecognizerError
 from ..logger import ConsoleLogger
@@ -22,107 +20,6 @@ from ..logger import ConsoleLogger
 logger = ConsoleLogger("captcha.online")
 
 
-class ColorClassifier(nn.Module):
-    def __init__(self, num_colors=3):
-        super().__init__()
-        self.features = nn.Sequential(
-            nn.Conv2d(3, 8, kernel_size=5, stride=2, padding=2),
-            nn.ReLU(),
-            nn.BatchNorm2d(8),
-            nn.Conv2d(8, 16, kernel_size=3, stride=2, padding=1),
-            nn.ReLU(),
-            nn.BatchNorm2d(16),
-            nn.MaxPool2d(2, 2),
-            nn.Conv2d(16, 16, kernel_size=3, padding=1),
-            nn.ReLU(),
-            nn.BatchNorm2d(16),
-            nn.AdaptiveAvgPool2d((4, 2))
-        )
-        self.classifier = nn.Sequential(
-            nn.Linear(16 * 4 * 2, 32),
-            nn.ReLU(),
-            nn.Dropout(0.2),
-            nn.Linear(32, num_colors)
-        )
-    
-    def forward(self, x):
-        x = self.features(x)
-        x = x.flatten(1)
-        return self.classifier(x)
-
-
-class LineClassifier(nn.Module):
-    def __init__(self):
-        super().__init__()
-        self.features = nn.Sequential(
-            nn.Conv2d(3, 8, kernel_size=3, stride=2, padding=1),
-            nn.ReLU(),
-            nn.MaxPool2d(2, 2),
-            nn.Conv2d(8, 16, kernel_size=3, stride=2, padding=1),
-            nn.ReLU(),
-            nn.AdaptiveAvgPool2d((4, 2))
-        )
-        self.classifier = nn.Sequential(
-            nn.Linear(16 * 4 * 2, 16),
-            nn.ReLU(),
-            nn.Linear(16, 2)
-        )
-    
-    def forward(self, x):
-        x = self.features(x)
-        x = x.flatten(1)
-        return self.classifier(x)
-
-
-class TwoStageClassifier:
-    def __init__(self, color_model_path=None, line_model_path=None):
-        self.color_model = ColorClassifier()
-        self.line_model = LineClassifier()
-        
-        if color_model_path:
-            self.color_model.load_state_dict(torch.load(color_model_path, map_location='cpu'))
-        if line_model_path:
-            self.line_model.load_state_dict(torch.load(line_model_path, map_location='cpu'))
-        
-        self.color_model.eval()
-        self.line_model.eval()
-        
-    def _preprocess_image(self, image):
-        """预处理图片，返回 [1, 3, H, W] 的 tensor"""
-        image = image.resize((130, 52), Image.LANCZOS)
-        img_array = np.array(image, dtype=np.float32) / 255.0
-        img_array = img_array.transpose(2, 0, 1)
-        
-        mean = np.array([0.485, 0.456, 0.406], dtype=np.float32).reshape(3, 1, 1)
-        std = np.array([0.229, 0.224, 0.225], dtype=np.float32).reshape(3, 1, 1)
-        img_array = (img_array - mean) / std
-        
-        tensor = torch.from_numpy(img_array).float().unsqueeze(0)
-        return tensor
-        
-    def predict(self, image):
-        """image: PIL Image 对象"""
-        image_tensor = self._preprocess_image(image)
-        
-        with torch.no_grad():
-            color_logits = self.color_model(image_tensor)
-            color_pred = torch.argmax(color_logits, dim=1).item()
-            
-            line_logits = self.line_model(image_tensor)
-            line_pred = torch.argmax(line_logits, dim=1).item()
-            
-            category_map = {
-                (0, 0): 0,
-                (0, 1): 1,
-                (1, 0): 2,
-                (1, 1): 3,
-                (2, 0): 4,
-                (2, 1): 5,
-            }
-            
-            return category_map[(color_pred, line_pred)]
-
-
 class APIConfig(object):
 
     _DEFAULT_CONFIG_PATH = '../apikey.json'
@@ -166,15 +63,23 @@ class TTShituRecognizer(object):
 
     _RECOGNIZER_URL = "http://api.ttshitu.com/base64"
     _MODELS_DIR = 'models'
-    _COLOR_MODEL = 'color_model.pth'
-    _LINE_MODEL = 'line_model.pth'
+    _COLOR_MODEL = 'color_model'
+    _LINE_MODEL = 'line_model'
+    _MODEL_EXTENSIONS = { 'torch': '.pth', 'numpy': '.npz' }
 
-    def __init__(self):
+    def __init__(self, backend=None):
         self._config = APIConfig()
         
-        color_model_path = get_abs_path(f'{self._MODELS_DIR}/{self._COLOR_MODEL}')
-        line_model_path = get_abs_path(f'{self._MODELS_DIR}/{self._LINE_MODEL}')
-        self._local_classifier = TwoStageClassifier(color_model_path, line_model_path)
+        # [client] captcha_backend，两种实现的模型文件同名，扩展名不同
+        self._backend = backend or AutoElectiveConfig().captcha_backend
+        ext = self._MODEL_EXTENSIONS[self._backend]
+        self._color_model_path = get_abs_path(f'{self._MODELS_DIR}/{self._COLOR_MODEL}{ext}')
+        self._line_model_path = get_abs_path(f'{self._MODELS_DIR}/{self._LINE_MODEL}{ext}')
+
+    @property
+    def _local_classifier(self):
+        # 模型在第一次识别时加载，进程内所有识别器共享同一份，模型文件更新后重新加载
+        return model_registry.get(self._color_model_path, self._line_model_path, self._backend)
         
     def recognize(self, raw):
         im = Image.open(BytesIO(raw))
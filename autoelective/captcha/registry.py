@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: registry.py
+# modified: 2026-10-18
+
+"""
+进程内共享的验证码模型
+
+模型在第一次 get() 时加载 (backend 为 torch 时此时才导入 torch)，之后所有线程、所有识别器
+以及 refreshsettings() 重新加载配置后创建的识别器都使用同一份；模型文件的 mtime / size 变化时重新加载
+"""
+
+import os
+import threading
+from ..logger import ConsoleLogger
+
+logger = ConsoleLogger("captcha.registry")
+
+
+def _get_stamp(path):
+    if path is None:
+        return None
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ModelRegistry(object):
+
+    def __init__(self):
+        self._models = {}  # { (backend, color_model_path, line_model_path): (stamps, classifier) }
+        self._lock = threading.Lock()
+        self._loads = 0
+
+    @property
+    def loads(self):
+        """ 从磁盘加载模型的次数 """
+        return self._loads
+
+    def get(self, color_model_path, line_model_path, backend="torch"):
+        """ backend 为 torch 时读取 .pth，为 numpy 时读取 numpy_model 导出的 .npz """
+        key = (backend, color_model_path, line_model_path)
+        stamps = (_get_stamp(color_model_path), _get_stamp(line_model_path))
+        entry = self._models.get(key)
+        if entry is not None and entry[0] == stamps:
+            return entry[1]
+        with self._lock:
+            entry = self._models.get(key)  # loaded by another thread while waiting
+            if entry is None or entry[0] != stamps:
+                if backend == "numpy":
+                    from .numpy_model import NumpyTwoStageClassifier as Classifier
+                else:
+                    from .model import TwoStageClassifier as Classifier  # imports torch
+                entry = self._models[key] = (stamps, Classifier(color_model_path, line_model_path))
+                self._loads += 1
+                logger.info("Captcha models loaded from %s (%s)" % (
+                    os.path.dirname(color_model_path or line_model_path or "."), backend))
+        return entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: classifier.py
+# modified: 2026-10-17
+
+"""
+elective 提示信息 (errInfo / tips) 到异常类的映射
+
+映射关系保存在 messages.json 中，依次尝试：完全匹配 (dict) -> 最长前缀 (trie) -> 正则，都不匹配时使用 default。
+项目根目录下的 messages.user.json 会覆盖/补充同名的规则，服务器新增提示信息时不需要修改代码
+"""
+
+import re
+import json
+import os
+from . import exceptions
+from .const import MESSAGES_JSON, MESSAGES_USER_JSON
+
+
+class MessageRule(object):
+
+    __slots__ = ['_exception','_with_msg']
+
+    def __init__(self, exception, with_msg=False):
+        self._exception = exception # AutoElectiveClientException 的子类
+        self._with_msg = with_msg   # 是否以提示信息作为异常的 msg，否则使用异常类的 desc
+
+    @property
+    def exception(self):
+        return self._exception
+
+    @property
+    def with_msg(self):
+        return self._with_msg
+
+    def get_exception(self, r, msg):
+        if self._with_msg:
+            return self._exception(response=r, msg=msg)
+        return self._exception(response=r)
+
+    @classmethod
+    def from_spec(cls, spec):
+        """ spec: "ExceptionName" 或 {"exception": "ExceptionName", "with_msg": bool} """
+        if isinstance(spec, str):
+            spec = { "exception": spec }
+        name = spec["exception"]
+        exception = getattr(exceptions, name, None)
+        if not (isinstance(exception, type) and issubclass(exception, exceptions.AutoElectiveClientException)):
+            raise ValueError("Unknown exception %r in message rules" % name)
+        return cls(exception, spec.get("with_msg", False))
+
+
+class MessageClassifier(object):
+
+    __slots__ = ['_titles','_exact','_trie','_regexes','_default']
+
+    def __init__(self, spec):
+        self._titles = frozenset(spec.get("titles", ()))
+        self._exact = { msg: MessageRule.from_spec(s) for msg, s in spec.get("exact", {}).items() }
+        self._trie = {}
+        for prefix, s in spec.get("prefix", {}).items():
+            self._add_prefix(prefix, MessageRule.from_spec(s))
+        self._regexes = [ (re.compile(s["pattern"]), MessageRule.from_spec(s)) for s in spec.get("regex", []) ]
+        default = spec.get("default")
+        self._default = None if default is None else MessageRule.from_spec(default)
+
+    @property
+    def titles(self):
+        return self._titles
+
+    def _add_prefix(self, prefix, rule):
+        """ 压缩 trie，每条边为 [label, children, rule]，children 以 label 的首字符为键 """
+        assert len(prefix) > 0
+        children = self._trie
+        pos = 0
+        while True:
+            edge = children.get(prefix[pos])
+            if edge is None:
+                children[prefix[pos]] = [prefix[pos:], {}, rule]
+                return
+            label = edge[0]
+            n = 0
+            m = min(len(label), len(prefix) - pos)
+            while n < m and label[n] == prefix[pos+n]:
+                n += 1
+            if n < len(label): # split the edge at the common prefix
+                edge[1] = { label[n]: [label[n:], edge[1], edge[2]] }
+                edge[0] = label[:n]
+                edge[2] = None
+            pos += n
+            if pos == len(prefix):
+                edge[2] = rule
+                return
+            children = edge[1]
+
+    def _match_prefix(self, msg):
+        children = self._trie
+        pos = 0
+        rule = None
+        while pos < len(msg):
+            edge = children.get(msg[pos])
+            if edge is None or not msg.startswith(edge[0], pos):
+                break
+            pos += len(edge[0])
+            if edge[2] is not None:
+                rule = edge[2]  # longest prefix wins
+            children = edge[1]
+        return rule
+
+    def classify(self, msg):
+        """ 返回 msg 对应的 MessageRule，未知的提示信息返回 default (可能为 None) """
+        rule = self._exact.get(msg)
+        if rule is not None:
+            return rule
+        rule = self._match_prefix(msg)
+        if rule is not None:
+            return rule
+        for regex, rule in self._regexes:
+            if regex.search(msg):
+                return rule
+        return self._default
+
+    def check(self, r, msg):
+        """ 有对应规则时抛出相应的异常，否则返回 False """
+        rule = self.classify(msg)
+        if rule is None:
+            return False
+        raise rule.get_exception(r, msg)
+
+
+def _merge_spec(spec, user_spec):
+    for name, user in user_spec.items():
+        s = spec.setdefault(name, {})
+        s.setdefault("exact", {}).update(user.get("exact", {}))
+        s.setdefault("prefix", {}).update(user.get("prefix", {}))
+        s["regex"] = user.get("regex", []) + s.get("regex", [])  # user rules take precedence
+        for key in ("titles", "default"):
+            if key in user:
+                s[key] = user[key]
+    return spec
+
+
+def load_message_classifiers(file=MESSAGES_JSON, user_file=MESSAGES_USER_JSON):
+    """ { "errInfo": MessageClassifier, "tips": MessageClassifier } """
+    with open(file, "r", encoding="utf-8-sig") as fp:
+        spec = json.load(fp)
+    if user_file is not None and os.path.exists(user_file):
+        with open(user_file, "r", encoding="utf-8-sig") as fp:
+            spec = _merge_spec(spec, json.load(fp))
+    return { name: MessageClassifier(s) for name, s in spec.items() }
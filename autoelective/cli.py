@@ -4,6 +4,8 @@
 @Date   : 2025-08-30
 """
 
+import os
+import atexit
 from optparse import OptionParser
 from threading import Thread
 from multiprocessing import Queue
@@ -38,6 +40,25 @@ def create_default_parser():
         help='run the monitor thread simultaneously',
     )
 
+    ## profiling
+
+    parser.add_option(
+        '--profile',
+        dest='profile_every',
+        type='int',
+        metavar="N",
+        help='sample the loop threads and write collapsed stacks to log/profile/ every N elective loops '
+             '(or set AUTOELECTIVE_PROFILE=N)',
+    )
+
+    parser.add_option(
+        '--profile-interval',
+        dest='profile_interval',
+        type='float',
+        metavar="MS",
+        help='sampling interval of --profile in milliseconds, default 10 (or set AUTOELECTIVE_PROFILE_INTERVAL)',
+    )
+
     return parser
 
 
@@ -46,6 +67,13 @@ def setup_default_environ(options, args, environ):
     environ.config_ini = options.config_ini
     environ.with_monitor = options.with_monitor
 
+    environ.profile_every = options.profile_every
+    if environ.profile_every is None and os.environ.get("AUTOELECTIVE_PROFILE"):
+        environ.profile_every = int(os.environ["AUTOELECTIVE_PROFILE"])
+    environ.profile_interval = options.profile_interval
+    if environ.profile_interval is None and os.environ.get("AUTOELECTIVE_PROFILE_INTERVAL"):
+        environ.profile_interval = float(os.environ["AUTOELECTIVE_PROFILE_INTERVAL"])
+
 
 def create_default_threads_reload(options, args, environ):
     # 重新加载主配置
@@ -109,6 +137,19 @@ def create_default_threads(options, args, environ):
     return tList
 
 
+def start_default_profiler(options, args, environ):
+    if environ.profile_every is None or environ.profile_every <= 0:
+        return None
+
+    from .profiler import SamplingProfiler
+
+    interval = environ.profile_interval / 1000 if environ.profile_interval else None
+    profiler = SamplingProfiler(environ.profile_every, interval)
+    profiler.start()
+    atexit.register(profiler.stop)  # write the last window
+    return profiler
+
+
 def run():
 
     from .environ import Environ
@@ -126,6 +167,8 @@ def run():
         t.daemon = True
         t.start()
 
+    start_default_profiler(options, args, environ)
+
     #
     # Don't use join() to block the main thread, or Ctrl + C in Windows can't work.
     #
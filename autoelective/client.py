@@ -1,16 +1,20 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 # filename: client.py
-# modified: 2019-09-09
+# modified: 2026-10-17
 
+import time
+from urllib.parse import urlparse
 from requests.models import Request
 from requests.sessions import Session
 from requests.cookies import extract_cookies_to_jar
+from .metrics import http_latency
 
 class BaseClient(object):
 
     default_headers = {}
     default_client_timeout = 10
+    transport_adapter = None  # requests adapter mounted on every new session, e.g. replay.ReplayAdapter
 
     def __init__(self, *args, **kwargs):
         if self.__class__ is __class__:
@@ -18,6 +22,9 @@ class BaseClient(object):
         self._timeout = kwargs.get("timeout", self.__class__.default_client_timeout)
         self._session = Session()
         self._session.headers.update(self.__class__.default_headers)
+        if self.transport_adapter is not None:
+            self._session.mount("https://", self.transport_adapter)
+            self._session.mount("http://", self.transport_adapter)
 
     @property
     def user_agent(self):
@@ -58,7 +65,14 @@ class BaseClient(object):
             'allow_redirects': allow_redirects,
         }
         send_kwargs.update(settings)
-        resp = self._session.send(prep, **send_kwargs)
+
+        # time it here rather than with r.elapsed, which stops at the response headers and
+        # is unavailable when a hook raises
+        t0 = time.perf_counter()
+        try:
+            resp = self._session.send(prep, **send_kwargs)
+        finally:
+            http_latency.observe(urlparse(prep.url).path, time.perf_counter() - t0)
 
         return resp
 
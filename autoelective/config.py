@@ -39,11 +39,11 @@ class BaseConfig(object):
         self._config = RawConfigParser()
         self._config.read(file, encoding="utf-8-sig")
 
-    def get(self, section, key):
-        return self._config.get(section, key)
+    def get(self, section, key, **kwargs):
+        return self._config.get(section, key, **kwargs)
 
-    def getint(self, section, key):
-        return self._config.getint(section, key)
+    def getint(self, section, key, **kwargs):
+        return self._config.getint(section, key, **kwargs)
 
     def getfloat(self, section, key):
         return self._config.getfloat(section, key)
@@ -112,10 +112,16 @@ class AutoElectiveConfig(BaseConfig, metaclass=Singleton):
         self._is_print_mutex_rules = self.getboolean("client", "print_mutex_rules")
         self._is_debug_print_request = self.getboolean("client", "debug_print_request")
         self._is_debug_dump_request = self.getboolean("client", "debug_dump_request")
+        self._log_queue_size = self.getint("client", "log_queue_size", fallback=10000)
+        self._log_drop_policy = self.get("client", "log_drop_policy", fallback="drop_new").lower()
+        self.check_log_drop_policy(self._log_drop_policy)
+        self._captcha_backend = self.get("client", "captcha_backend", fallback="torch").lower()
+        self.check_captcha_backend(self._captcha_backend)
         
         # [monitor] 部分
         self._monitor_host = self.get("monitor", "host")
         self._monitor_port = self.getint("monitor", "port")
+        self._monitor_threads = self.getint("monitor", "threads", fallback=4)
         
         # [notification] 部分（已弃用，为保证原有代码流畅运行，此处赋常值）
         self._disable_push = True
@@ -232,6 +238,18 @@ class AutoElectiveConfig(BaseConfig, metaclass=Singleton):
     def is_debug_dump_request(self):
         return self._is_debug_dump_request
 
+    @property
+    def log_queue_size(self):
+        return self._log_queue_size
+
+    @property
+    def log_drop_policy(self):
+        return self._log_drop_policy
+
+    @property
+    def captcha_backend(self):
+        return self._captcha_backend
+
     @property
     def monitor_host(self):
         return self._monitor_host
@@ -240,6 +258,10 @@ class AutoElectiveConfig(BaseConfig, metaclass=Singleton):
     def monitor_port(self):
         return self._monitor_port
 
+    @property
+    def monitor_threads(self):
+        return self._monitor_threads
+
     @property
     def disable_push(self):
         return self._disable_push
@@ -279,6 +301,16 @@ class AutoElectiveConfig(BaseConfig, metaclass=Singleton):
         if page <= 0:
             raise ValueError("supply_cancel_page must be positive number, not %s" % page)
 
+    def check_log_drop_policy(self, policy):
+        limited = ("block", "drop_new", "drop_old")
+        if policy not in limited:
+            raise ValueError("unsupported log_drop_policy %s, policy must be in %s" % (policy, limited))
+
+    def check_captcha_backend(self, backend):
+        limited = ("torch", "numpy")
+        if backend not in limited:
+            raise ValueError("unsupported captcha_backend %s, backend must be in %s" % (backend, limited))
+
     def get_user_subpath(self):
         if self.is_dual_degree:
             identity = self.identity
@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 # filename: const.py
-# modified: 2019-09-11
+# modified: 2026-10-18
 
 import os
-from ._internal import mkdir, get_abs_path, read_list
+from ._internal import get_abs_path, read_list
 
 CACHE_DIR = get_abs_path("../cache/")
 CAPTCHA_CACHE_DIR = get_abs_path("../cache/captcha/")
@@ -12,28 +12,33 @@ LOG_DIR = get_abs_path("../log/")
 ERROR_LOG_DIR = get_abs_path("../log/error")
 REQUEST_LOG_DIR = get_abs_path("../log/request/")
 WEB_LOG_DIR = get_abs_path("../log/web/")
+PROFILE_LOG_DIR = get_abs_path("../log/profile/")
 
 CNN_MODEL_FILE = get_abs_path("../model/cnn.20210311.1.pt")
 USER_AGENTS_TXT_GZ = get_abs_path("../user_agents.txt.gz")
 USER_AGENTS_USER_TXT = get_abs_path("../user_agents.user.txt")
 DEFAULT_CONFIG_INI = get_abs_path("../config.ini")
 DEFAULT_CONFIG_TTAPI = get_abs_path("../apikey.json")
+MESSAGES_JSON = get_abs_path("./messages.json")
+MESSAGES_USER_JSON = get_abs_path("../messages.user.json")
 
 
 WECHAT_MSG = {0: "出现未知异常，程序中止", 1: "选课成功，课程为：", 2: "有名额，验证码识别失败，正在重试", 3: "出现重复选课，请调整config文件", "s": "刷课开始", 4: "时间冲突，课程为", 5: "考试时间冲突，课程为"}
 WECHAT_PREFIX = {0: "[异常]", 1: "[成功]", 2: "[失败]", 3: "[特殊]"}
 
-mkdir(CACHE_DIR)
-mkdir(CAPTCHA_CACHE_DIR)
-mkdir(LOG_DIR)
-mkdir(ERROR_LOG_DIR)
-mkdir(REQUEST_LOG_DIR)
-mkdir(WEB_LOG_DIR)
+# 导入时不创建目录，各目录由写入者在第一次写入前创建 (见 logger.py, hook.py, profiler.py)
 
-if os.path.exists(USER_AGENTS_USER_TXT):
-    USER_AGENT_LIST = read_list(USER_AGENTS_USER_TXT)
-else:
-    USER_AGENT_LIST = read_list(USER_AGENTS_TXT_GZ)
+_userAgentList = None
+
+def get_user_agent_list():
+    """ 第一次调用时读取 user_agents.user.txt，不存在时读取 user_agents.txt.gz """
+    global _userAgentList
+    if _userAgentList is None:
+        if os.path.exists(USER_AGENTS_USER_TXT):
+            _userAgentList = read_list(USER_AGENTS_USER_TXT)
+        else:
+            _userAgentList = read_list(USER_AGENTS_TXT_GZ)
+    return _userAgentList
 
 
 class IAAAURL(object):
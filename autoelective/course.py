@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 # filename: course.py
-# modified: 2019-09-08
+# modified: 2026-10-18
 
 class Course(object):
 
@@ -57,7 +57,7 @@ class Course(object):
         return maxi > used
 
     def to_simplified(self):
-        return Course(self._name, self._class_no, self._school)
+        return course_pool.get_simplified(self)
 
     def __eq__(self, other):
         if not isinstance(other, self.__class__):
@@ -78,3 +78,81 @@ class Course(object):
                 self.__class__.__name__,
                 self._name, self._class_no, self._school,
             )
+
+
+class CoursePool(object):
+    """
+    Course 的享元池，每个 (name, class_no, school) 只保留一个规范的 Course 对象
+
+    解析补退选页时，不带名额信息的课程直接复用同一个对象；带名额信息的课程同样只有一个对象，
+    其 名额 / 选课链接 单独记录并在变化时原地更新，因此长时间刷课时每回合几乎不再分配新的 Course
+    """
+
+    __slots__ = ['_idents','_simplified','_detailed','_status_texts']
+
+    def __init__(self):
+        self._idents = {}        # { (name, raw class_no, school): ident }
+        self._simplified = {}    # { ident: Course } status is None
+        self._detailed = {}      # { ident: Course } status/href are updated in place
+        self._status_texts = {}  # { ident: raw status text of the last update }
+
+    def __len__(self):
+        return len(self._simplified) + len(self._detailed)
+
+    def clear(self):
+        self._idents.clear()
+        self._simplified.clear()
+        self._detailed.clear()
+        self._status_texts.clear()
+
+    def _get_ident(self, name, class_no, school):
+        ident = self._idents.get((name, class_no, school))
+        if ident is None:
+            # lxml 返回的 smart string 会引用整棵文档树，缓存前需要转成 str
+            name, class_no, school = str(name), str(class_no), str(school)
+            ident = (name, int(class_no), school)
+            self._idents[(name, class_no, school)] = ident
+        return ident
+
+    def get(self, name, class_no, school):
+        """ 返回不带名额信息的规范 Course """
+        ident = self._get_ident(name, class_no, school)
+        c = self._simplified.get(ident)
+        if c is None:
+            c = self._simplified[ident] = Course(*ident)
+        return c
+
+    def get_simplified(self, course):
+        c = self._simplified.get(course._ident)
+        if c is None:
+            c = self._simplified[course._ident] = Course(*course._ident)
+        return c
+
+    def get_with_detail(self, name, class_no, school, status, href, seen=None):
+        """
+        返回带名额信息的规范 Course
+
+        status: 限数/已选 一栏的原始文本，例如 "180 / 179"，只在文本变化时才重新解析
+        seen: 本次解析中已经出现过的 ident，同一课程在一张表格中出现多次时，之后的每一次都返回
+              单独的 Course，不会覆盖之前的行的名额和链接
+
+        返回的 Course 在之后的回合中会被原地更新名额和链接，需要保存时 (如 environ.ignored 的键)
+        请使用 to_simplified()
+        """
+        ident = self._get_ident(name, class_no, school)
+        if seen is not None:
+            if ident in seen:
+                return Course(*ident, tuple(map(int, status.split("/"))), None if href is None else str(href))
+            seen.add(ident)
+        c = self._detailed.get(ident)
+        if c is None:
+            c = self._detailed[ident] = Course(*ident)
+        if self._status_texts.get(ident) != status:
+            c._status = tuple(map(int, status.split("/")))
+            self._status_texts[ident] = str(status)
+        if c._href != href:
+            c._href = None if href is None else str(href)
+        return c
+
+
+course_pool = CoursePool()
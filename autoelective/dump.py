@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: dump.py
+# modified: 2026-10-18
+
+"""
+请求转储 (debug_dump_request)
+
+在 response hook 中只复制所需的字段 (RequestDump)，由后台线程追加写入归档 (见 archive.py)；
+转储目录按总大小与年龄轮转，调试开关可以在正式运行时一直打开
+
+转储目录下每个归档是一个分段，写满 SEGMENT_MAX_BYTES 后开始新的分段，轮转时整段删除
+"""
+
+import os
+import time
+import queue
+import atexit
+import shutil
+import threading
+from .archive import Archive, RequestDump, is_archive
+from .logger import ConsoleLogger
+
+DUMP_QUEUE_SIZE = 256                 # 等待写出的转储数，超出时丢弃新的转储
+DUMP_MAX_BYTES = 200 * 1024 * 1024    # 转储目录的总大小上限，超出时删除最早的分段
+DUMP_MAX_AGE = 3 * 24 * 3600          # 分段最后一次写入后的最长保留时间 (秒)
+SEGMENT_MAX_BYTES = DUMP_MAX_BYTES // 10
+FLUSH_TIMEOUT = 5.0                   # 退出时等待队列写出的最长时间 (秒)
+
+cout = ConsoleLogger("dump")
+
+
+def _get_size(path):
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum( entry.stat().st_size for entry in os.scandir(path) if entry.is_file() )
+
+
+class DumpWriter(object):
+
+    def __init__(self, directory, maxsize=DUMP_QUEUE_SIZE, max_bytes=DUMP_MAX_BYTES,
+                 max_age=DUMP_MAX_AGE, segment_max_bytes=SEGMENT_MAX_BYTES):
+        self._directory = directory
+        self._queue = queue.Queue(maxsize)
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._segment_max_bytes = segment_max_bytes
+        self._segments = None  # [(mtime, size, path)] of closed segments and loose files, oldest first
+        self._total = 0
+        self._archive = None   # the current segment
+        self._written = 0
+        self._dropped = 0
+        self._removed = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def directory(self):
+        return self._directory
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {
+            "depth": self.depth,
+            "written": self._written,
+            "dropped": self._dropped,
+            "removed": self._removed,
+            "segments": len(self._segments or ()) + (self._archive is not None),
+            "total_bytes": self._total + (self._archive.size if self._archive is not None else 0),
+        }
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="DumpWriter", daemon=True)
+                self._thread.start()
+
+    def submit(self, r, exception=None):
+        """
+        复制 r 中的字段并放入队列，返回转储目录；队列已满时丢弃并返回 None
+
+        exception: 与这次请求相关的异常类名，可以在归档中按此过滤
+        """
+        dump = RequestDump.from_response(r, exception)
+        try:
+            self._queue.put_nowait(dump)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return None
+        self.start()
+        return self._directory
+
+    def _scan(self):
+        """ 已有的分段，以及 dump.py 之前逐个写入的 .gz 文件，一并参与轮转 """
+        segments = []
+        for entry in os.scandir(self._directory):
+            if is_archive(entry.path) or (entry.is_file() and entry.name.endswith(".gz")):
+                segments.append((entry.stat().st_mtime if entry.is_file() else
+                                 os.path.getmtime(os.path.join(entry.path, "index.bin")), _get_size(entry.path), entry.path))
+        segments.sort()
+        self._segments = segments
+        self._total = sum( size for _, size, _ in segments )
+
+    def _new_segment(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._segments.append((time.time(), self._archive.size, self._archive.path))
+            self._total += self._segments[-1][1]
+        name = time.strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self._directory, name)
+        seq = 0
+        while os.path.exists(path):
+            seq += 1
+            path = os.path.join(self._directory, "%s.%d" % (name, seq))
+        self._archive = Archive(path, "a")
+
+    def _rotate(self):
+        deadline = time.time() - self._max_age
+        current = self._archive.size if self._archive is not None else 0
+        while len(self._segments) > 0 and (self._total + current > self._max_bytes or self._segments[0][0] < deadline):
+            _, size, path = self._segments.pop(0)
+            self._total -= size
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+                self._removed += 1
+            except OSError:
+                pass
+
+    def _run(self):
+        self._scan()
+        self._new_segment()
+        self._rotate()
+        while True:
+            dump = self._queue.get()
+            try:
+                self._archive.append(dump)
+                self._written += 1
+                if self._archive.size >= self._segment_max_bytes:
+                    self._new_segment()
+                self._rotate()
+            except OSError as e:
+                cout.warning("Failed to dump request %s to %s: %s" % (dump.url, self._archive.path, e))
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """ 等待队列写出，最多等待 timeout 秒，全部写出时返回 True """
+        if self._thread is None:
+            return True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks > 0:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.02)
+        return True
+
+
+_writers = {}  # { directory: DumpWriter }
+_writersLock = threading.Lock()
+
+def get_dump_writer(directory):
+    """ 每个目录一个 DumpWriter，进程退出时写出剩余的转储 """
+    with _writersLock:
+        writer = _writers.get(directory)
+        if writer is None:
+            writer = _writers[directory] = DumpWriter(directory)
+            atexit.register(writer.flush)
+        return writer
@@ -1,24 +1,210 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 # filename: environ.py
-# modified: 2020-02-16
+# modified: 2026-10-18
 
+"""
+运行时的共享状态，由 IAAA / Elective 线程写入，monitor 与 GUI 读取
+
+计数器与容器的写操作持有同一把锁，写入频率很低（每回合若干次）；
+容器采用写时复制，读操作不加锁，拿到的总是某一时刻完整的 dict / tuple，不会与写线程冲突
+"""
+
+import threading
 from .utils import Singleton
-from collections import defaultdict
-import numpy as np
+
+
+class AtomicCounter(object):
+
+    __slots__ = ['_value','_lock']
+
+    def __init__(self, lock=None):
+        self._value = 0
+        self._lock = lock or threading.Lock()
+
+    @property
+    def value(self):
+        return self._value
+
+    def incr(self, n=1):
+        """ 增加 n，返回增加后的值 """
+        with self._lock:
+            self._value += n
+            return self._value
+
+    def _reset(self):
+        self._value = 0
+
+
+class CowDict(object):
+    """
+    写时复制的 dict，写入时复制后整体替换，读取时直接访问当前版本
+
+    snapshot() 返回的 dict 不会再被修改，调用者也不应修改它
+    """
+
+    __slots__ = ['_data','_lock']
+
+    def __init__(self, lock=None):
+        self._data = {}
+        self._lock = lock or threading.Lock()
+
+    def snapshot(self):
+        return self._data
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            data = dict(self._data)
+            data[key] = value
+            self._data = data
+
+    def __delitem__(self, key):
+        with self._lock:
+            data = dict(self._data)
+            del data[key]
+            self._data = data
+
+    def incr(self, key, n=1):
+        with self._lock:
+            data = dict(self._data)
+            data[key] = data.get(key, 0) + n
+            self._data = data
+            return data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data = {}
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def keys(self):
+        return self._data.keys()
+
+    def values(self):
+        return self._data.values()
+
+    def items(self):
+        return self._data.items()
+
+    def __repr__(self):
+        return repr(self._data)
+
+
+class CowList(object):
+    """ 写时复制的 list，snapshot() 返回 tuple """
+
+    __slots__ = ['_data','_lock']
+
+    def __init__(self, lock=None):
+        self._data = ()
+        self._lock = lock or threading.Lock()
+
+    def snapshot(self):
+        return self._data
+
+    def append(self, item):
+        with self._lock:
+            self._data = self._data + (item,)
+
+    def extend(self, items):
+        with self._lock:
+            self._data = self._data + tuple(items)
+
+    def clear(self):
+        with self._lock:
+            self._data = ()
+
+    def __getitem__(self, ix):
+        return self._data[ix]
+
+    def __contains__(self, item):
+        return item in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return repr(list(self._data))
 
 
 class Environ(object, metaclass=Singleton):
 
     def __init__(self):
+        self._lock = threading.RLock()  # shared by all counters and containers below
+        self._iaaa_loop = AtomicCounter(self._lock)
+        self._elective_loop = AtomicCounter(self._lock)
+        self.errors = CowDict(self._lock)   # { error key: count }
+        self.goals = CowList(self._lock)    # [Course]
+        self.ignored = CowDict(self._lock)  # {Course, reason}
         self.config_ini = None
         self.with_monitor = None
-        self.iaaa_loop = 0
-        self.elective_loop = 0
-        self.errors = defaultdict(lambda: 0)
+        self.profile_every = None     # write sampled stacks every N elective loops, see profiler.py
+        self.profile_interval = None  # ms
         self.iaaa_loop_thread = None
         self.elective_loop_thread = None
         self.monitor_thread = None
-        self.goals = []  # [Course]
-        self.ignored = {}  # {Course, reason}
+        self.plan_delta = None  # DatagridDelta of the latest supply/cancel page
         self.config_TTapikey = None
+
+    @property
+    def iaaa_loop(self):
+        return self._iaaa_loop.value
+
+    @property
+    def elective_loop(self):
+        return self._elective_loop.value
+
+    def next_iaaa_loop(self):
+        return self._iaaa_loop.incr()
+
+    def next_elective_loop(self):
+        return self._elective_loop.incr()
+
+    def add_error(self, key):
+        return self.errors.incr(key)
+
+    def reset(self):
+        """
+        清空运行状态，容器对象本身保持不变，已持有 environ.goals / environ.ignored 引用的模块仍然有效
+
+        配置 (config_ini, with_monitor 等) 与线程引用不受影响
+        """
+        with self._lock:
+            self._iaaa_loop._reset()
+            self._elective_loop._reset()
+            self.errors.clear()
+            self.goals.clear()
+            self.ignored.clear()
+            self.plan_delta = None
+
+    def snapshot(self):
+        """
+        某一时刻一致的运行状态，供 monitor / GUI 读取
+
+        只在复制引用时短暂持有锁，返回的 dict / tuple 之后不会再被修改
+        """
+        with self._lock:
+            return {
+                "iaaa_loop": self._iaaa_loop.value,
+                "elective_loop": self._elective_loop.value,
+                "errors": self.errors.snapshot(),
+                "goals": self.goals.snapshot(),
+                "ignored": self.ignored.snapshot(),
+                "plan_delta": self.plan_delta,
+            }
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: events.py
+# modified: 2026-10-18
+
+"""
+选课过程中的增量事件，供 monitor 的 /stream (Server-Sent Events) 推送
+
+所有订阅者共享同一个有界的环形缓冲区，事件在发布时只序列化一次，
+订阅者在 Condition 上等待新事件，不存在逐个客户端的队列或轮询
+"""
+
+import json
+import time
+import threading
+from collections import deque
+
+EVENT_BUFFER_SIZE = 256   # 缓冲区中保留的最近事件数，落后更多的订阅者会收到 "dropped" 事件
+KEEPALIVE_INTERVAL = 15.0 # 没有新事件时发送 SSE 注释的间隔 (秒)，防止代理断开空闲连接
+
+
+class Event(object):
+
+    __slots__ = ['_id','_type','_data','_frame']
+
+    def __init__(self, id, type, data):
+        self._id = id
+        self._type = type
+        self._data = data
+        self._frame = ("id: %d\nevent: %s\ndata: %s\n\n" % (
+            id, type, json.dumps(data, ensure_ascii=False))).encode("utf-8")
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def type(self):
+        return self._type
+
+    @property
+    def data(self):
+        return self._data
+
+    @property
+    def frame(self):
+        """ 序列化后的 SSE 消息 """
+        return self._frame
+
+
+class EventBus(object):
+
+    __slots__ = ['_buffer','_next_id','_cond','_closed']
+
+    def __init__(self, size=EVENT_BUFFER_SIZE):
+        self._buffer = deque(maxlen=size)
+        self._next_id = 1
+        self._cond = threading.Condition(threading.Lock())
+        self._closed = False
+
+    @property
+    def last_id(self):
+        return self._next_id - 1
+
+    def publish(self, type, **data):
+        data["time"] = time.time()
+        with self._cond:
+            e = Event(self._next_id, type, data)
+            self._next_id += 1
+            self._buffer.append(e)
+            self._cond.notify_all()
+        return e
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _events_after(self, last_id):
+        """ 在持有锁时调用，返回 (dropped, [Event]) """
+        if len(self._buffer) == 0 or self._buffer[-1].id <= last_id:
+            return 0, []
+        first_id = self._buffer[0].id
+        dropped = max(0, first_id - last_id - 1)
+        start = max(0, last_id + 1 - first_id)
+        return dropped, [ self._buffer[ix] for ix in range(start, len(self._buffer)) ]
+
+    def subscribe(self, last_id=None, keepalive=KEEPALIVE_INTERVAL):
+        """
+        生成 SSE 消息 (bytes)，last_id 为 None 时只推送订阅之后的事件，否则从 last_id 之后续传（Last-Event-ID）
+
+        last_id 大于已发布的最大 id 时 (进程重启后 id 从 1 重新开始)，先发送 "reset" 事件，再从缓冲区开头推送
+
+        没有新事件时每隔 keepalive 秒产生一个注释行，以便及时发现已断开的连接
+        """
+        reset = False
+        with self._cond:
+            if last_id is None:
+                last_id = self.last_id
+            elif last_id > self.last_id:
+                reset = True
+                last_id = self._buffer[0].id - 1 if len(self._buffer) > 0 else 0
+        yield b"retry: 3000\n\n"
+        if reset:  # no id field, the client's Last-Event-ID is replaced by the next event
+            yield ("event: reset\ndata: %s\n\n" % json.dumps({ "last_id": last_id })).encode("utf-8")
+        while True:
+            with self._cond:
+                dropped, events = self._events_after(last_id)
+                if len(events) == 0 and not self._closed:
+                    self._cond.wait(keepalive)
+                    dropped, events = self._events_after(last_id)
+                closed = self._closed
+            if dropped > 0:  # no id field, so the client's Last-Event-ID is kept
+                yield ("event: dropped\ndata: %s\n\n" % json.dumps({ "count": dropped })).encode("utf-8")
+            for e in events:
+                yield e.frame
+                last_id = e.id
+            if closed:
+                return
+            if len(events) == 0:
+                yield b": keepalive\n\n"
+
+
+loop_events = EventBus()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: extractor.py
+# modified: 2026-10-18
+
+"""
+基于 lxml.etree.HTMLPullParser 的流式解析
+
+补退选页只需要用到两张 datagrid 表格，逐块喂入 r.content，每读完一行 <tr> 就解析出 Course 并释放该行，
+读完所需的表格后立即停止，页面之后的部分（页脚等）不会被解析
+
+HTMLPullParser 本身比一次性的 etree.HTML 慢 (200K 的页面约多 1.2ms)，流式解析只在表格之后还有
+大量内容时更快：带 200K 页脚的 20 / 200 / 2000 行页面约为整树解析的 4x / 1.5x / 1.1~1.3x；
+表格之后没有内容的页面 (如 <tbody> / <thead> 的 200 行页面) 约为 0.8~1.0x，峰值内存始终更低
+
+两次刷新之间绝大多数行的 HTML 完全相同，IncrementalExtractor 以每行的原始字节作为指纹，
+只重新解析指纹变化的行，并给出与上一次刷新相比的变化 (DatagridDelta)
+"""
+
+from lxml import etree
+from .course import course_pool
+from .parser import (
+    _get_html_parser,
+    get_response_encoding,
+    get_table_header,
+    get_table_trs,
+    get_column_ixs,
+    get_course_fields_from_tr,
+    get_detail_fields_from_tr,
+    get_course_from_tr,
+    get_course_with_detail_from_tr,
+    get_title,
+    COURSE_COLUMNS,
+    DETAIL_COLUMNS,
+)
+
+_CHUNK_SIZE = 16 * 1024
+
+# 按字节切分表格与行，elective 输出的标签均为小写；在 2MB 的页面上比等价的正则快一个数量级
+_DATAGRID_CLASS = b'class="datagrid"'
+_HEADER_CLASS = b'class="datagrid-header"'
+_ROW_CLASSES = (b'class="datagrid-odd"', b'class="datagrid-even"')
+
+
+def _iter_events(content, encoding, events, tag):
+    parser = etree.HTMLPullParser(events=events, tag=tag, encoding=encoding)
+    for ix in range(0, len(content), _CHUNK_SIZE):
+        parser.feed(content[ix:ix+_CHUNK_SIZE])
+        yield from parser.read_events()
+    if len(content) > 0:
+        parser.close()
+        yield from parser.read_events()
+
+
+def get_title_from_response(r):
+    """
+    只解析到 <title> 为止，如果 r 的文档树已经建立则直接使用
+    """
+    tree = getattr(r, "_tree", None)
+    if tree is not None:
+        return get_title(tree)
+    for event, el in _iter_events(r.content, get_response_encoding(r), ("start", "end"), ("title", "body")):
+        if el.tag == "body": # 双学位 sso_login 后先到 主修/辅双 选择页，这个页面没有 title 标签
+            return None
+        if event == "end" and el.getparent() is not None and el.getparent().tag == "head":
+            return el.text
+    return None
+
+
+def iter_datagrid_rows(content, encoding, with_detail=(True, False), pool=course_pool):
+    """
+    依次产生页面中各张 datagrid 的 (table_ix, Course)，读完 len(with_detail) 张表格后停止
+
+    with_detail: 第 i 张表格是否带名额信息，默认第一张为选课计划，第二张为已选课程
+
+    用 <table> 的 start / end 事件记录嵌套层数，每行只需比较层数，不必查找所在的表格；
+    每读完一行就释放它及之前的兄弟节点
+    """
+    n_tables = len(with_detail)
+    depth = 0          # 当前的 <table> 嵌套层数
+    table = None       # 正在读取的 datagrid
+    table_depth = 0
+    table_ix = -1
+    ixs = None
+    seen = None        # 当前表格中已出现的课程，见 CoursePool.get_with_detail
+
+    for event, el in _iter_events(content, encoding, ("start", "end"), ("table", "tr")):
+        if el.tag == "table":
+            if event == "start":
+                depth += 1
+                # 与 parser.get_tables 保持一致，只取嵌套在其他表格中的 datagrid
+                if table is None and depth >= 2 and el.get("class") == "datagrid":
+                    table = el
+                    table_depth = depth
+                    table_ix += 1
+                    ixs = None
+                    seen = set()
+            else:
+                depth -= 1
+                if el is table:
+                    if table_ix == n_tables - 1:
+                        return # the last table we need is complete, stop parsing
+                    table = None
+            continue
+
+        if event == "start" or depth != table_depth or table is None:
+            continue
+
+        cls = el.get("class")
+        if cls == "datagrid-header":
+            columns = DETAIL_COLUMNS if with_detail[table_ix] else COURSE_COLUMNS
+            ixs = get_column_ixs(get_table_header(table), columns)
+        elif cls in ("datagrid-odd", "datagrid-even"):
+            if with_detail[table_ix]:
+                yield table_ix, get_course_with_detail_from_tr(el, ixs, pool, seen)
+            else:
+                yield table_ix, get_course_from_tr(el, ixs, pool)
+
+        el.clear()
+        parent = el.getparent()  # the table itself, or its <thead> / <tbody>
+        while el.getprevious() is not None:
+            del parent[0]
+        if parent is not table:
+            while parent.getprevious() is not None:
+                del table[0]
+
+
+def extract_datagrids(r, with_detail=(True, False), pool=course_pool):
+    """
+    流式读取 r 中的 datagrid 表格，返回各表格的 [Course]，页面中的表格不足时返回的列表也相应地变短
+    """
+    tables = []
+    for table_ix, c in iter_datagrid_rows(r.content, get_response_encoding(r), with_detail, pool):
+        while len(tables) <= table_ix:
+            tables.append([])
+        tables[table_ix].append(c)
+    return tables
+
+
+def _split_datagrids(content, n):
+    """ 前 n 张 datagrid 表格 <table ...> 与 </table> 之间的原始字节，找不到 n 张时返回 None """
+    segments = []
+    pos = 0
+    while len(segments) < n:
+        pos = content.find(_DATAGRID_CLASS, pos)
+        if pos == -1:
+            return None
+        start = content.rfind(b"<", 0, pos)
+        if not content.startswith(b"<table", start):  # <td class="datagrid"> etc.
+            pos += len(_DATAGRID_CLASS)
+            continue
+        begin = content.find(b">", pos) + 1
+        end = content.find(b"</table", begin)
+        if begin == 0 or end == -1:
+            return None
+        segments.append(content[begin:end])
+        pos = end
+    return segments
+
+def _split_rows(segment):
+    """ (表头行, [数据行])，每行从 <tr 到下一个 <tr 之前，存在未知的行时返回 (None, None) """
+    header = None
+    rows = []
+    starts = []
+    pos = segment.find(b"<tr")
+    while pos != -1:
+        starts.append(pos)
+        pos = segment.find(b"<tr", pos + 3)
+    starts.append(len(segment))
+    for i in range(len(starts) - 1):
+        row = segment[starts[i]:starts[i+1]]
+        tag = row[:row.find(b">")]
+        if _ROW_CLASSES[0] in tag or _ROW_CLASSES[1] in tag:
+            rows.append(row)
+        elif _HEADER_CLASS in tag:
+            header = row
+        else:
+            return None, None
+    return header, rows
+
+
+class DatagridDelta(object):
+    """
+    一张 datagrid 与上一次刷新相比的变化
+
+    changed 为字段（名额、选课链接）有变化的课程，Course 已经是更新后的状态
+    """
+
+    __slots__ = ['_added','_removed','_changed','_reordered']
+
+    def __init__(self, added=(), removed=(), changed=(), reordered=False):
+        self._added = list(added)      # [Course]
+        self._removed = list(removed)  # [Course]
+        self._changed = list(changed)  # [Course]
+        self._reordered = reordered
+
+    @property
+    def added(self):
+        return self._added
+
+    @property
+    def removed(self):
+        return self._removed
+
+    @property
+    def changed(self):
+        return self._changed
+
+    @property
+    def reordered(self):
+        return self._reordered
+
+    def __bool__(self):
+        return bool(self._added or self._removed or self._changed or self._reordered)
+
+    def __repr__(self):
+        return "DatagridDelta(added=%d, removed=%d, changed=%d, reordered=%s)" % (
+            len(self._added), len(self._removed), len(self._changed), self._reordered)
+
+    def to_dict(self):
+        return {
+            "added": [ str(c) for c in self._added ],
+            "removed": [ str(c) for c in self._removed ],
+            "changed": [ str(c) for c in self._changed ],
+            "reordered": self._reordered,
+        }
+
+
+class _TableState(object):
+
+    __slots__ = ['segment','rows','fields','courses','order','ixs']
+
+    def __init__(self):
+        self.segment = None  # 上一次的整张表格的原始字节
+        self.rows = []       # [row bytes]
+        self.fields = {}     # { row bytes: 原始文本字段 }
+        self.courses = {}    # { Course._ident: (原始文本字段, Course) }
+        self.order = []      # [Course]
+        self.ixs = {}        # { header bytes: ixs }
+
+
+class IncrementalExtractor(object):
+    """
+    增量版本的 extract_datagrids，按行的原始字节判断是否变化，未变化的行不经过 lxml
+
+    按出现顺序取页面中前 len(with_detail) 张 class="datagrid" 的表格，
+    页面结构与预期不符（表格嵌套、省略 </tr> 等）时退回到 extract_datagrids，并重建缓存
+    """
+
+    __slots__ = ['_with_detail','_pool','_states','_deltas']
+
+    def __init__(self, with_detail=(True, False), pool=course_pool):
+        self._with_detail = tuple(with_detail)
+        self._pool = pool
+        self._states = [ _TableState() for _ in self._with_detail ]
+        self._deltas = [ DatagridDelta() for _ in self._with_detail ]
+
+    @property
+    def deltas(self):
+        """ 最近一次 extract 中各表格的 DatagridDelta """
+        return self._deltas
+
+    def reset(self):
+        self._states = [ _TableState() for _ in self._with_detail ]
+        self._deltas = [ DatagridDelta() for _ in self._with_detail ]
+
+    def extract(self, r):
+        content = r.content
+        encoding = get_response_encoding(r)
+        segments = _split_datagrids(content, len(self._with_detail))
+        if segments is None:
+            return self._fallback(r)
+
+        tables = []
+        deltas = []
+        for table_ix, segment in enumerate(segments):
+            result = self._extract_table(table_ix, segment, encoding)
+            if result is None:
+                return self._fallback(r)
+            courses, delta = result
+            tables.append(courses)
+            deltas.append(delta)
+
+        deltas.extend( DatagridDelta() for _ in range(len(self._with_detail) - len(deltas)) )
+        self._deltas = deltas
+        return tables
+
+    def _fallback(self, r):
+        tables = extract_datagrids(r, self._with_detail, self._pool)
+        deltas = []
+        for table_ix, state in enumerate(self._states):
+            courses = tables[table_ix] if table_ix < len(tables) else []
+            current = { c._ident: (None, c) for c in courses }
+            deltas.append(DatagridDelta(
+                added=[ c for ident, (_, c) in current.items() if ident not in state.courses ],
+                removed=[ c for ident, (_, c) in state.courses.items() if ident not in current ],
+                changed=[ c for ident, (_, c) in current.items() if ident in state.courses ], # 无法判断，视为全部变化
+            ))
+            state.__init__()
+            state.courses = current
+            state.order = courses
+        self._deltas = deltas
+        return tables
+
+    def _extract_table(self, table_ix, segment, encoding):
+        state = self._states[table_ix]
+        with_detail = self._with_detail[table_ix]
+
+        header = None
+        if segment == state.segment:
+            rows = state.rows  # 整张表格未变化，所有行都能命中缓存
+        else:
+            if b"<table" in segment:
+                return None
+            header, rows = _split_rows(segment)
+            if header is None:
+                return None
+
+        fields = state.fields
+        missing = [ row for row in rows if row not in fields ]
+        if len(missing) > 0:
+            ixs = state.ixs.get(header)
+            if ixs is None:
+                tree = etree.HTML(b"<table>" + header + b"</table>", _get_html_parser(encoding))
+                columns = DETAIL_COLUMNS if with_detail else COURSE_COLUMNS
+                ixs = state.ixs[header] = get_column_ixs(get_table_header(tree), columns)
+            tree = etree.HTML(b"<table>" + b"".join(missing) + b"</table>", _get_html_parser(encoding))
+            trs = get_table_trs(tree)
+            if len(trs) != len(missing):
+                return None
+            get_fields = get_detail_fields_from_tr if with_detail else get_course_fields_from_tr
+            fields = dict(fields)
+            for row, tr in zip(missing, trs):
+                fields[row] = tuple(map(str, get_fields(tr, ixs)))
+
+        seen = set()
+        get_course = (lambda *f: self._pool.get_with_detail(*f, seen)) if with_detail else self._pool.get
+        courses = []
+        current = {}
+        added = []
+        changed = []
+        for row in rows:
+            f = fields[row]
+            c = get_course(*f)
+            courses.append(c)
+            current[c._ident] = (f, c)
+            previous = state.courses.get(c._ident)
+            if previous is None:
+                added.append(c)
+            elif previous[0] != f:
+                changed.append(c)
+        removed = [ c for ident, (_, c) in state.courses.items() if ident not in current ]
+        reordered = not (added or removed or changed) and rows is not state.rows \
+                    and any( c is not c0 for c, c0 in zip(courses, state.order) )
+
+        state.segment = segment
+        state.rows = rows
+        state.fields = { row: fields[row] for row in rows }  # 只保留本次出现的行
+        state.courses = current
+        state.order = courses
+        return courses, DatagridDelta(added, removed, changed, reordered)
@@ -8,6 +8,7 @@ from .cli import (
     create_default_parser,
     create_default_threads_reload,
     setup_default_environ,
+    start_default_profiler,
 )
 from .environ import Environ
 
@@ -26,6 +27,8 @@ def run_worker():
         thread.daemon = True
         thread.start()
 
+    start_default_profiler(options, args, environ)
+
     # 保持主线程存活，直到被外部终止。
     try:
         Queue().get()
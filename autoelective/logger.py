@@ -1,27 +1,205 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 # filename: logger.py
+# modified: 2026-10-18
+
+"""
+所有 ConsoleLogger / FileLogger 的输出都先放入同一个有界队列，由一个后台线程写到控制台与文件，
+选课线程中的 cout.info 不再直接进行 I/O
+
+队列满时按 [client] log_drop_policy 处理 DEBUG / INFO 记录，WARNING 及以上的记录不会被丢弃
+
+导入本模块与创建 logger 时不读取配置：队列在第一条记录写出时按配置创建 (get_log_listener)，
+FileLogger 的日志文件在第一次写出时才确定目录并打开
+"""
 
 import os
+import atexit
+import queue
 import logging
+import threading
 from logging import StreamHandler
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
 from .config import AutoElectiveConfig
 from .const import ERROR_LOG_DIR
 from ._internal import mkdir
-from .notification.bark_push import Notify
 from .const import WECHAT_MSG, WECHAT_PREFIX
+from .metrics import metrics_registry
 
-config = AutoElectiveConfig()
-notify = Notify(
-    _disable_push=config.disable_push,
-    _token=config.wechat_token,
-    _interval_lock=config.minimum_interval,
-    _verbosity=config.verbosity,
+_notify = None
+_logListener = None
+_initLock = threading.Lock()
+
+_droppedTotal = metrics_registry.counter(
+    "autoelective_log_records_dropped_total", "Log records dropped because the log queue was full", ["level"],
 )
 
-_USER_ERROR_LOG_DIR = os.path.join(ERROR_LOG_DIR, config.get_user_subpath())
-mkdir(_USER_ERROR_LOG_DIR)
+
+class AsyncLogListener(QueueListener):
+    """
+    队列中的元素为 (handler, record)，所有 logger 共用一个后台线程，各自的 handler 只在该线程中调用
+
+    policy:
+        block       队列满时等待
+        drop_new    队列满时丢弃新的记录
+        drop_old    队列满时丢弃最早的记录
+    """
+
+    def __init__(self, maxsize=10000, policy="drop_new"):
+        super().__init__(queue.Queue(maxsize), respect_handler_level=True)
+        self._maxsize = maxsize
+        self._policy = policy
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    @property
+    def policy(self):
+        return self._policy
+
+    @property
+    def depth(self):
+        return self.queue.qsize()
+
+    @property
+    def dropped(self):
+        return self._dropped
+
+    def _drop(self, record):
+        with self._lock:
+            self._dropped += 1
+        _droppedTotal.inc(level=record.levelname)
+
+    def put(self, handler, record):
+        item = (handler, record)
+        if self._thread is None:  # not started yet or already stopped at exit
+            self.handle(item)
+            return
+        if self._policy == "block" or record.levelno >= logging.WARNING:
+            self.queue.put(item)
+            return
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                if self._policy == "drop_new":
+                    self._drop(record)
+                    return
+            try:
+                old_handler, old_record = self.queue.get_nowait()
+            except queue.Empty:
+                continue
+            self.queue.task_done()  # evicted, otherwise queue.join() would never return
+            if old_record.levelno >= logging.WARNING:
+                self.handle((old_handler, old_record))  # never dropped, write it on this thread instead
+            else:
+                self._drop(old_record)
+
+    def handle(self, item):
+        handler, record = item
+        if not self.respect_handler_level or record.levelno >= handler.level:
+            handler.handle(record)
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+    def start(self):
+        if self._thread is None:
+            super().start()
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+    def stats(self):
+        return {
+            "maxsize": self._maxsize,
+            "policy": self._policy,
+            "depth": self.depth,
+            "dropped": self._dropped,
+        }
+
+
+class _LogQueueHandler(QueueHandler):
+    """ 在调用线程中完成格式化参数与异常栈，再把 (target, record) 交给 AsyncLogListener """
+
+    def __init__(self, target, listener=None):
+        super().__init__(None)
+        self._target = target
+        self._listener = listener  # None: get_log_listener() at the first record
+        self.setLevel(target.level)
+
+    @property
+    def target(self):
+        return self._target
+
+    def enqueue(self, record):
+        (self._listener or get_log_listener()).put(self._target, record)
+
+
+class _DeferredFileHandler(logging.Handler):
+    """ 第一次写出时才按配置确定目录 (log/error/<学号>) 并打开 TimedRotatingFileHandler """
+
+    def __init__(self, name, level, format):
+        super().__init__(level)
+        self.setFormatter(format)
+        self._name = name
+        self._handler = None
+
+    def emit(self, record):
+        if self._handler is None:
+            directory = os.path.join(ERROR_LOG_DIR, AutoElectiveConfig().get_user_subpath())
+            mkdir(directory)
+            self._handler = TimedRotatingFileHandler(
+                os.path.join(directory, "%s.log" % self._name), when="d", interval=1, encoding="utf-8-sig"
+            )
+            self._handler.setFormatter(self.formatter)
+        self._handler.emit(record)
+
+    def close(self):
+        if self._handler is not None:
+            self._handler.close()
+        super().close()
+
+
+def get_log_listener():
+    """ 所有 logger 共用的 AsyncLogListener，第一次调用时按配置创建并启动 """
+    global _logListener
+    if _logListener is None:
+        with _initLock:
+            if _logListener is None:
+                config = AutoElectiveConfig()
+                listener = AsyncLogListener(config.log_queue_size, config.log_drop_policy)
+                listener.start()
+                atexit.register(listener.stop)  # flush the remaining records
+                _logListener = listener
+    return _logListener
+
+
+def _get_notify():
+    global _notify
+    if _notify is None:
+        with _initLock:
+            if _notify is None:
+                from .notification.bark_push import Notify  # imports notification.dispatcher, which logs through this module
+                config = AutoElectiveConfig()
+                _notify = Notify(
+                    _disable_push=config.disable_push,
+                    _token=config.wechat_token,
+                    _interval_lock=config.minimum_interval,
+                    _verbosity=config.verbosity,
+                )
+    return _notify
+
+
+metrics_registry.gauge(
+    "autoelective_log_queue_depth", "Log records waiting to be written",
+    lambda: _logListener.depth if _logListener is not None else 0,
+)
 
 
 class BaseLogger(object):
@@ -38,7 +216,7 @@ class BaseLogger(object):
         self._format = format if format is not None else self.__class__.default_format
         self._logger = logging.getLogger(self._name)
         self._logger.setLevel(self._level)
-        self._logger.addHandler(self._get_handler())
+        self._logger.addHandler(_LogQueueHandler(self._get_handler()))
 
     @property
     def handlers(self):
@@ -63,6 +241,7 @@ class BaseLogger(object):
         return self._logger.warning(msg, *args, **kwargs)
 
     def error(self, msg, *args, **kwargs):
+        notify = _get_notify()
         if notify.get_verbosity == 2:
             notify.send_bark_push(
                 token=notify.get_token, msg=str(msg), prefix=WECHAT_PREFIX[0]
@@ -74,6 +253,7 @@ class BaseLogger(object):
         return self._logger.exception(msg, *args, **kwargs)
 
     def fatal(self, msg, *args, **kwargs):
+        notify = _get_notify()
         notify.send_bark_push(
             token=notify.get_token, msg=str(msg), prefix=WECHAT_PREFIX[0]
         )
@@ -101,10 +281,4 @@ class FileLogger(BaseLogger):
     default_level = logging.WARNING
 
     def _get_handler(self):
-        file = os.path.join(_USER_ERROR_LOG_DIR, "%s.log" % self._name)
-        handler = TimedRotatingFileHandler(
-            file, when="d", interval=1, encoding="utf-8-sig"
-        )
-        handler.setLevel(self._level)
-        handler.setFormatter(self._format)
-        return handler
+        return _DeferredFileHandler(self._name, self._level, self._format)
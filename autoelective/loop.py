@@ -4,12 +4,11 @@
 @Date   : 2025-08-30
 """
 
-import os
 import time
 import random
+import threading
 from queue import Queue
 from collections import deque
-from itertools import combinations
 from requests.compat import json
 from requests.exceptions import RequestException
 import numpy as np
@@ -18,69 +17,104 @@ from .environ import Environ
 from .config import AutoElectiveConfig
 from .logger import ConsoleLogger, FileLogger
 from .course import Course
-from .captcha import TTShituRecognizer, Captcha
-from .parser import get_tables, get_courses, get_courses_with_detail, get_sida
+from .matcher import (
+    PageIndex,
+    MutexGroups,
+    NO_DELAY,
+    match_goals,
+    ignore_elected,
+    select_tasks,
+    find_elected_mutex,
+)
+from .parser import (
+    get_tree_from_response,
+    get_tables,
+    get_courses,
+    get_quotas,
+    get_sida,
+)
+from .extractor import IncrementalExtractor
+from .metrics import stage_latency, metrics_registry
+from .events import loop_events
 from .hook import _dump_request
 from .iaaa import IAAAClient
 from .elective import ElectiveClient
 from .const import (
-    CAPTCHA_CACHE_DIR,
-    USER_AGENT_LIST,
-    WEB_LOG_DIR,
+    get_user_agent_list,
     WECHAT_MSG,
     WECHAT_PREFIX,
 )
 from .exceptions import *
-from ._internal import mkdir
 from .notification.bark_push import Notify
 
 environ = Environ()
-config = AutoElectiveConfig()
 cout = ConsoleLogger("loop")
 ferr = FileLogger("loop.error")  # loop 的子日志，同步输出到 console
 
-username = config.iaaa_id
-password = config.iaaa_password
-is_dual_degree = config.is_dual_degree
-identity = config.identity
-refresh_interval = config.refresh_interval
-refresh_random_deviation = config.refresh_random_deviation
-supply_cancel_page = config.supply_cancel_page
-iaaa_client_timeout = config.iaaa_client_timeout
-elective_client_timeout = config.elective_client_timeout
-login_loop_interval = config.login_loop_interval
-elective_client_pool_size = config.elective_client_pool_size
-elective_client_max_life = config.elective_client_max_life
-is_print_mutex_rules = config.is_print_mutex_rules
-notify = Notify(
-    _disable_push=config.disable_push,
-    _token=config.wechat_token,
-    _interval_lock=config.minimum_interval,
-    _verbosity=config.verbosity,
-)
-
-config.check_identify(identity)
-config.check_supply_cancel_page(supply_cancel_page)
+#
+# 以下由配置决定的变量在 setup() / refreshsettings() 中赋值，导入本模块时不读取配置、
+# 不加载验证码模型、不发送推送，也不创建任何目录
+#
+username = None
+password = None
+is_dual_degree = None
+identity = None
+refresh_interval = None
+refresh_random_deviation = None
+supply_cancel_page = None
+iaaa_client_timeout = None
+elective_client_timeout = None
+login_loop_interval = None
+elective_client_pool_size = None
+elective_client_max_life = None
+is_print_mutex_rules = None
+notify = None
+recognizer = None  # created by _get_recognizer() at the first captcha
 
-_USER_WEB_LOG_DIR = os.path.join(WEB_LOG_DIR, config.get_user_subpath())
-mkdir(_USER_WEB_LOG_DIR)
-
-# recognizer = CaptchaRecognizer()
-recognizer = TTShituRecognizer()
 RECOGNIZER_MAX_ATTEMPT = 15
+LATENCY_LOG_INTERVAL = 20  # print stage latency every N elective loops
 
-electivePool = Queue(maxsize=elective_client_pool_size)
-reloginPool = Queue(maxsize=elective_client_pool_size)
+electivePool = None
+reloginPool = None
 
 goals = environ.goals  # let N = len(goals);
 ignored = environ.ignored
-mutexes = np.zeros(0, dtype=np.uint8)  # uint8 [N][N];
+mutexes = MutexGroups()  # groups of [ix]
 delays = np.zeros(0, dtype=np.int32)  # int [N];
+extractor = IncrementalExtractor()  # plans / elected of the supply/cancel page
 
-killedElective = ElectiveClient(-1)
-NO_DELAY = -1
+killedElective = None
 
-notify.send_bark_push(msg=WECHAT_MSG["s"], prefix=WECHAT_PREFIX[3])
+_isConfigured = False  # refreshsettings() has been called
+_isStarted = False     # the start notification has been sent
+_setupLock = threading.Lock()
+
+iaaa_loops_total = metrics_registry.counter(
+    "autoelective_iaaa_loops_total", "Iterations of the IAAA login loop"
+)
+elective_loops_total = metrics_registry.counter(
+    "autoelective_elective_loops_total", "Iterations of the elective loop"
+)
+logins_total = metrics_registry.counter(
+    "autoelective_logins_total", "IAAA login attempts by result", ("result",)
+)
+errors_total = metrics_registry.counter(
+    "autoelective_errors_total", "Exceptions counted by the loops, by class", ("exception",)
+)
+metrics_registry.gauge(
+    "autoelective_elective_pool_size", "Logged-in clients waiting in the elective pool",
+    lambda: electivePool.qsize() if electivePool is not None else 0,
+)
+metrics_registry.gauge(
+    "autoelective_relogin_pool_size", "Clients waiting in the relogin pool",
+    lambda: reloginPool.qsize() if reloginPool is not None else 0,
+)
+metrics_registry.gauge(
+    "autoelective_goals", "Courses configured as goals", lambda: len(goals),
+)
+metrics_registry.gauge(
+    "autoelective_ignored", "Goals ignored so far", lambda: len(ignored),
+)
 
 
 # 刷新系统配置
@@ -89,9 +123,10 @@ def refreshsettings():
     global refresh_random_deviation, supply_cancel_page, iaaa_client_timeout
     global elective_client_timeout, login_loop_interval, elective_client_pool_size
     global elective_client_max_life, is_print_mutex_rules, notify
-    global electivePool, reloginPool, goals, ignored, mutexes, delays
-    global recognizer
+    global electivePool, reloginPool, goals, ignored, mutexes, delays, extractor
+    global recognizer, killedElective, _isConfigured
 
+    config = AutoElectiveConfig()
     username = config.iaaa_id
     password = config.iaaa_password
     is_dual_degree = config.is_dual_degree
@@ -112,18 +147,45 @@ def refreshsettings():
         _verbosity=config.verbosity,
     )
 
-    recognizer = TTShituRecognizer()
+    config.check_identify(identity)
+    config.check_supply_cancel_page(supply_cancel_page)
+
+    recognizer = None  # rebuilt at the next captcha
 
     electivePool = Queue(maxsize=elective_client_pool_size)
     reloginPool = Queue(maxsize=elective_client_pool_size)
 
     goals = environ.goals  # let N = len(goals);
     ignored = environ.ignored
-    mutexes = np.zeros(0, dtype=np.uint8)  # uint8 [N][N];
+    mutexes = MutexGroups()  # groups of [ix]
     delays = np.zeros(0, dtype=np.int32)  # int [N];
+    extractor = IncrementalExtractor()  # plans / elected of the supply/cancel page
+    killedElective = ElectiveClient(-1)
+    _isConfigured = True
     return
 
 
+def setup():
+    """
+    在循环线程开始时调用：尚未读取配置时调用 refreshsettings()，并在进程中第一次启动时发送开始推送
+
+    已经调用过 refreshsettings() (如 GUI 的重新加载) 时不再重复读取，之后对模块变量的修改仍然有效
+    """
+    global _isStarted
+    with _setupLock:
+        if not _isConfigured:
+            refreshsettings()
+        if not _isStarted:
+            _isStarted = True
+            notify.send_bark_push(msg=WECHAT_MSG["s"], prefix=WECHAT_PREFIX[3])
+
+
+def _get_recognizer():
+    global recognizer
+    if recognizer is None:
+        from .captcha import TTShituRecognizer  # reads apikey.json
+        recognizer = TTShituRecognizer()
+    return recognizer
 
 
 class _ElectiveNeedsLogin(Exception):
@@ -143,13 +205,33 @@ def _get_refresh_interval():
 
 def _ignore_course(course, reason):
     ignored[course.to_simplified()] = reason
+    loop_events.publish("course_ignored", course=str(course.to_simplified()), reason=reason)
+
+
+def _ignore_elected_course(course, reason, cause):
+    if cause is None:
+        cout.info("%s is elected, ignored" % course)
+    else:
+        cout.info("%s is simultaneously ignored by mutex rules" % course)
+    _ignore_course(course, reason)
+
+
+def _dump_page(r, exception, log):
+    """ 转储出错时的页面，并告诉用户如何在归档中找到这条记录 """
+    directory = _dump_request(r, exception)
+    if directory is None:
+        log("Dump queue is full, the page of %s is NOT dumped" % exception)
+        return
+    log("Page of %s dumped to %s, list it with: python -m autoelective.archive list %s --exception %s --limit 1"
+        % (exception, directory, directory, exception))
 
 
 def _add_error(e):
     clz = e.__class__
     name = clz.__name__
     key = "[%s] %s" % (e.code, name) if hasattr(clz, "code") else name
-    environ.errors[key] += 1
+    environ.add_error(key)
+    errors_total.inc(exception=name)
 
 
 def _format_timestamp(timestamp):
@@ -158,15 +240,10 @@ def _format_timestamp(timestamp):
     return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
 
 
-def _dump_respose_content(content, filename):
-    path = os.path.join(_USER_WEB_LOG_DIR, filename)
-    with open(path, "wb") as fp:
-        fp.write(content)
-
-
 def run_iaaa_loop():
     # 刷新配置（不在此处不刷新，在启动时统一刷新）
     # refreshdata()
+    setup()
 
     elective = None
 
@@ -177,8 +254,9 @@ def run_iaaa_loop():
                 cout.info("Quit IAAA loop")
                 return
 
-        environ.iaaa_loop += 1
-        user_agent = random.choice(USER_AGENT_LIST)
+        environ.next_iaaa_loop()
+        iaaa_loops_total.inc()
+        user_agent = random.choice(get_user_agent_list())
 
         cout.info("Try to login IAAA (client: %s)" % elective.id)
         cout.info("User-Agent: %s" % user_agent)
@@ -187,10 +265,11 @@ def run_iaaa_loop():
             iaaa = IAAAClient(timeout=iaaa_client_timeout)  # not reusable
             iaaa.set_user_agent(user_agent)
 
-            # request elective's home page to get cookies
-            r = iaaa.oauth_home()
+            with stage_latency.timer("iaaa_login"):
+                # request elective's home page to get cookies
+                r = iaaa.oauth_home()
 
-            r = iaaa.oauth_login(username, password)
+                r = iaaa.oauth_login(username, password)
 
             try:
                 token = r.json()["token"]
@@ -203,13 +282,14 @@ def run_iaaa_loop():
             elective.clear_cookies()
             elective.set_user_agent(user_agent)
 
-            r = elective.sso_login(token)
+            with stage_latency.timer("sso_login"):
+                r = elective.sso_login(token)
 
-            if is_dual_degree:
-                sida = get_sida(r)
-                sttp = identity
-                referer = r.url
-                r = elective.sso_login_dual_degree(sida, sttp, referer)
+                if is_dual_degree:
+                    sida = get_sida(r)
+                    sttp = identity
+                    referer = r.url
+                    r = elective.sso_login_dual_degree(sida, sttp, referer)
 
             if elective_client_max_life == -1:
                 elective.set_expired_time(-1)
@@ -221,8 +301,10 @@ def run_iaaa_loop():
             )
             cout.info("")
 
+            loop_events.publish("client_login", client=elective.id)
             electivePool.put_nowait(elective)
             elective = None
+            logins_total.inc(result="success")
 
         except (ServerError, StatusCodeError) as e:
             ferr.error(e)
@@ -278,6 +360,8 @@ def run_iaaa_loop():
             raise e
 
         finally:
+            if elective is not None:  # not put into electivePool
+                logins_total.inc(result="failure")
             t = login_loop_interval
             cout.info("")
             cout.info("IAAA login loop sleep %s s" % t)
@@ -288,24 +372,29 @@ def run_iaaa_loop():
 def run_elective_loop():
     # 刷新配置（不在此处不刷新，在启动时统一刷新）
     # refreshdata()
+    setup()
 
     elective = None
     noWait = False
 
     ## load courses
 
+    config = AutoElectiveConfig()
     cs = config.courses  # OrderedDict
     N = len(cs)
     cid_cix = {}  # { cid: cix }
+    goal_ixs = {}  # { Course._ident: cix }
+    quotas = None  # reused until the plan table changes
 
     for ix, (cid, c) in enumerate(cs.items()):
         goals.append(c)
         cid_cix[cid] = ix
+        goal_ixs[c._ident] = ix
 
     ## load mutex
 
     ms = config.mutexes
-    mutexes.resize((N, N), refcheck=False)
+    mutexes.reset(N)
 
     for mid, m in ms.items():
         ixs = []
@@ -316,8 +405,7 @@ def run_elective_loop():
                 )
             ix = cid_cix[cid]
             ixs.append(ix)
-        for ix1, ix2 in combinations(ixs, 2):
-            mutexes[ix1, ix2] = mutexes[ix2, ix1] = 1
+        mutexes.add_group(ixs)
 
     ## load delay
 
@@ -338,7 +426,7 @@ def run_elective_loop():
 
     for ix in range(1, elective_client_pool_size + 1):
         client = ElectiveClient(id=ix, timeout=elective_client_timeout)
-        client.set_user_agent(random.choice(USER_AGENT_LIST))
+        client.set_user_agent(random.choice(get_user_agent_list()))
         electivePool.put_nowait(client)
 
     cout.info("欢迎使用严小希选课小助手！")
@@ -349,7 +437,7 @@ def run_elective_loop():
 
     cout.info("> User Agent")
     cout.info(line)
-    cout.info("pool_size: %d" % len(USER_AGENT_LIST))
+    cout.info("pool_size: %d" % len(get_user_agent_list()))
     cout.info(line)
     cout.info("")
     cout.info("> Config")
@@ -374,7 +462,9 @@ def run_elective_loop():
         if elective is None:
             elective = electivePool.get()
 
-        environ.elective_loop += 1
+        environ.next_elective_loop()
+        elective_loops_total.inc()
+        loop_events.publish("loop_start", loop=environ.elective_loop, client=elective.id)
 
         cout.info("")
         cout.info("======== Loop %d ========" % environ.elective_loop)
@@ -403,15 +493,14 @@ def run_elective_loop():
 
         ## print mutex rules
 
-        if np.any(mutexes):
+        if mutexes:
             cout.info("> Mutex rules")
             cout.info(line)
-            ixs = [(ix1, ix2) for ix1, ix2 in np.argwhere(mutexes == 1) if ix1 < ix2]
             if is_print_mutex_rules:
-                for ix, (ix1, ix2) in enumerate(ixs):
+                for ix, (ix1, ix2) in enumerate(mutexes.pairs()):
                     cout.info("%02d. %s --x-- %s" % (ix + 1, goals[ix1], goals[ix2]))
             else:
-                cout.info("%d mutex rules" % len(ixs))
+                cout.info("%d mutex rules" % mutexes.count_pairs())
             cout.info(line)
             cout.info("")
 
@@ -430,9 +519,20 @@ def run_elective_loop():
             cout.info(line)
             cout.info("")
 
+        ## print stage latency
+
+        if environ.elective_loop % LATENCY_LOG_INTERVAL == 0:
+            cout.info("> Stage latency")
+            cout.info(line)
+            for l in stage_latency.format_lines():
+                cout.info(l)
+            cout.info(line)
+            cout.info("")
+
         if len(current) == 0:
             cout.info("No tasks")
             cout.info("Quit elective loop")
+            loop_events.publish("finished", loop=environ.elective_loop)
             reloginPool.put_nowait(killedElective)  # kill signal
             return
 
@@ -467,17 +567,15 @@ def run_elective_loop():
             if supply_cancel_page == 1:
                 cout.info("Get SupplyCancel page %s" % supply_cancel_page)
 
-                r = page_r = elective.get_SupplyCancel(username)
-                tables = get_tables(r._tree)
+                with stage_latency.timer("page_fetch"):
+                    r = page_r = elective.get_SupplyCancel(username)
+                with stage_latency.timer("page_parse"):
+                    tables = extractor.extract(r)
                 try:
-                    elected = get_courses(tables[1])
-                    plans = get_courses_with_detail(tables[0])
+                    elected = tables[1]
+                    plans = tables[0]
                 except IndexError as e:
-                    filename = "elective.get_SupplyCancel_%d.html" % int(
-                        time.time() * 1000
-                    )
-                    _dump_respose_content(r.content, filename)
-                    cout.info("Page dump to %s" % filename)
+                    _dump_page(r, UnexceptedHTMLFormat.__name__, cout.warning)
                     raise UnexceptedHTMLFormat
 
             else:
@@ -503,13 +601,15 @@ def run_elective_loop():
                         )
 
                     cout.info("Get Supplement page %s" % supply_cancel_page)
-                    r = page_r = elective.get_supplement(
-                        username, page=supply_cancel_page
-                    )  # 双学位第二页
-                    tables = get_tables(r._tree)
+                    with stage_latency.timer("page_fetch"):
+                        r = page_r = elective.get_supplement(
+                            username, page=supply_cancel_page
+                        )  # 双学位第二页
+                    with stage_latency.timer("page_parse"):
+                        tables = extractor.extract(r)
                     try:
-                        elected = get_courses(tables[1])
-                        plans = get_courses_with_detail(tables[0])
+                        elected = tables[1]
+                        plans = tables[0]
                     except IndexError as e:
                         cout.warning("IndexError encountered")
                         cout.info(
@@ -527,42 +627,36 @@ def run_elective_loop():
 
             cout.info("Get available courses")
 
-            tasks = []  # [(ix, course)]
-            for ix, c in enumerate(goals):
+            with stage_latency.timer("match"):
+                delta = environ.plan_delta = extractor.deltas[0]
+                if delta or quotas is None:
+                    quotas = get_quotas(plans, goal_ixs)
+                index = PageIndex(plans, elected, quotas)
+                result = match_goals(goals, goal_ixs, index, ignored, delays)
+
+            if not delta:
+                cout.info("Plan table unchanged")
+
+            ignore_elected(result, goals, mutexes, ignored, _ignore_elected_course)
+
+            for ix, c in result.missing:
                 if c in ignored:
                     continue
-                elif c in elected:
-                    cout.info("%s is elected, ignored" % c)
-                    _ignore_course(c, "Elected")
-                    for (mix,) in np.argwhere(mutexes[ix, :] == 1):
-                        mc = goals[mix]
-                        if mc in ignored:
-                            continue
-                        cout.info("%s is simultaneously ignored by mutex rules" % mc)
-                        _ignore_course(mc, "Mutex rules")
-                else:
-                    for c0 in plans:  # c0 has detail
-                        if c0 == c:
-                            if c0.is_available():
-                                delay = delays[ix]
-                                if delay != NO_DELAY and c0.remaining_quota > delay:
-                                    cout.info(
-                                        "%s hasn't reached the delay threshold %d, skip"
-                                        % (c0, delay)
-                                    )
-                                else:
-                                    tasks.append((ix, c0))
-                                    cout.info("%s is AVAILABLE now !" % c0)
-                            break
-                    else:
-                        raise UserInputException(
-                            "%s is not in your course plan, please check your config."
-                            % c
-                        )
+                raise UserInputException(
+                    "%s is not in your course plan, please check your config." % c
+                )
+
+            for ix, c0 in result.delayed:  # c0 has detail
+                if c0 in ignored:
+                    continue
+                cout.info(
+                    "%s hasn't reached the delay threshold %d, skip" % (c0, delays[ix])
+                )
 
-            tasks = deque(
-                [(ix, c) for ix, c in tasks if c not in ignored]
-            )  # filter again and change to deque
+            tasks = deque(select_tasks(result, ignored))  # [(ix, course)]
+            for ix, c0 in tasks:
+                cout.info("%s is AVAILABLE now !" % c0)
+                loop_events.publish("course_available", course=str(c0))
 
             ## elect available courses
 
@@ -575,19 +669,12 @@ def run_elective_loop():
             while len(tasks) > 0:
                 ix, course = tasks.popleft()
 
-                is_mutex = False
-
                 # dynamically filter course by mutex rules
-                for (mix,) in np.argwhere(mutexes[ix, :] == 1):
-                    mc = goals[mix]
-                    if mc in elected:  # ignore course in advanced
-                        is_mutex = True
-                        cout.info("%s --x-- %s" % (course, mc))
-                        cout.info("%s is ignored by mutex rules in advance" % course)
-                        _ignore_course(course, "Mutex rules")
-                        break
-
-                if is_mutex:
+                mc = find_elected_mutex(ix, goals, mutexes, elected)
+                if mc is not None:  # ignore course in advanced
+                    cout.info("%s --x-- %s" % (course, mc))
+                    cout.info("%s is ignored by mutex rules in advance" % course)
+                    _ignore_course(course, "Mutex rules")
                     continue
 
                 cout.info("Try to elect %s" % course)
@@ -599,12 +686,15 @@ def run_elective_loop():
                 
                 while True:
                     cout.info("Fetch a captcha")
-                    r = elective.get_DrawServlet()
+                    with stage_latency.timer("captcha_fetch"):
+                        r = elective.get_DrawServlet()
 
-                    captcha = recognizer.recognize(r.content)
+                    with stage_latency.timer("recognize"):
+                        captcha = _get_recognizer().recognize(r.content)
                     cout.info("Recognition result: %s" % captcha.code)
 
-                    r = elective.get_Validate(username, captcha.code)
+                    with stage_latency.timer("validate"):
+                        r = elective.get_Validate(username, captcha.code)
                     try:
                         res = r.json()["valid"]  # 可能会返回一个错误网页
                     except Exception as e:
@@ -636,7 +726,8 @@ def run_elective_loop():
                 ## try to elect
 
                 try:
-                    r = elective.get_ElectSupplement(course.href)
+                    with stage_latency.timer("elect"):
+                        r = elective.get_ElectSupplement(course.href)
 
                 except ElectionRepeatedError as e:
                     ferr.error(e)
@@ -715,6 +806,7 @@ def run_elective_loop():
                 except ElectionSuccess as e:
                     # 不从此处加入 ignored，而是在下回合根据教学网返回的实际选课结果来决定是否忽略
                     cout.info("%s is ELECTED !" % course)
+                    loop_events.publish("course_elected", course=str(course))
                     notify.send_bark_push(
                         msg=WECHAT_MSG[1] + str(course), prefix=WECHAT_PREFIX[1]
                     )
@@ -726,7 +818,7 @@ def run_elective_loop():
                     # 根据这个动态更新的 elected 它将会被提前地忽略（而不是留到下一循环回合的开始时才被忽略）
                     # --------------------------------------------------------------------------
                     r = e.response  # get response from error ... a bit ugly
-                    tables = get_tables(r._tree)
+                    tables = get_tables(get_tree_from_response(r))
                     # use clear() + extend() instead of op `=` to ensure `id(elected)` doesn't change
                     elected.clear()
                     elected.extend(get_courses(tables[1]))
@@ -744,11 +836,7 @@ def run_elective_loop():
                         )
                     )
                     # use this private function of 'hook.py' to dump the response from `get_SupplyCancel` or `get_supplement`
-                    file = _dump_request(page_r)
-                    ferr.critical(
-                        "Dump response from 'get_SupplyCancel / get_supplement' to %s"
-                        % file
-                    )
+                    _dump_page(page_r, e.__class__.__name__, ferr.critical)
                     raise e
 
                 except Exception as e:
@@ -786,12 +874,14 @@ def run_elective_loop():
 
         except _ElectiveNeedsLogin as e:
             cout.info("client: %s needs Login" % elective.id)
+            loop_events.publish("client_relogin", client=elective.id, reason="Needs login")
             reloginPool.put_nowait(elective)
             elective = None
             noWait = True
 
         except _ElectiveExpired as e:
             cout.info("client: %s expired" % elective.id)
+            loop_events.publish("client_relogin", client=elective.id, reason="Expired")
             reloginPool.put_nowait(elective)
             elective = None
             noWait = True
@@ -805,6 +895,7 @@ def run_elective_loop():
             ferr.error(e)
             _add_error(e)
             cout.info("client: %s needs relogin" % elective.id)
+            loop_events.publish("client_relogin", client=elective.id, reason=e.__class__.__name__)
             reloginPool.put_nowait(elective)
             elective = None
             noWait = True
@@ -843,6 +934,8 @@ def run_elective_loop():
             raise e
 
         finally:
+            loop_events.publish("loop_end", loop=environ.elective_loop)
+
             if elective is not None:  # change elective client
                 electivePool.put_nowait(elective)
                 elective = None
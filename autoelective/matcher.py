@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: matcher.py
+# modified: 2026-10-18
+
+import numpy as np
+
+NO_DELAY = -1
+
+
+class PageIndex(object):
+    """
+    一次解析结果（补退选页的两张表）的索引，每次刷新只建立一次
+
+    已选课程以 Course._ident 为键，计划表的各行通过 quotas['goal'] 与目标课程对应
+    """
+
+    __slots__ = ['_plans','_elected','_quotas']
+
+    def __init__(self, plans, elected, quotas):
+        self._plans = plans  # [Course] c has detail
+        self._elected = { c._ident for c in elected }
+        self._quotas = quotas  # QUOTA_DTYPE [len(plans)], see parser.get_courses_with_quotas
+
+    @property
+    def quotas(self):
+        return self._quotas
+
+    @property
+    def elected_idents(self):
+        return self._elected
+
+    def get_plan_at(self, row):
+        return self._plans[row]
+
+
+class MatchResult(object):
+
+    __slots__ = ['_elected','_available','_delayed','_missing']
+
+    def __init__(self, elected, available, delayed, missing):
+        self._elected = elected      # [(ix, goal)]
+        self._available = available  # [(ix, course)] course has detail
+        self._delayed = delayed      # [(ix, course)] available but hasn't reached the delay threshold
+        self._missing = missing      # [(ix, goal)]
+
+    @property
+    def elected(self):
+        return self._elected
+
+    @property
+    def available(self):
+        return self._available
+
+    @property
+    def delayed(self):
+        return self._delayed
+
+    @property
+    def missing(self):
+        return self._missing
+
+
+def match_goals(goals, goal_ixs, index, ignored, delays=None):
+    """
+    将未被忽略的目标课程划分为 已选上 / 有空余名额 / 未达到延迟阈值 / 不在选课计划中 几类，
+    既不在已选列表、又没有空余名额的课程不出现在结果中
+
+    只遍历 ignored 与已选课程，名额与延迟阈值的判断在 index.quotas 上整体向量化完成
+
+    goal_ixs: { Course._ident: ix }
+    delays: int32 [N], 没有延迟规则的课程为 NO_DELAY
+    """
+    N = len(goals)
+    active = np.ones(N, dtype=np.bool_)  # neither ignored nor elected
+
+    for c in ignored:
+        ix = goal_ixs.get(c._ident)
+        if ix is not None:
+            active[ix] = False
+
+    eixs = []
+    for ident in index.elected_idents:
+        ix = goal_ixs.get(ident)
+        if ix is not None and active[ix]:
+            eixs.append(ix)
+    eixs.sort()
+    active[eixs] = False
+    elected = [ (ix, goals[ix]) for ix in eixs ]
+
+    q = index.quotas
+    rows = np.flatnonzero(q['goal'] >= 0)
+    gixs = q['goal'][rows]
+
+    listed = np.zeros(N, dtype=np.bool_)
+    listed[gixs] = True
+    missing = [ (int(ix), goals[ix]) for ix in np.flatnonzero(active & ~listed) ]
+
+    mask = active[gixs]
+    rows = rows[mask]
+    gixs = gixs[mask]
+    order = np.argsort(gixs, kind='stable')  # keep the priority order of goals
+    rows = rows[order]
+    gixs = gixs[order]
+    first = np.ones(len(gixs), dtype=np.bool_)  # only the first row of each goal counts
+    first[1:] = gixs[1:] != gixs[:-1]
+    rows = rows[first]
+    gixs = gixs[first]
+
+    maxi = q['max'][rows]
+    used = q['used'][rows]
+    is_available = maxi > used
+    if delays is None:
+        is_ready = is_available
+    else:
+        thresholds = delays[gixs]
+        is_ready = is_available & ( (thresholds == NO_DELAY) | (maxi - used <= thresholds) )
+
+    is_delayed = is_available & ~is_ready
+
+    available = [ (int(ix), index.get_plan_at(row)) for ix, row in zip(gixs[is_ready], rows[is_ready]) ]
+    delayed = [ (int(ix), index.get_plan_at(row)) for ix, row in zip(gixs[is_delayed], rows[is_delayed]) ]
+
+    return MatchResult(elected, available, delayed, missing)
+
+
+def ignore_elected(result, goals, mutexes, ignored, ignore):
+    """
+    已选上的目标课程以 "Elected" 忽略，同时以 "Mutex rules" 忽略与之互斥的目标课程
+
+    ignore(course, reason, cause): 由调用者写入 ignored，cause 为导致互斥忽略的已选课程，"Elected" 时为 None
+    """
+    for ix, c in result.elected:
+        if c in ignored:  # ignored by mutex rules of a previous elected course
+            continue
+        ignore(c, "Elected", None)
+        for mix in mutexes.neighbors(ix):
+            mc = goals[mix]
+            if mc in ignored:
+                continue
+            ignore(mc, "Mutex rules", c)
+
+
+def select_tasks(result, ignored):
+    """ 本回合要提交选课的 [(ix, course)]，按目标课程的优先级排列，course 带名额信息 """
+    return [ (ix, c0) for ix, c0 in result.available if c0 not in ignored ]
+
+
+def find_elected_mutex(ix, goals, mutexes, elected):
+    """
+    本回合内已选上的课程 elected 中与第 ix 门目标课程互斥的第一门，没有时返回 None
+
+    elected 在回合开始时为空，每次选课成功后更新为返回页面中的已选课程列表
+    """
+    for mix in mutexes.neighbors(ix):
+        mc = goals[mix]
+        if mc in elected:
+            return mc
+    return None
+
+
+class MutexGroups(object):
+    """
+    互斥规则，每条 [mutex:${id}] 为一组，记录各课程所属的组
+
+    查询一门课的互斥课程的代价为 O(degree)，内存随各组大小之和线性增长
+    """
+
+    __slots__ = ['_groups','_memberships','_npairs']
+
+    def __init__(self, n=0):
+        self._groups = []  # [(ix, ...)]
+        self._memberships = [ () for _ in range(n) ]  # [(gid, ...)] let N = len(goals);
+        self._npairs = 0
+
+    def reset(self, n):
+        self._groups.clear()
+        self._memberships[:] = [ () for _ in range(n) ]
+        self._npairs = 0
+
+    def add_group(self, ixs):
+        ixs = tuple(sorted(set(ixs)))
+        if len(ixs) < 2:
+            return
+        gid = len(self._groups)
+        self._groups.append(ixs)
+        for ix in ixs:
+            self._memberships[ix] += (gid,)
+        self._npairs = None
+
+    def neighbors(self, ix):
+        """ 与 ix 互斥的所有课程，按 ix 升序 """
+        gids = self._memberships[ix]
+        if len(gids) == 0:
+            return ()
+        if len(gids) == 1:
+            return tuple( mix for mix in self._groups[gids[0]] if mix != ix )
+        mixs = set()
+        for gid in gids:
+            mixs.update(self._groups[gid])
+        mixs.discard(ix)
+        return tuple(sorted(mixs))
+
+    def pairs(self):
+        """ 所有互斥课程对 (ix1, ix2), ix1 < ix2 """
+        for ix in range(len(self._memberships)):
+            for mix in self.neighbors(ix):
+                if ix < mix:
+                    yield (ix, mix)
+
+    def count_pairs(self):
+        if self._npairs is None:
+            self._npairs = sum( len(self.neighbors(ix)) for ix in range(len(self._memberships)) ) // 2
+        return self._npairs
+
+    def __bool__(self):
+        return len(self._groups) > 0
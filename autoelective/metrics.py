@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: metrics.py
+# modified: 2026-10-17
+
+"""
+运行指标的统计
+
+以 time.perf_counter (单调时钟) 计时，记录到固定桶数的直方图中，内存占用不随运行时间增长，
+单次记录的开销在微秒级，可以在正式运行时一直开启
+
+Counter / Gauge / LatencyRecorder 注册到 MetricsRegistry 后，由 monitor 的 /metrics 以
+Prometheus 文本格式输出
+"""
+
+import time
+import threading
+from bisect import bisect_left
+
+# 桶的上界 (秒)，从 100us 开始按 2 倍递增到约 105s，最后一个桶存放更大的值
+LATENCY_BUCKETS = tuple( round(1e-4 * 2 ** i, 4) for i in range(21) )
+
+
+class Histogram(object):
+
+    __slots__ = ['_name','_bounds','_counts','_count','_sum','_min','_max','_lock']
+
+    def __init__(self, name, bounds=LATENCY_BUCKETS):
+        self._name = name
+        self._bounds = bounds
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def sum(self):
+        return self._sum
+
+    @property
+    def mean(self):
+        return self._sum / self._count if self._count > 0 else 0.0
+
+    @property
+    def min(self):
+        return self._min
+
+    @property
+    def max(self):
+        return self._max
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self._bounds) + 1)
+            self._count = 0
+            self._sum = 0.0
+            self._min = None
+            self._max = None
+
+    def observe(self, value):
+        ix = bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[ix] += 1
+            self._count += 1
+            self._sum += value
+            if self._min is None or value < self._min:
+                self._min = value
+            if self._max is None or value > self._max:
+                self._max = value
+
+    def percentile(self, q):
+        """ 第 q (0~100) 百分位数所在桶的上界，不超过 max """
+        with self._lock:
+            counts = list(self._counts)
+            count = self._count
+            maxi = self._max
+        if count == 0:
+            return None
+        rank = q / 100 * count
+        acc = 0
+        for ix, n in enumerate(counts):
+            acc += n
+            if acc >= rank and n > 0:
+                return min(self._bounds[ix], maxi) if ix < len(self._bounds) else maxi
+        return maxi
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            count, total, mini, maxi = self._count, self._sum, self._min, self._max
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count > 0 else 0.0,
+            "min": mini,
+            "max": maxi,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "buckets": counts,
+        }
+
+
+class StageTimer(object):
+    """
+    with stage_latency.timer("page_fetch"):
+        ...
+
+    即使代码块中抛出异常（选课成功也是以异常返回的）也会记录耗时
+    """
+
+    __slots__ = ['_histogram','_t0']
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+        self._t0 = None
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._histogram.observe(time.perf_counter() - self._t0)
+        return False
+
+
+class LatencyRecorder(object):
+
+    __slots__ = ['_histograms','_lock']
+
+    def __init__(self):
+        self._histograms = {}  # { stage: Histogram }, in order of first use
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        h = self._histograms.get(stage)
+        if h is None:
+            with self._lock:
+                h = self._histograms.get(stage)
+                if h is None:
+                    h = self._histograms[stage] = Histogram(stage)
+        return h
+
+    def timer(self, stage):
+        return StageTimer(self.histogram(stage))
+
+    def observe(self, stage, seconds):
+        self.histogram(stage).observe(seconds)
+
+    def reset(self):
+        for h in list(self._histograms.values()):
+            h.reset()
+
+    def snapshot(self):
+        """ { stage: Histogram.snapshot() } """
+        return { stage: h.snapshot() for stage, h in list(self._histograms.items()) }
+
+    def format_lines(self):
+        lines = [ "%-14s %8s %10s %10s %10s %10s" % ("stage", "count", "mean", "p50", "p90", "max") ]
+        for stage, h in list(self._histograms.items()):
+            if h.count == 0:
+                continue
+            lines.append("%-14s %8d %10s %10s %10s %10s" % (
+                stage, h.count, _format_seconds(h.mean), _format_seconds(h.percentile(50)),
+                _format_seconds(h.percentile(90)), _format_seconds(h.max),
+            ))
+        return lines
+
+
+def _format_seconds(t):
+    if t is None:
+        return "-"
+    if t < 1:
+        return "%.1f ms" % (t * 1e3)
+    return "%.2f s" % t
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels):
+    if len(labels) == 0:
+        return ""
+    return "{%s}" % ",".join( '%s="%s"' % (k, _escape_label_value(v)) for k, v in labels )
+
+def _format_value(value):
+    if value is None:
+        return "NaN"
+    if isinstance(value, float):
+        if value == float("inf"):
+            return "+Inf"
+        return repr(value)
+    return str(value)
+
+
+class Counter(object):
+    """ 只增不减的计数，可带标签，例如 errors_total.inc(exception="CaptchaError") """
+
+    __slots__ = ['_name','_help','_labelnames','_values','_lock']
+
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self._name = name
+        self._help = help
+        self._labelnames = tuple(labelnames)
+        self._values = {}  # { (label values): value }
+        self._lock = threading.Lock()
+        if len(self._labelnames) == 0:
+            self._values[()] = 0
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def help(self):
+        return self._help
+
+    def _key(self, labels):
+        if set(labels) != set(self._labelnames):
+            raise ValueError("%s expects labels %s, got %s" % (self._name, self._labelnames, tuple(labels)))
+        return tuple( labels[k] for k in self._labelnames )
+
+    def inc(self, amount=1, **labels):
+        assert amount >= 0
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [ (self._name, tuple(zip(self._labelnames, key)), value) for key, value in items ]
+
+
+class Gauge(object):
+    """ 可增可减的瞬时值，也可以在采集时调用 func 取值，例如 Queue.qsize """
+
+    __slots__ = ['_name','_help','_value','_func','_lock']
+
+    type = "gauge"
+
+    def __init__(self, name, help, func=None):
+        self._name = name
+        self._help = help
+        self._value = 0
+        self._func = func
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def help(self):
+        return self._help
+
+    def set(self, value):
+        self._value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self._value -= amount
+
+    def set_function(self, func):
+        self._func = func
+
+    def get(self):
+        if self._func is not None:
+            return self._func()
+        return self._value
+
+    def samples(self):
+        return [ (self._name, (), self.get()) ]
+
+
+class _LatencyFamily(object):
+    """ 将 LatencyRecorder 的每个直方图以 label=key 的形式输出 """
+
+    __slots__ = ['_name','_help','_recorder','_label']
+
+    type = "histogram"
+
+    def __init__(self, name, help, recorder, label):
+        self._name = name
+        self._help = help
+        self._recorder = recorder
+        self._label = label
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def help(self):
+        return self._help
+
+    def samples(self):
+        samples = []
+        for key, snapshot in self._recorder.snapshot().items():
+            labels = ((self._label, key),)
+            acc = 0
+            for bound, n in zip(LATENCY_BUCKETS, snapshot["buckets"]):
+                acc += n
+                samples.append((self._name + "_bucket", labels + (("le", repr(bound)),), acc))
+            samples.append((self._name + "_bucket", labels + (("le", "+Inf"),), snapshot["count"]))
+            samples.append((self._name + "_sum", labels, snapshot["sum"]))
+            samples.append((self._name + "_count", labels, snapshot["count"]))
+        return samples
+
+
+class MetricsRegistry(object):
+
+    __slots__ = ['_metrics','_lock']
+
+    def __init__(self):
+        self._metrics = {}  # { name: metric }, in order of registration
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if existing.type != metric.type:
+                    raise ValueError("Metric %s is already registered as a %s" % (metric.name, existing.type))
+                return existing  # the same module may be reloaded by refreshsettings
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, func=None):
+        gauge = self._register(Gauge(name, help))
+        if func is not None:
+            gauge.set_function(func)
+        return gauge
+
+    def latency(self, name, help, recorder, label):
+        return self._register(_LatencyFamily(name, help, recorder, label))
+
+    def render(self):
+        """ Prometheus text exposition format (version 0.0.4) """
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append("# HELP %s %s" % (metric.name, metric.help.replace("\\", "\\\\").replace("\n", "\\n")))
+            lines.append("# TYPE %s %s" % (metric.name, metric.type))
+            for name, labels, value in metric.samples():
+                lines.append("%s%s %s" % (name, _format_labels(labels), _format_value(value)))
+        lines.append("")
+        return "\n".join(lines)
+
+
+stage_latency = LatencyRecorder()  # { loop stage: Histogram }
+http_latency = LatencyRecorder()   # { request path: Histogram }
+
+metrics_registry = MetricsRegistry()
+metrics_registry.latency("autoelective_stage_latency_seconds", "Latency of each loop stage", stage_latency, "stage")
+metrics_registry.latency("autoelective_http_request_latency_seconds", "Latency of HTTP requests by path, hooks included", http_latency, "path")
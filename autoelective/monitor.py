@@ -1,18 +1,25 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 # filename: monitor.py
-# modified: 2019-09-11
+# modified: 2026-10-18
 
+import json
+import time
 import logging
+import threading
+import functools
+from queue import Queue
 import werkzeug._internal as _werkzeug_internal
-from flask import Flask, current_app, jsonify
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from flask import Flask, Response, current_app, jsonify, request, stream_with_context
 from flask.logging import default_handler
 from .environ import Environ
 from .config import AutoElectiveConfig
-from .logger import ConsoleLogger
+from .logger import ConsoleLogger, get_log_listener
+from .metrics import stage_latency, metrics_registry, LATENCY_BUCKETS
+from .events import loop_events
 
 environ = Environ()
-config = AutoElectiveConfig()
 cout = ConsoleLogger("monitor")
 ferr = ConsoleLogger("monitor.error")
 
@@ -28,6 +35,50 @@ for logger in [cout, ferr]:
     for handler in logger.handlers:
         monitor.logger.addHandler(handler)
 
+SNAPSHOT_TTL = 1.0  # seconds, responses of /stat/* and /metrics are rebuilt at most once per TTL
+
+
+class _Snapshot(object):
+    """
+    预先序列化的响应体，TTL 内的请求直接返回同一份 bytes，频繁的轮询不会反复遍历 environ 与序列化
+    """
+
+    __slots__ = ['_build','_ttl','_body','_expires','_lock']
+
+    def __init__(self, build, ttl=SNAPSHOT_TTL):
+        self._build = build  # () -> bytes
+        self._ttl = ttl
+        self._body = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        if time.monotonic() >= self._expires:
+            with self._lock:
+                if time.monotonic() >= self._expires:  # built by another request meanwhile
+                    self._body = self._build()
+                    self._expires = time.monotonic() + self._ttl
+        return self._body
+
+
+_snapshotRoutes = {}  # { path: (_Snapshot, content type) }, served by _QuietRequestHandler without Flask
+
+def _snapshot_route(path, snapshot, content_type):
+    _snapshotRoutes[path] = (snapshot, content_type)
+
+    def wrapper():
+        return Response(snapshot.get(), content_type=content_type)
+
+    return wrapper
+
+def _snapshot_json(path):
+    """ GET path 返回 func() 序列化后的快照 """
+    def decorator(func):
+        snapshot = _Snapshot(lambda: json.dumps(func(), ensure_ascii=False).encode("utf-8"))
+        wrapper = functools.wraps(func)(_snapshot_route(path, snapshot, "application/json"))
+        return monitor.route(path, methods=["GET"])(wrapper)
+    return decorator
+
 
 @monitor.route("/", methods=["GET"])
 @monitor.route("/rules", methods=["GET"])
@@ -44,7 +95,7 @@ def _root():
         "rules": rules,
     })
 
-@monitor.route("/stat/loop", methods=["GET"])
+@_snapshot_json("/stat/loop")
 def _stat_iaaa_loop():
     it = environ.iaaa_loop_thread
     et = environ.elective_loop_thread
@@ -52,36 +103,173 @@ def _stat_iaaa_loop():
     et_alive = et is not None and et.is_alive()
     finished = not it_alive and not et_alive
     error_encountered = not finished and ( not it_alive or not et_alive )
-    return jsonify({
-        "iaaa_loop": environ.iaaa_loop,
-        "elective_loop": environ.elective_loop,
+    snapshot = environ.snapshot()
+    return {
+        "iaaa_loop": snapshot["iaaa_loop"],
+        "elective_loop": snapshot["elective_loop"],
         "iaaa_loop_is_alive": it_alive,
         "elective_loop_is_alive": et_alive,
         "finished": finished,
         "error_encountered": error_encountered,
-    })
+    }
 
-@monitor.route("/stat/course", methods=["GET"])
+@_snapshot_json("/stat/course")
 def _stat_course():
-    goals = environ.goals # [course]
-    ignored = environ.ignored # {course, reason}
-    return jsonify({
+    snapshot = environ.snapshot()
+    goals = snapshot["goals"] # (course)
+    ignored = snapshot["ignored"] # {course, reason}
+    return {
         "goals": [ str(c) for c in goals ],
         "current": [ str(c) for c in goals if c not in ignored ],
         "ignored": { str(c): r for c, r in ignored.items() },
-    })
+    }
 
-@monitor.route("/stat/error", methods=["GET"])
+@_snapshot_json("/stat/delta")
+def _stat_delta():
+    delta = environ.plan_delta
+    return {
+        "plan_delta": None if delta is None else delta.to_dict(),
+    }
+
+@_snapshot_json("/stat/latency")
+def _stat_latency():
+    return {
+        "unit": "second",
+        "buckets": list(LATENCY_BUCKETS),
+        "stages": stage_latency.snapshot(),
+    }
+
+@_snapshot_json("/stat/error")
 def _stat_error():
-    return jsonify({
-        "errors": environ.errors,
+    return {
+        "errors": environ.errors.snapshot(),
+    }
+
+@_snapshot_json("/stat/log")
+def _stat_log():
+    return {
+        "log_queue": get_log_listener().stats(),
+    }
+
+_metrics = monitor.route("/metrics", methods=["GET"], endpoint="_metrics")(_snapshot_route(
+    "/metrics",
+    _Snapshot(lambda: metrics_registry.render().encode("utf-8")),
+    "text/plain; version=0.0.4; charset=utf-8",
+))
+
+STREAM_SLOTS_KEY = "autoelective.stream_slots"  # set by PooledWSGIServer, absent under other servers
+
+@monitor.route("/stream", methods=["GET"])
+def _stream():
+    slots = request.environ.get(STREAM_SLOTS_KEY)
+    if slots is not None and not slots.acquire(blocking=False):
+        return Response("Too many stream clients\n", status=503, mimetype="text/plain")
+    last_id = request.headers.get("Last-Event-ID", type=int)
+
+    def generate():
+        try:
+            yield from loop_events.subscribe(last_id)
+        finally:
+            if slots is not None:
+                slots.release()
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
     })
 
 
-def run_monitor():
-    monitor.run(
-        host=config.monitor_host,
-        port=config.monitor_port,
-        debug=True,
-        use_reloader=False,
+class _QuietRequestHandler(WSGIRequestHandler):
+    """
+    GET /stat/* 与 /metrics 直接写出快照，不经过 http.server 的请求头解析、WSGI environ 与 Flask 的路由，
+    每个请求占用 GIL 的时间约减少一半；其他请求照常交给 Flask
+    """
+
+    def log_request(self, code="-", size="-"):
+        pass  # don't log every scrape, errors are still logged by werkzeug
+
+    def handle_one_request(self):
+        # the request line is normally already in the read buffer after the first recv()
+        line, sep, _ = self.rfile.peek(1024)[:1024].partition(b"\n")
+        parts = line.split()
+        route = None
+        if sep and len(parts) == 3 and parts[0] == b"GET" and parts[2].startswith(b"HTTP/"):
+            route = _snapshotRoutes.get(parts[1].decode("latin-1"))
+        if route is None:
+            return super().handle_one_request()
+        while self.rfile.readline(65537) not in (b"\r\n", b"\n", b""):
+            pass  # read the headers, unread input would reset the connection on close
+        snapshot, content_type = route
+        body = snapshot.get()
+        self.wfile.write(b"%s 200 OK\r\nContent-Type: %s\r\nContent-Length: %d\r\nConnection: close\r\n\r\n%s" % (
+            parts[2], content_type.encode("latin-1"), len(body), body))
+        self.close_connection = True
+
+    def make_environ(self):
+        environ = super().make_environ()
+        environ[STREAM_SLOTS_KEY] = self.server.stream_slots
+        return environ
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    以固定数量的 worker 线程处理请求的 WSGI server，关闭调试模式，不会为每个请求新建线程
+
+    worker 为守护线程，长连接 (/stream) 不会阻止进程退出
+    """
+
+    def __init__(self, host, port, app, threads=4):
+        super().__init__(host, port, app, handler=_QuietRequestHandler)
+        # 每个 /stream 连接会一直占用一个 worker 线程，始终保留一个线程给其他请求，
+        # 只有一个线程时 /stream 总是返回 503
+        self.stream_slots = threading.BoundedSemaphore(max(0, threads - 1))
+        self._requests = Queue()
+        self._workers = []
+        for ix in range(threads):
+            t = threading.Thread(target=self._worker, name="Monitor-%d" % ix, daemon=True)
+            t.start()
+            self._workers.append(t)
+
+    def process_request(self, request, client_address):
+        self._requests.put((request, client_address))
+
+    def _worker(self):
+        while True:
+            item = self._requests.get()
+            if item is None:
+                return
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        for _ in self._workers:
+            self._requests.put(None)
+
+
+def make_monitor_server(host=None, port=None, threads=None):
+    """ 未指定的参数从配置文件读取，配置在此时才加载 """
+    config = AutoElectiveConfig()
+    threads = threads or config.monitor_threads
+    return PooledWSGIServer(
+        host or config.monitor_host,
+        port if port is not None else config.monitor_port,
+        monitor,
+        threads=threads,
     )
+
+
+def run_monitor():
+    config = AutoElectiveConfig()
+    server = make_monitor_server(config.monitor_host, config.monitor_port, config.monitor_threads)
+    cout.info("Monitor is running on http://%s:%d (threads: %d)" % (
+        config.monitor_host, server.port, config.monitor_threads))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -5,9 +5,8 @@
 # @Project: PKUElective2022Spring-main
 # @AUTHOR : Totoro / Arthals
 
-import requests
 from timeit import default_timer as timer
-from socket import gaierror as GetAddressError
+from .dispatcher import notification_dispatcher, SKIPPED, FAILED
 
 
 class Notify(object):
@@ -49,42 +48,41 @@ class Notify(object):
         msg: str = "",
         prefix: str = "",
     ):
+        """
+        交给 notification_dispatcher 在后台线程中发送，立即返回
+        """
+        if self.disable_push == 1:
+            return
+        if token is None:
+            token = self.get_token
+        if not token or not msg:
+            return
+        notification_dispatcher.submit(token, f"{prefix}{msg}", self._post)
+
+    def _post(self, session, token, body, timeout):
+        """
+        由 dispatcher 的后台线程调用，失败时抛出异常以便重试；未到最小发送间隔时返回 SKIPPED，
+        token 有误等重试无用的失败返回 FAILED
+        """
+        if not self.output_ready():
+            return SKIPPED
+        # https://api.day.app/JnQH697v85queQS4iTaj8A/PKUAutoElective/这里改成你自己的推送内容
+        data = {
+            "title": "PKUAutoElective",
+            "body": body,
+            "icon": "https://cdn.arthals.ink/pku.jpg",
+            "level": "timeSensitive",
+        }
         try:
-            # https://api.day.app/JnQH697v85queQS4iTaj8A/PKUAutoElective/这里改成你自己的推送内容
-            if self.disable_push == 1:
-                return
-            if token is None:
-                token = self.get_token
-            if not token or not msg or not self.output_ready():
-                return
-
-            data = {
-                "title": "PKUAutoElective",
-                "body": f"{prefix}{msg}",
-                "icon": "https://cdn.arthals.ink/pku.jpg",
-                "level": "timeSensitive",
-            }
-
-            req = requests.post(f"https://api.day.app/{token}/", data=data)
-
+            req = session.post(f"https://api.day.app/{token}/", data=data, timeout=timeout)
             rs = req.json()
-            assert int(rs["code"] / 100) == 2, rs
-
-        except AssertionError:
-            print("网络连接错误\n")
-
         except ValueError:
-            print(self.get_token)
             print("公众号提醒设置有误，请检查您传入的token值\n")
-
-        except GetAddressError:
-            print("网络连接错误\n")
-
-        except BaseException:
-            print("公众号提醒设置有误,推送发送失败\n")
-
+            return FAILED  # retrying would not help
         finally:
             self._time_stamp = timer()
+        if int(rs["code"] / 100) != 2:
+            raise RuntimeError("推送服务返回 %s" % rs)
 
 
 def test_notify(_token_: str):
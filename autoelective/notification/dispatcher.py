@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: dispatcher.py
+# modified: 2026-10-18
+
+"""
+推送消息的后台发送
+
+Notify.send_bark_push 只把消息放入有界队列后立即返回，由一个后台线程通过共用的 requests.Session 发出，
+选课线程与日志线程不会因为推送服务的网络请求而阻塞
+
+相同的消息（token 与内容都相同）在队列中尚未发出时会合并为一条，发出后 COALESCE_WINDOW 秒内重复的消息被忽略
+"""
+
+import time
+import queue
+import atexit
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from ..metrics import metrics_registry
+from ..logger import ConsoleLogger
+
+QUEUE_SIZE = 64           # 等待发送的不同消息数，超出时丢弃新的消息
+COALESCE_WINDOW = 60.0    # 相同消息的最短发送间隔 (秒)
+REQUEST_TIMEOUT = (3.05, 10.0)  # (connect, read)
+MAX_ATTEMPTS = 3          # 单条消息最多的发送次数
+RETRY_BACKOFF = 1.0       # 第 n 次重试前等待 RETRY_BACKOFF * 2 ** (n-1) 秒
+RETRY_BUDGET = 20.0       # 单条消息从首次发送到最后一次重试的总时长上限 (秒)
+FLUSH_TIMEOUT = 5.0       # 退出时等待队列中消息发出的最长时间 (秒)
+
+SKIPPED = "skipped"  # returned by send() when it decided not to send (e.g. Notify's minimum interval)
+FAILED = "failed"    # returned by send() on a failure that retrying would not fix (e.g. a wrong token)
+
+cout = ConsoleLogger("notification")
+
+_notificationsTotal = metrics_registry.counter(
+    "autoelective_notifications_total", "Push notifications by result", ["result"],
+)
+
+
+class _Message(object):
+
+    __slots__ = ['key','send','count']
+
+    def __init__(self, key, send):
+        self.key = key
+        self.send = send  # send(session, token, body, timeout), raises on failure, returns SKIPPED / FAILED if not sent
+        self.count = 1
+
+    @property
+    def token(self):
+        return self.key[0]
+
+    @property
+    def body(self):
+        body = self.key[1]
+        if self.count > 1:
+            return "%s (x%d)" % (body, self.count)
+        return body
+
+
+class NotificationDispatcher(object):
+
+    def __init__(self, maxsize=QUEUE_SIZE, window=COALESCE_WINDOW, timeout=REQUEST_TIMEOUT,
+                 max_attempts=MAX_ATTEMPTS, backoff=RETRY_BACKOFF, budget=RETRY_BUDGET):
+        self._queue = queue.Queue(maxsize)
+        self._window = window
+        self._timeout = timeout
+        self._max_attempts = max_attempts
+        self._backoff = backoff
+        self._budget = budget
+        self._pending = {}  # { key: _Message }, not sent yet
+        self._sent = {}     # { key: time of the last send }
+        self._lock = threading.Lock()
+        self._thread = None
+        self._session = None
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    def _get_session(self):
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        return self._session
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="NotificationDispatcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, token, body, send):
+        """
+        放入队列，返回 True；与尚未发出或 window 内已发出的消息重复、或队列已满时返回 False
+        """
+        key = (token, body)
+        with self._lock:
+            message = self._pending.get(key)
+            if message is not None:
+                message.count += 1
+                _notificationsTotal.inc(result="coalesced")
+                return False
+            last = self._sent.get(key)
+            if last is not None and time.monotonic() - last < self._window:
+                _notificationsTotal.inc(result="coalesced")
+                return False
+            message = _Message(key, send)
+            try:
+                self._queue.put_nowait(message)
+            except queue.Full:
+                _notificationsTotal.inc(result="dropped")
+                return False
+            self._pending[key] = message
+        self.start()
+        return True
+
+    def _run(self):
+        while True:
+            message = self._queue.get()
+            try:
+                now = time.monotonic()
+                with self._lock:
+                    self._pending.pop(message.key, None)  # later duplicates wait for the window
+                    for key in [ k for k, t in self._sent.items() if now - t >= self._window ]:
+                        del self._sent[key]
+                    self._sent[message.key] = now
+                if self._deliver(message) == SKIPPED:
+                    with self._lock:
+                        if self._sent.get(message.key) == now:
+                            del self._sent[message.key]  # not sent, so it must not suppress a later duplicate
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, message):
+        """ 返回 "sent" / FAILED / SKIPPED """
+        t0 = time.monotonic()
+        for attempt in range(1, self._max_attempts + 1):
+            try:
+                result = message.send(self._get_session(), message.token, message.body, self._timeout)
+            except Exception as e:
+                delay = self._backoff * 2 ** (attempt - 1)
+                if attempt == self._max_attempts or time.monotonic() - t0 + delay > self._budget:
+                    cout.warning("推送发送失败: %s" % e)  # not error(), which would push again
+                    _notificationsTotal.inc(result=FAILED)
+                    return FAILED
+                time.sleep(delay)
+                continue
+            if result in (SKIPPED, FAILED):
+                _notificationsTotal.inc(result=result)
+                return result
+            _notificationsTotal.inc(result="sent")
+            return "sent"
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """ 等待队列中的消息发出，最多等待 timeout 秒，全部发出时返回 True """
+        if self._thread is None:
+            return True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks > 0:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+
+notification_dispatcher = NotificationDispatcher()
+atexit.register(notification_dispatcher.flush)
+
+metrics_registry.gauge(
+    "autoelective_notification_queue_depth", "Push notifications waiting to be sent",
+    lambda: notification_dispatcher.depth,
+)
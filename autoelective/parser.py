@@ -1,29 +1,90 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 # filename: parser.py
-# modified: 2019-09-09
+# modified: 2026-10-18
 
 import re
+import threading
+import numpy as np
 from lxml import etree
-from .course import Course
+from .course import course_pool
 
 _regexBzfxSida = re.compile(r'\?sida=(\S+?)&sttp=(?:bzx|bfx)')
+_regexCharset = re.compile(r'charset=([\w-]+)', re.I)
 
+_DEFAULT_HTML_ENCODING = "utf-8"  # elective 的页面均为 UTF-8 编码
+
+# 预编译的 XPath，文本结果不使用 smart string，避免 Course 等对象引用整棵文档树
+# './/table//table[@class="datagrid"]' 在行数较多时极慢，改用等价的 ancestor 写法
+_xpTables      = etree.XPath('.//table[@class="datagrid"][ancestor::table]')
+_xpTableHeader = etree.XPath('.//tr[@class="datagrid-header"]/th/text()', smart_strings=False)
+_xpTableTrs    = etree.XPath('.//tr[@class="datagrid-odd" or @class="datagrid-even"]')
+_xpCells       = etree.XPath('./th | ./td')
+_xpTexts       = etree.XPath('.//text()', smart_strings=False)
+_xpOwnTexts    = etree.XPath('./text()', smart_strings=False)
+_xpHref        = etree.XPath('./a/@href', smart_strings=False)
+_xpErrInfoTds  = etree.XPath('.//table//table//table//td')
+_xpTips        = etree.XPath('.//td[@id="msgTips"]')
+_xpTipsTds     = etree.XPath('.//table//table//td')
+
+COURSE_COLUMNS = ("课程名","班号","开课单位")
+DETAIL_COLUMNS = ("课程名","班号","开课单位","限数/已选","补选")
+
+_columnIxsCache = {}  # { (header, columns): ixs }
+_local = threading.local()  # lxml 的 parser 不能跨线程共享
+
+QUOTA_DTYPE = np.dtype([
+    ('max', np.int32),   # 限数
+    ('used', np.int32),  # 已选
+    ('goal', np.int32),  # 对应的目标课程下标，不是目标课程则为 -1
+])
+
+
+def _get_html_parser(encoding):
+    parsers = getattr(_local, "html_parsers", None)
+    if parsers is None:
+        parsers = _local.html_parsers = {}
+    parser = parsers.get(encoding)
+    if parser is None:
+        parser = parsers[encoding] = etree.HTMLParser(encoding=encoding)
+    return parser
+
+def get_response_encoding(r):
+    mat = _regexCharset.search(r.headers.get("Content-Type", ""))
+    if mat is None:
+        return _DEFAULT_HTML_ENCODING # 不要让 lxml 自行猜测，否则可能会以 latin-1 编码
+    return mat.group(1).lower()
 
 def get_tree_from_response(r):
-    return etree.HTML(r.text) # 不要用 r.content, 否则可能会以 latin-1 编码
+    """
+    惰性构建 r 的文档树，首次调用时以已知编码直接解析 r.content，之后的调用复用同一棵树
+
+    不经过 r.text，避免 requests 对整个页面做编码检测与解码
+    """
+    tree = getattr(r, "_tree", None)
+    if tree is None:
+        tree = r._tree = etree.HTML(r.content, _get_html_parser(get_response_encoding(r)))
+    return tree
 
 def get_tree(content):
     return etree.HTML(content)
 
 def get_tables(tree):
-    return tree.xpath('.//table//table[@class="datagrid"]')
+    return _xpTables(tree)
 
 def get_table_header(table):
-    return table.xpath('.//tr[@class="datagrid-header"]/th/text()')
+    return _xpTableHeader(table)
 
 def get_table_trs(table):
-    return table.xpath('.//tr[@class="datagrid-odd" or @class="datagrid-even"]')
+    return _xpTableTrs(table)
+
+def get_column_ixs(header, columns):
+    """ 各列在表头中的位置，按表头签名缓存，同一种表格布局只需要计算一次 """
+    key = (tuple(header), columns)
+    ixs = _columnIxsCache.get(key)
+    if ixs is None:
+        ixs = _columnIxsCache[key] = tuple(map(header.index, columns))
+    return ixs
 
 def get_title(tree):
     title = tree.find('.//head/title')
@@ -32,46 +93,78 @@ def get_title(tree):
     return title.text
 
 def get_errInfo(tree):
-    tds = tree.xpath(".//table//table//table//td")
+    tds = _xpErrInfoTds(tree)
     assert len(tds) == 1
     td = tds[0]
     strong = td.getchildren()[0]
     assert strong.tag == 'strong' and strong.text in ('出错提示:', '提示:')
-    return "".join(td.xpath('./text()')).strip()
+    return "".join(_xpOwnTexts(td)).strip()
 
 def get_tips(tree):
-    tips = tree.xpath('.//td[@id="msgTips"]')
+    tips = _xpTips(tree)
     if len(tips) == 0:
         return None
-    td = tips[0].xpath('.//table//table//td')[1]
-    return "".join(td.xpath('.//text()')).strip()
+    td = _xpTipsTds(tips[0])[1]
+    return "".join(_xpTexts(td)).strip()
 
 def get_sida(r):
     return _regexBzfxSida.search(r.text).group(1)
 
-def get_courses(table):
+def get_course_fields_from_tr(tr, ixs):
+    """ (课程名, 班号, 开课单位) 的原始文本 """
+    ixName, ixClassNo, ixSchool = ixs
+    t = _xpCells(tr)
+    return (
+        _xpTexts(t[ixName])[0],
+        _xpTexts(t[ixClassNo])[0],
+        _xpTexts(t[ixSchool])[0],
+    )
+
+def get_detail_fields_from_tr(tr, ixs):
+    """ (课程名, 班号, 开课单位, 限数/已选, 补选链接) 的原始文本 """
+    ixName, ixClassNo, ixSchool, ixStatus, ixHref = ixs
+    t = _xpCells(tr)
+    return (
+        _xpTexts(t[ixName])[0],
+        _xpTexts(t[ixClassNo])[0],
+        _xpTexts(t[ixSchool])[0],
+        _xpTexts(t[ixStatus])[0],
+        _xpHref(t[ixHref])[0],
+    )
+
+def get_course_from_tr(tr, ixs, pool=course_pool):
+    return pool.get(*get_course_fields_from_tr(tr, ixs))
+
+def get_course_with_detail_from_tr(tr, ixs, pool=course_pool, seen=None):
+    return pool.get_with_detail(*get_detail_fields_from_tr(tr, ixs), seen)
+
+def get_courses(table, pool=course_pool):
     header = get_table_header(table)
     trs = get_table_trs(table)
-    ixs = tuple(map(header.index, ["课程名","班号","开课单位"]))
-    cs = []
-    for tr in trs:
-        t = tr.xpath('./th | ./td')
-        name, class_no, school = map(lambda ix: t[ix].xpath('.//text()')[0], ixs)
-        c = Course(name, class_no, school)
-        cs.append(c)
-    return cs
-
-def get_courses_with_detail(table):
+    ixs = get_column_ixs(header, COURSE_COLUMNS)
+    return [ get_course_from_tr(tr, ixs, pool) for tr in trs ]
+
+def get_courses_with_detail(table, pool=course_pool):
     header = get_table_header(table)
     trs = get_table_trs(table)
-    ixs = tuple(map(header.index, ["课程名","班号","开课单位","限数/已选","补选"]))
-    cs = []
-    for tr in trs:
-        t = tr.xpath('./th | ./td')
-        name, class_no, school, status, _ = map(lambda ix: t[ix].xpath('.//text()')[0], ixs)
-        status = tuple(map(int, status.split("/")))
-        href = t[ixs[-1]].xpath('./a/@href')[0]
-        c = Course(name, class_no, school, status, href)
-        cs.append(c)
-    return cs
+    ixs = get_column_ixs(header, DETAIL_COLUMNS)
+    seen = set()
+    return [ get_course_with_detail_from_tr(tr, ixs, pool, seen) for tr in trs ]
+
+def get_quotas(courses, goal_ixs):
+    """
+    计划表的名额数组 (dtype=QUOTA_DTYPE)
+
+    goal_ixs: { Course._ident: ix }
+    """
+    return np.array(
+        [ (*c._status, goal_ixs.get(c._ident, -1)) for c in courses ],
+        dtype=QUOTA_DTYPE,
+    )
 
+def get_courses_with_quotas(table, goal_ixs, pool=course_pool):
+    """
+    同 get_courses_with_detail，并额外返回计划表的名额数组，见 get_quotas
+    """
+    cs = get_courses_with_detail(table, pool)
+    return cs, get_quotas(cs, goal_ixs)
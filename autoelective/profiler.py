@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: profiler.py
+# modified: 2026-10-18
+
+"""
+循环线程的采样分析器，默认关闭
+
+开启后由后台线程每隔 interval 秒读取指定线程 (默认 IAAA / Elective) 的调用栈并计数，
+每完成 every 个 elective 回合，把这段时间的样本写为 collapsed stack 文件 (log/profile/*.folded)，
+可直接交给 flamegraph.pl 或 speedscope 生成火焰图
+
+    python main.py --profile 100 [--profile-interval 10]
+    AUTOELECTIVE_PROFILE=100 python main.py
+
+关闭时不导入本模块，也没有任何线程或钩子 (见 cli.start_default_profiler)
+"""
+
+import os
+import sys
+import time
+import threading
+from .environ import Environ
+from .const import PROFILE_LOG_DIR
+from ._internal import mkdir
+
+PROFILE_THREADS = ("IAAA", "Elective")
+PROFILE_INTERVAL = 0.01  # 采样间隔 (秒)
+MAX_DEPTH = 128
+
+environ = Environ()
+
+
+class SamplingProfiler(object):
+
+    def __init__(self, every, interval=PROFILE_INTERVAL, thread_names=PROFILE_THREADS, directory=PROFILE_LOG_DIR):
+        self._every = every
+        self._interval = interval or PROFILE_INTERVAL
+        self._thread_names = frozenset(thread_names)
+        self._directory = directory
+        self._labels = {}    # { code: label }, formatted once per function
+        self._samples = {}   # { (thread name, label, ...): count }
+        self._window_start = None  # elective loop at the start of the current window
+        self._files = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def files(self):
+        """ 已写出的文件 """
+        return self._files
+
+    def start(self):
+        if self._thread is None:
+            mkdir(self._directory)
+            self._window_start = environ.elective_loop
+            self._thread = threading.Thread(target=self._run, name="Profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """ 停止采样并写出最后一段样本 """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.write()
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = "%s (%s:%d)" % (
+                code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+        return label
+
+    def sample(self):
+        """ 采样一次，返回采到的线程数 """
+        names = { t.ident: t.name for t in threading.enumerate() if t.name in self._thread_names }
+        if len(names) == 0:
+            return 0
+        n = 0
+        frames = sys._current_frames()
+        with self._lock:
+            for ident, name in names.items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(name)
+                key = tuple(reversed(stack))
+                self._samples[key] = self._samples.get(key, 0) + 1
+                n += 1
+        return n
+
+    def write(self):
+        """ 把当前这段样本写为一个 .folded 文件并清空，没有样本时返回 None """
+        with self._lock:
+            samples, self._samples = self._samples, {}
+        loop = environ.elective_loop
+        start, self._window_start = self._window_start, loop
+        if len(samples) == 0:
+            return None
+        file = os.path.join(self._directory, "%s_loop%d-%d.folded" % (time.strftime("%Y%m%d_%H%M%S"), start, loop))
+        with open(file, "w", encoding="utf-8") as fp:
+            for key, count in sorted(samples.items()):
+                fp.write("%s %d\n" % (";".join(key), count))
+        self._files.append(file)
+        return file
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            self.sample()
+            loop = environ.elective_loop
+            if loop < self._window_start:  # environ.reset() after a restart from the GUI
+                with self._lock:
+                    self._samples = {}
+                self._window_start = loop
+            elif loop - self._window_start >= self._every:
+                self.write()
+
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: replay.py
+# modified: 2026-10-18
+
+"""
+离线回放：以转储归档 (archive.py) 中记录的响应驱动完整的 IAAA / Elective 循环，不访问选课网
+
+ReplayAdapter 挂载到每个客户端的 _session 上 (BaseClient.transport_adapter)，按接口名从 Scenario
+中依次取出响应；ReplayRecognizer 代替验证码识别。循环的计时、日志、metrics 与正式运行完全相同，
+可以在本地确定性地测量每回合耗时与各阶段延迟，或比对两次运行的选课结果
+
+场景脚本 (JSON)：
+
+    {
+        "archive": "log/request/<学号>",         # 相对于脚本所在目录，可以是单个归档或其上级目录
+        "endpoints": {                           # 省略时按录制顺序回放归档中的所有响应
+            "SupplyCancel.do": ["20261017_233000:0*5", "20261017_233000:4"],
+            "electSupplement.do": ["20261017_233000:5"]
+        }
+    }
+
+每个接口的响应依次使用，"KEY*N" 表示重复 N 次，用完后一直返回最后一个；
+归档中没有的接口 (IAAA 登录、验证码等) 使用 DEFAULT_RESPONSES
+
+    python -m autoelective.replay scenario.json --loops 100 [-c config.ini] [--save result.json] [--expect result.json]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import threading
+from http.client import HTTPMessage
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from .archive import Archive, RequestDump, get_endpoint, list_archives
+
+_HTML_HEADERS = [("Content-Type", "text/html;charset=UTF-8")]
+_HELP_PAGE = "<html><head><title>帮助 - 学生选课系统</title></head><body></body></html>".encode("utf-8")
+
+# 1x1 GIF, ReplayRecognizer does not look at it
+_GIF = b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;"
+
+DEFAULT_RESPONSES = {
+    # endpoint: (status, headers, content)
+    "oauth.jsp": (200, _HTML_HEADERS, b"<html><head><title>IAAA</title></head></html>"),
+    "oauthlogin.do": (200, [("Content-Type", "application/json")], b'{"success": true, "token": "replay"}'),
+    "ssoLogin.do": (200, _HTML_HEADERS + [("Set-Cookie", "JSESSIONID=replay!0; Path=/elective2008")], _HELP_PAGE),
+    "HelpController.jpf": (200, _HTML_HEADERS, _HELP_PAGE),
+    "logout.do": (200, _HTML_HEADERS, _HELP_PAGE),
+    "DrawServlet": (200, [("Content-Type", "image/gif")], _GIF),
+    "validate.do": (200, [("Content-Type", "application/json")], b'{"valid": "2"}'),
+}
+
+_DROPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding")  # the recorded body is decoded
+
+_regexRepeat = re.compile(r'^(?P<key>.+?)(?:\*(?P<n>\d+))?$')
+
+
+def _make_dump(endpoint, status, headers, content):
+    return RequestDump(0.0, "GET", endpoint, [], None, status, "OK", headers, None, content, 0.0)
+
+
+class Scenario(object):
+    """ { endpoint: [RequestDump] }，线程安全 """
+
+    def __init__(self, responses=None, defaults=DEFAULT_RESPONSES):
+        self._responses = { endpoint: list(dumps) for endpoint, dumps in (responses or {}).items() }
+        self._defaults = { endpoint: _make_dump(endpoint, *v) for endpoint, v in defaults.items() }
+        self._cursors = {}  # { endpoint: next position }
+        self._lock = threading.Lock()
+
+    @property
+    def endpoints(self):
+        return list(self._responses)
+
+    def next(self, endpoint):
+        """ 接口 endpoint 的下一个响应，没有记录时返回 None """
+        dumps = self._responses.get(endpoint)
+        if not dumps:
+            return self._defaults.get(endpoint)
+        with self._lock:
+            ix = self._cursors.get(endpoint, 0)
+            self._cursors[endpoint] = ix + 1
+        return dumps[min(ix, len(dumps) - 1)]
+
+    def reset(self):
+        with self._lock:
+            self._cursors.clear()
+
+    @classmethod
+    def from_archive(cls, path, endpoints=None):
+        """
+        path: 单个归档或包含多个归档的目录；endpoints: { endpoint: [KEY | KEY*N] }，KEY 为 "归档名:序号"
+        """
+        archives = { os.path.basename(p): Archive(p) for p in list_archives(path) }
+        if len(archives) == 0:
+            raise FileNotFoundError("No archive was found in %s" % path)
+        responses = {}
+        if endpoints is None:
+            for archive in archives.values():
+                for ix in range(len(archive)):
+                    dump = archive.get(ix)
+                    responses.setdefault(get_endpoint(dump.url), []).append(dump)
+            return cls(responses)
+
+        single = next(iter(archives.values())) if len(archives) == 1 else None
+        for endpoint, keys in endpoints.items():
+            dumps = responses[endpoint] = []
+            for key in keys:
+                mat = _regexRepeat.match(key)
+                name, _, ix = mat.group("key").rpartition(":")
+                archive = archives.get(name) or single
+                if archive is None:
+                    raise KeyError("archive %s was not found in %s" % (name, path))
+                dumps.extend([archive.get(int(ix))] * int(mat.group("n") or 1))
+        return cls(responses)
+
+    @classmethod
+    def load(cls, file):
+        with open(file, "r", encoding="utf-8-sig") as fp:
+            script = json.load(fp)
+        path = os.path.join(os.path.dirname(os.path.abspath(file)), script["archive"])
+        return cls.from_archive(path, script.get("endpoints"))
+
+
+class _ReplayHTTPResponse(object):
+    """ 只提供 extract_cookies_to_jar 所需的 _original_response.msg，使记录中的 Set-Cookie 生效 """
+
+    def __init__(self, headers):
+        msg = HTTPMessage()
+        for k, v in headers:
+            msg[k] = v
+        self._original_response = self
+        self.msg = msg
+
+    def release_conn(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class ReplayAdapter(BaseAdapter):
+
+    def __init__(self, scenario, latency=0.0, stop=None):
+        super().__init__()
+        self._scenario = scenario
+        self._latency = latency  # seconds added to every request, e.g. a typical RTT
+        self._stop = stop        # callable, once it returns True every request blocks forever
+        self._requests = []      # [endpoint]
+        self._lock = threading.Lock()
+        self._halted = threading.Event()
+
+    @property
+    def requests(self):
+        """ 按顺序记录的请求接口名 """
+        return self._requests
+
+    @property
+    def halted(self):
+        """ threading.Event，stop 返回 True 后第一个请求到达时设置 """
+        return self._halted
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self._stop is not None and self._stop():
+            self._halted.set()
+            threading.Event().wait()  # freeze the calling loop at a request boundary
+        endpoint = get_endpoint(request.url)
+        with self._lock:
+            self._requests.append(endpoint)
+        dump = self._scenario.next(endpoint)
+        if self._latency > 0:
+            time.sleep(self._latency)
+
+        r = Response()
+        r.request = request
+        r.url = request.url
+        r.connection = self
+        if dump is None:
+            r.status_code = 404
+            r.reason = "Not Found"
+            r._content = b""
+            r.raw = _ReplayHTTPResponse([])
+            return r
+        headers = [ (k, v) for k, v in dump.headers if k.lower() not in _DROPPED_HEADERS ]
+        r.status_code = dump.status_code
+        r.reason = dump.reason
+        r.headers = CaseInsensitiveDict(headers)
+        r.encoding = get_encoding_from_headers(r.headers)
+        r._content = dump.content
+        r._content_consumed = True
+        r.raw = _ReplayHTTPResponse(headers)
+        return r
+
+    def close(self):
+        pass
+
+
+class ReplayRecognizer(object):
+    """ 代替 TTShituRecognizer，总是返回 code """
+
+    def __init__(self, code="abcd"):
+        self._code = code
+
+    def recognize(self, raw):
+        from .captcha import Captcha
+        return Captcha(self._code, None, None, None, None)
+
+
+class ReplayResult(object):
+
+    __slots__ = ['loops','elapsed','requests','stages','ignored','errors','finished']
+
+    def __init__(self, loops, elapsed, requests, stages, ignored, errors, finished):
+        self.loops = loops
+        self.elapsed = elapsed
+        self.requests = requests  # { endpoint: count }
+        self.stages = stages      # stage_latency.snapshot()
+        self.ignored = ignored    # { str(course): reason }
+        self.errors = errors      # { error: count }
+        self.finished = finished  # the elective loop quit by itself (no tasks left)
+
+    @property
+    def loops_per_second(self):
+        return self.loops / self.elapsed if self.elapsed > 0 else 0.0
+
+    def outcome(self):
+        """ 与耗时无关的部分，用于回归比对 """
+        return {
+            "loops": self.loops,
+            "finished": self.finished,
+            "ignored": self.ignored,
+            "errors": self.errors,
+            "requests": self.requests,
+        }
+
+    def to_dict(self):
+        d = self.outcome()
+        d.update(elapsed=self.elapsed, loops_per_second=self.loops_per_second, stages=self.stages)
+        return d
+
+
+def run_replay(scenario, max_loops=100, timeout=600, latency=0.0, code="abcd"):
+    """
+    在当前进程中运行 IAAA / Elective 循环，直到 Elective 循环结束、完成 max_loops 回合或超时
+
+    完成 max_loops 回合后，两个循环在下一个请求处被挂起 (daemon 线程)，结果与线程调度无关；
+    循环无法重新开始，每个进程只能调用一次
+    """
+    from .client import BaseClient
+    from .environ import Environ
+    from .metrics import stage_latency
+    from .notification.bark_push import Notify
+    from . import loop
+
+    environ = Environ()
+    adapter = ReplayAdapter(scenario, latency, stop=lambda: environ.elective_loop > max_loops)
+    BaseClient.transport_adapter = adapter
+    loop.refreshsettings()  # the overrides below are kept by loop.setup()
+    loop.notify = Notify(_token=None, _interval_lock=0, _disable_push=1, _verbosity=0)
+    loop.recognizer = ReplayRecognizer(code)
+    loop.refresh_interval = 0.0
+    loop.refresh_random_deviation = 0.0
+    loop.login_loop_interval = 0.0
+    stage_latency.reset()
+
+    threads = [
+        threading.Thread(target=loop.run_iaaa_loop, name="IAAA", daemon=True),
+        threading.Thread(target=loop.run_elective_loop, name="Elective", daemon=True),
+    ]
+    environ.iaaa_loop_thread, environ.elective_loop_thread = threads
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    et = threads[1]
+    while et.is_alive() and not adapter.halted.is_set() and time.perf_counter() - t0 < timeout:
+        et.join(0.01)
+    elapsed = time.perf_counter() - t0
+
+    snapshot = environ.snapshot()
+    requests = {}
+    for endpoint in adapter.requests:
+        requests[endpoint] = requests.get(endpoint, 0) + 1
+    return ReplayResult(
+        loops=min(snapshot["elective_loop"], max_loops),
+        elapsed=elapsed,
+        requests=requests,
+        stages=stage_latency.snapshot(),
+        ignored={ str(c): r for c, r in snapshot["ignored"].items() },
+        errors=dict(snapshot["errors"]),
+        finished=not et.is_alive(),
+    )
+
+
+def main(argv=None):
+    from optparse import OptionParser
+
+    parser = OptionParser(usage="%prog SCENARIO [options]")
+    parser.add_option("-c", "--config", dest="config_ini", metavar="FILE", help="custom config file encoded with utf8")
+    parser.add_option("--loops", type="int", default=100, help="stop after N elective loops")
+    parser.add_option("--timeout", type="float", default=600, help="stop after N seconds")
+    parser.add_option("--latency", type="float", default=0.0, help="seconds added to every replayed request")
+    parser.add_option("--save", metavar="FILE", help="save the result as json")
+    parser.add_option("--expect", metavar="FILE", help="compare the outcome with a saved result, exit 1 on mismatch")
+    options, args = parser.parse_args(argv)
+    if len(args) != 1:
+        parser.error("SCENARIO is required")
+
+    from .environ import Environ
+    Environ().config_ini = options.config_ini  # before autoelective.config is first used
+
+    scenario = Scenario.load(args[0])
+    result = run_replay(scenario, options.loops, options.timeout, options.latency)
+
+    from .metrics import stage_latency
+    print()
+    print("loops: %d in %.3f s (%.1f loops/s), finished: %s" % (result.loops, result.elapsed, result.loops_per_second, result.finished))
+    print("requests: %s" % ", ".join("%s %d" % kv for kv in sorted(result.requests.items())))
+    for line in stage_latency.format_lines():
+        print(line)
+
+    if options.save is not None:
+        with open(options.save, "w", encoding="utf-8") as fp:
+            json.dump(result.to_dict(), fp, ensure_ascii=False, indent=2)
+
+    if options.expect is not None:
+        with open(options.expect, "r", encoding="utf-8") as fp:
+            expected = json.load(fp)
+        outcome = result.outcome()
+        diff = [ k for k in outcome if expected.get(k) != outcome[k] ]
+        if len(diff) > 0:
+            print("outcome differs from %s in %s" % (options.expect, ", ".join(diff)))
+            sys.exit(1)
+        print("outcome matches %s" % options.expect)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: simulator.py
+# modified: 2026-10-18
+
+"""
+名额变化模拟：生成与 SupplyCancel.do 结构一致的补退选页，按 QuotaModel 的规则模拟名额的变化，
+并以与 loop.py 相同的步骤 (IncrementalExtractor -> get_quotas -> match_goals -> 互斥 / 延迟规则 -> 补选)
+处理每一页，用于在远大于实际目标列表的规模下测量解析与决策的开销
+
+不经过网络与日志，每秒可以处理数千页；补选请求由 SimulatedSite.elect 直接决定结果
+
+    python -m autoelective.simulator --courses 2000 --goals 200 --iterations 1000
+"""
+
+import time
+from html import escape
+import numpy as np
+from requests.models import Response
+from .course import Course, CoursePool
+from .parser import get_quotas
+from .extractor import IncrementalExtractor
+from .matcher import PageIndex, MutexGroups, NO_DELAY, match_goals, ignore_elected, select_tasks, find_elected_mutex
+from .metrics import LatencyRecorder
+
+PLAN_HEADER = ["课程号","课程名","课程类别","学分","周学时","教师","班号","开课单位","年级","上课信息","限数/已选","补选"]
+ELECTED_HEADER = ["课程号","课程名","课程类别","学分","周学时","教师","班号","开课单位","专业","年级","上课信息","选课结果"]
+
+ELECT_HREF = "/elective2008/edu/pku/stu/elective/controller/supplement/electSupplement.do?index=%d&amp;seq=%s"
+
+ELECTED = "elected"
+FULL = "full"
+
+
+def _td(text):
+    return '<td class="datagrid" align="center"><span>%s</span></td>' % text
+
+def _tr(i, tds):
+    return '<tr class="%s">%s</tr>' % ("datagrid-odd" if i % 2 == 0 else "datagrid-even", "".join(tds))
+
+def plan_row(i, name, class_no, school, maxi, used):
+    return _tr(i, [
+        _td("%08d" % i),
+        '<td class="datagrid"><a href="/elective2008/courseQuery/goNested.do?course_seq_no=%d" target="_blank"><span>%s</span></a></td>' % (i, escape(name)),
+        _td("专业课"), _td("3.0"), _td("3"), _td("某老师(教授)"),
+        _td(class_no), _td(escape(school)), _td("全部"),
+        _td("1~16周 每周周一3~4节 理教101"),
+        _td("%d / %d" % (maxi, used)),
+        '<td class="datagrid" align="center"><a href="%s" onclick="return confirmSelect(...);"><span>补选</span></a></td>' % (ELECT_HREF % (i, "BZ%06d" % i)),
+    ])
+
+def elected_row(i, name, class_no, school):
+    return _tr(i, [
+        _td("%08d" % i), _td(escape(name)), _td("专业课"), _td("3.0"), _td("3"), _td("某老师(教授)"),
+        _td(class_no), _td(escape(school)), _td("计算机科学与技术"), _td("全部"),
+        _td("1~16周 每周周二1~2节 二教101"), _td("已选上"),
+    ])
+
+def datagrid(header, rows):
+    h = '<tr class="datagrid-header">%s</tr>' % "".join('<th class="datagrid">%s</th>' % x for x in header)
+    return '<table class="datagrid" width="100%%" cellspacing="0">%s%s</table>' % (h, "".join(rows))
+
+def tips_html(tips):
+    return ('<table><tr><td id="msgTips"><table><tr><td><table><tr><td><img src="/x.gif"/></td>'
+            '<td><strong>%s</strong></td></tr></table></td></tr></table></td></tr></table>') % escape(tips)
+
+def render_page(plan_rows, elected_rows, tips=None, title="补选退选"):
+    """ 由已生成的行拼接补退选页 """
+    return (
+        '<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 4.01 Transitional//EN">\n'
+        '<html><head><meta http-equiv="Content-Type" content="text/html; charset=UTF-8">'
+        '<title>%s</title>'
+        '<link rel="stylesheet" href="/elective2008/resources/css/style.css">'
+        '<script type="text/javascript">function confirmSelect(){ return true; }</script></head>'
+        '<body><table width="100%%"><tr><td>%s</td></tr><tr><td>%s'
+        '<table width="100%%"><tr><td>%s</td></tr><tr><td>%s</td></tr></table>'
+        '</td></tr></table>'
+        '<div id="footer">%s</div></body></html>'
+    ) % (
+        title,
+        '<div id="menu">%s</div>' % "".join('<a href="/m%d">菜单%d</a>' % (i, i) for i in range(30)),
+        tips_html(tips) if tips else "",
+        datagrid(PLAN_HEADER, plan_rows),
+        datagrid(ELECTED_HEADER, elected_rows),
+        "北京大学计算中心" * 20,
+    )
+
+def supply_cancel_page(plans, elected, tips=None, title="补选退选"):
+    """
+    plans: [(name, class_no, school, maxi, used)]
+    elected: [(name, class_no, school)]
+    """
+    return render_page(
+        [ plan_row(i, *p) for i, p in enumerate(plans) ],
+        [ elected_row(i, *e) for i, e in enumerate(elected) ],
+        tips, title,
+    )
+
+
+class QuotaModel(object):
+    """
+    每一步中名额的变化，各项概率均针对单门课程：
+
+      refill_rate:  每个空余名额被其他人选走的概率
+      drop_rate:    有人退课、空出一个名额的概率
+      burst_rate:   整页中有一门课一次空出 burst_size 个名额（如扩容、整班退课）的概率
+      anomaly_rate: 已满的课程被显示为 max/0 的概率（选课网的 180/0 异常，补选时得到 QuotaLimitedError）
+    """
+
+    __slots__ = ['refill_rate','drop_rate','burst_rate','burst_size','anomaly_rate']
+
+    def __init__(self, refill_rate=0.5, drop_rate=0.002, burst_rate=0.01, burst_size=5, anomaly_rate=0.0005):
+        self.refill_rate = refill_rate
+        self.drop_rate = drop_rate
+        self.burst_rate = burst_rate
+        self.burst_size = burst_size
+        self.anomaly_rate = anomaly_rate
+
+    def step(self, rng, maxi, used):
+        """ 原地更新 used，返回页面上显示的已选人数 """
+        n = len(used)
+        used += rng.binomial(maxi - used, self.refill_rate)
+        used -= (rng.random(n) < self.drop_rate) & (used > 0)
+        if rng.random() < self.burst_rate:
+            ix = rng.integers(n)
+            used[ix] = max(used[ix] - self.burst_size, 0)
+        reported = used.copy()
+        reported[(rng.random(n) < self.anomaly_rate) & (used >= maxi)] = 0
+        return reported
+
+
+class SimulatedSite(object):
+    """
+    模拟的补退选页，每次 step 后只重新生成显示内容变化的行，页面由编码后的各行直接拼接
+    """
+
+    __slots__ = ['_rng','_model','_plans','_rows_of','_maxi','_used','_reported',
+                 '_plan_rows','_elected','_elected_rows','_elected_idents','_template']
+
+    def __init__(self, n_courses, n_elected=10, model=None, seed=0):
+        self._rng = np.random.default_rng(seed)
+        self._model = model or QuotaModel()
+        self._plans = [ ("课程%05d" % i, "%02d" % (i % 7 + 1), "学院%d" % (i % 31)) for i in range(n_courses) ]
+        self._rows_of = { (name, int(class_no), school): i for i, (name, class_no, school) in enumerate(self._plans) }
+        self._maxi = self._rng.integers(30, 201, n_courses)
+        self._used = self._maxi.copy()
+        self._reported = self._used.copy()
+        self._plan_rows = [ plan_row(i, *p, m, u).encode("utf-8") for i, (p, m, u) in enumerate(zip(self._plans, self._maxi, self._used)) ]
+        self._template = render_page(["\0"], ["\0"]).encode("utf-8").split(b"\0")  # [head, middle, tail]
+        self._elected = []
+        self._elected_rows = []
+        self._elected_idents = set()
+        for i in self._rng.choice(n_courses, min(n_elected, n_courses), replace=False):
+            self._add_elected(int(i))
+
+    @property
+    def plans(self):
+        """ [(name, class_no, school)] """
+        return self._plans
+
+    @property
+    def elected_idents(self):
+        return self._elected_idents
+
+    def _add_elected(self, i):
+        name, class_no, school = self._plans[i]
+        self._elected.append(i)
+        self._elected_rows.append(elected_row(len(self._elected_rows), name, class_no, school).encode("utf-8"))
+        self._elected_idents.add((name, int(class_no), school))
+
+    def step(self):
+        reported = self._model.step(self._rng, self._maxi, self._used)
+        for i in np.flatnonzero(reported != self._reported):
+            self._plan_rows[i] = plan_row(i, *self._plans[i], self._maxi[i], reported[i]).encode("utf-8")
+        self._reported = reported
+
+    def get_response(self):
+        r = Response()
+        r.status_code = 200
+        r.headers["Content-Type"] = "text/html;charset=UTF-8"
+        r.encoding = "utf-8"
+        head, middle, tail = self._template
+        r._content = b"".join((head, b"".join(self._plan_rows), middle, b"".join(self._elected_rows), tail))
+        return r
+
+    def elect(self, ident):
+        """ 补选 ident 对应的课程，返回 ELECTED 或 FULL (QuotaLimitedError) """
+        i = self._rows_of[ident]
+        if self._used[i] >= self._maxi[i]:
+            return FULL
+        self._used[i] += 1
+        if ident not in self._elected_idents:
+            self._add_elected(i)
+        return ELECTED
+
+
+class Simulation(object):
+    """
+    以 loop.run_elective_loop 中的步骤处理 SimulatedSite 的每一页，统计各类决策的次数与各阶段耗时
+    """
+
+    __slots__ = ['_site','_goals','_goal_ixs','_mutexes','_delays','_extractor','_quotas',
+                 '_ignored','_counts','_latency','_iterations']
+
+    def __init__(self, site, goals, mutex_groups=(), delays=None):
+        """
+        goals: [Course]; mutex_groups: [[ix]]; delays: int32 [N], 没有延迟规则的课程为 NO_DELAY
+        """
+        N = len(goals)
+        self._site = site
+        self._goals = list(goals)
+        self._goal_ixs = { c._ident: ix for ix, c in enumerate(self._goals) }
+        self._mutexes = MutexGroups(N)
+        for ixs in mutex_groups:
+            self._mutexes.add_group(ixs)
+        self._delays = delays if delays is not None else np.full(N, NO_DELAY, dtype=np.int32)
+        self._extractor = IncrementalExtractor(pool=CoursePool())
+        self._quotas = None
+        self._ignored = {}  # { Course: reason }
+        self._counts = {}   # { event: count }
+        self._latency = LatencyRecorder()
+        self._iterations = 0
+
+    @property
+    def ignored(self):
+        return self._ignored
+
+    @property
+    def counts(self):
+        return self._counts
+
+    @property
+    def latency(self):
+        return self._latency
+
+    @property
+    def iterations(self):
+        return self._iterations
+
+    @property
+    def finished(self):
+        return len(self._ignored) >= len(self._goals)
+
+    def _count(self, event, n=1):
+        self._counts[event] = self._counts.get(event, 0) + n
+
+    def _ignore(self, course, reason, cause=None):
+        self._ignored[course.to_simplified()] = reason
+        self._count("ignored: %s" % reason)
+
+    def step(self):
+        lat = self._latency
+        goals = self._goals
+        ignored = self._ignored
+
+        with lat.timer("churn"):
+            self._site.step()
+        with lat.timer("render"):
+            r = self._site.get_response()
+        with lat.timer("parse"):
+            tables = self._extractor.extract(r)
+            plans, elected = tables[0], tables[1]
+        with lat.timer("match"):
+            if self._extractor.deltas[0] or self._quotas is None:
+                self._quotas = get_quotas(plans, self._goal_ixs)
+            index = PageIndex(plans, elected, self._quotas)
+            result = match_goals(goals, self._goal_ixs, index, ignored, self._delays)
+
+        # the same decisions as run_elective_loop, through the same functions of matcher.py
+        with lat.timer("decide"):
+            ignore_elected(result, goals, self._mutexes, ignored, self._ignore)
+            self._count("missing", sum( c not in ignored for _, c in result.missing ))
+            self._count("delayed", sum( c0 not in ignored for _, c0 in result.delayed ))
+            tasks = select_tasks(result, ignored)
+            self._count("available", len(tasks))
+
+        with lat.timer("elect"):
+            elected = []  # elected in this round, as in the loop
+            for ix, course in tasks:
+                if find_elected_mutex(ix, goals, self._mutexes, elected) is not None:
+                    self._ignore(course, "Mutex rules")
+                    continue
+                if self._site.elect(course._ident) == ELECTED:
+                    self._count("elected")
+                    # the elected table of the page returned with ElectionSuccess
+                    elected = [ Course(*ident) for ident in self._site.elected_idents ]
+                elif course.used_quota == 0:
+                    self._count("quota anomaly")  # 180/0, see the QuotaLimitedError branch in loop.py
+                else:
+                    self._count("quota limited")  # taken by others between the refresh and the request
+
+        self._iterations += 1
+
+    def run(self, iterations, stop_when_finished=False):
+        """ 返回实际处理的页数与耗时 (s) """
+        t0 = time.perf_counter()
+        for i in range(iterations):
+            if stop_when_finished and self.finished:
+                break
+            self.step()
+        else:
+            i = iterations
+        return i, time.perf_counter() - t0
+
+
+def make_simulation(n_courses, n_goals, n_mutex_groups=0, mutex_size=2, delay_ratio=0.0,
+                    n_elected=10, model=None, seed=0):
+    """ 随机选取 n_goals 门目标课程，生成互斥与延迟规则 """
+    rng = np.random.default_rng(seed + 1)
+    site = SimulatedSite(n_courses, n_elected, model, seed)
+    rows = rng.choice(n_courses, min(n_goals, n_courses), replace=False)
+    goals = [ Course(*site.plans[i]) for i in rows ]
+    N = len(goals)
+    groups = [ rng.choice(N, min(mutex_size, N), replace=False).tolist() for _ in range(n_mutex_groups) ] if N > 0 else []
+    delays = np.where(rng.random(N) < delay_ratio, rng.integers(1, 4, N), NO_DELAY).astype(np.int32)
+    return Simulation(site, goals, groups, delays)
+
+
+def main(argv=None):
+    from optparse import OptionParser
+
+    parser = OptionParser()
+    parser.add_option("--courses", type="int", default=2000, help="rows of the plan table")
+    parser.add_option("--goals", type="int", default=200)
+    parser.add_option("--mutex-groups", type="int", default=50)
+    parser.add_option("--mutex-size", type="int", default=3)
+    parser.add_option("--delay-ratio", type="float", default=0.2, help="share of goals with a delay rule")
+    parser.add_option("--iterations", type="int", default=1000)
+    parser.add_option("--refill-rate", type="float", default=0.5)
+    parser.add_option("--drop-rate", type="float", default=0.002)
+    parser.add_option("--burst-rate", type="float", default=0.01)
+    parser.add_option("--burst-size", type="int", default=5)
+    parser.add_option("--anomaly-rate", type="float", default=0.0005)
+    parser.add_option("--seed", type="int", default=0)
+    options, _ = parser.parse_args(argv)
+
+    model = QuotaModel(options.refill_rate, options.drop_rate, options.burst_rate, options.burst_size, options.anomaly_rate)
+    sim = make_simulation(options.courses, options.goals, options.mutex_groups, options.mutex_size,
+                          options.delay_ratio, model=model, seed=options.seed)
+    n, elapsed = sim.run(options.iterations)
+
+    print("%d pages of %d courses, %d goals in %.3f s (%.0f pages/s)" % (n, options.courses, options.goals, elapsed, n / elapsed))
+    for event, count in sorted(sim.counts.items()):
+        print("%-24s %8d" % (event, count))
+    print()
+    for line in sim.latency.format_lines():
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
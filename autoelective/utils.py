@@ -1,13 +1,13 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 # filename: utils.py
-# modified: 2019-09-09
+# modified: 2026-10-18
 
 import os
 import pickle
 import gzip
 import hashlib
-from requests.compat import json
+import json
 
 
 def b(s):
@@ -0,0 +1,4 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: __init__.py
+# modified: 2026-10-17
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: __main__.py
+# modified: 2026-10-17
+"""
+运行 suite.py 中的全部用例，可保存为 JSON，或与之前保存的结果比较
+
+    python -m benchmarks [-k PATTERN] [--save FILE] [--compare FILE] [--threshold 0.2]
+
+--compare 时，比基线慢 threshold 以上的用例记为 SLOWER，存在这样的用例时退出码为 1；
+各 bench_*.py 是针对单项改动的详细对比，仍单独运行
+"""
+
+import sys
+import json
+import time
+import fnmatch
+import platform
+import subprocess
+from optparse import OptionParser
+from ._common import measure, format_time
+
+REPEAT = 5
+
+
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, encoding="utf-8", timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(pattern=None):
+    """ 返回 { name: 单次调用的最短耗时 (s) } """
+    from .suite import CASES
+    results = {}
+    for name, factory, number in CASES:
+        if pattern is not None and not fnmatch.fnmatchcase(name, pattern):
+            continue
+        try:
+            func = factory()
+            results[name] = measure(func, number=number, repeat=REPEAT)
+        except Exception as e:
+            print("%-40s %12s  %s: %s" % (name, "ERROR", e.__class__.__name__, e))
+            continue
+        print("%-40s %12s" % (name, format_time(results[name])))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """ 返回变慢的用例名 """
+    slower = []
+    print()
+    print("%-40s %12s %12s %8s" % ("case", "baseline", "current", "ratio"))
+    for name, t in results.items():
+        t0 = baseline.get(name)
+        if t0 is None:
+            print("%-40s %12s %12s %8s" % (name, "-", format_time(t), "new"))
+            continue
+        ratio = t / t0
+        if ratio > 1 + threshold:
+            mark = "SLOWER"
+            slower.append(name)
+        elif ratio < 1 / (1 + threshold):
+            mark = "faster"
+        else:
+            mark = ""
+        print("%-40s %12s %12s %7.2fx  %s" % (name, format_time(t0), format_time(t), ratio, mark))
+    return slower
+
+
+def main(argv=None):
+    parser = OptionParser(usage="python -m benchmarks [options]")
+    parser.add_option("-k", dest="pattern", metavar="PATTERN", help="only run the cases matching the glob pattern")
+    parser.add_option("--save", metavar="FILE", help="save the results as json")
+    parser.add_option("--compare", metavar="FILE", help="compare with the results saved by --save")
+    parser.add_option("--threshold", type="float", default=0.2, help="relative slowdown reported as a regression (default 0.2)")
+    options, _ = parser.parse_args(argv)
+
+    print("python %s, %s" % (platform.python_version(), platform.platform()))
+    results = run(options.pattern)
+
+    if options.save is not None:
+        with open(options.save, "w", encoding="utf-8") as fp:
+            json.dump({
+                "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "commit": get_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            }, fp, ensure_ascii=False, indent=2)
+
+    if options.compare is not None:
+        with open(options.compare, "r", encoding="utf-8") as fp:
+            baseline = json.load(fp)
+        print()
+        print("baseline: %s (commit %s)" % (baseline.get("time"), baseline.get("commit")))
+        slower = compare(results, baseline["results"], options.threshold)
+        if len(slower) > 0:
+            print()
+            print("%d case(s) slower than the baseline by more than %d%%" % (len(slower), options.threshold * 100))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: _common.py
+# modified: 2026-10-17
+
+import timeit
+
+
+def measure(func, number=None, repeat=5):
+    """ 返回 func 单次调用的最短耗时，单位 s """
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def format_time(seconds):
+    if seconds >= 1:
+        return "%.3f s" % seconds
+    if seconds >= 1e-3:
+        return "%.3f ms" % (seconds * 1e3)
+    return "%.3f us" % (seconds * 1e6)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: _fixtures.py
+# modified: 2026-10-18
+"""
+基准测试用的合成页面，结构与 SupplyCancel.do 返回的补退选页一致 (页面结构见 autoelective/simulator.py)
+"""
+
+import re
+import random
+from autoelective.simulator import (
+    PLAN_HEADER,
+    ELECTED_HEADER,
+    ELECT_HREF,
+    plan_row,
+    elected_row,
+    datagrid,
+    tips_html,
+    supply_cancel_page,
+)
+
+
+def random_plans(n, seed=0):
+    rnd = random.Random(seed)
+    plans = []
+    for i in range(n):
+        maxi = rnd.randint(30, 200)
+        used = rnd.randint(maxi - 3, maxi)
+        plans.append(("课程%05d" % i, "%02d" % (i % 7 + 1), "学院%d" % (i % 31), maxi, used))
+    return plans
+
+
+def random_page(n_plans, n_elected=10, seed=0):
+    plans = random_plans(n_plans, seed)
+    elected = [ p[:3] for p in random.Random(seed).sample(plans, min(n_elected, n_plans)) ]
+    return supply_cancel_page(plans, elected).encode("utf-8")
+
+
+_DATAGRID = re.compile(rb'(<table class="datagrid"[^>]*>)(<tr class="datagrid-header">.*?</tr>)(.*?)</table>', re.S)
+
+def with_tbody(content, thead=False):
+    """ 把各 datagrid 的行包在 <tbody> 中，thead 为 True 时表头放在 <thead> 中 """
+    if thead:
+        repl = rb'\1<thead>\2</thead><tbody>\3</tbody></table>'
+    else:
+        repl = rb'\1<tbody>\2\3</tbody></table>'
+    return _DATAGRID.sub(repl, content)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_classifier.py
+# modified: 2026-10-17
+"""
+errInfo / tips 分类的单次耗时：对比原先 hook.py 中的 if/elif 链与 messages.json 驱动的 MessageClassifier，
+并校验两者对每条提示信息给出相同的异常类与 msg
+
+    python -m benchmarks.bench_classifier
+"""
+
+import re
+from autoelective.exceptions import *
+from autoelective.classifier import load_message_classifiers
+from ._common import measure, format_time
+
+_regexErrorOperatingTime = re.compile(r'目前不是(.*?)时间，因此不能进行相应操作。')
+_regexElectionSuccess    = re.compile(r'补选（或者候补）课程(.*)成功，请查看已选上列表确认，并查看选课结果。')
+_regexMutex              = re.compile(r'(.+)与(.+)只能选其一门。')
+
+ERR_INFOS = [
+    "token无效",
+    "您尚未登录或者会话超时,请重新登录.",
+    "验证码不正确。",
+    "你与他人共享了回话，请退出浏览器重新登录。",
+    "目前不是补退选时间，因此不能进行相应操作。",
+    "未知的系统错误",
+]
+
+TIPS = [
+    "您已经选过该课程了。",
+    "选课操作失败，请稍后再试。",
+    "学校规定每学期只能修一门英语课，因此您不能选择该课。",
+    "上课时间冲突：与 数据库概论 冲突",
+    "考试时间冲突：与 概率统计 冲突",
+    "该课程选课人数已满，请稍后再试。",
+    "学校规定每学期只能修一门体育课，您已选择了 体育(一)",
+    "补选（或者候补）课程数据库概论成功，请查看已选上列表确认，并查看选课结果。",
+    "集合论与图论与离散数学只能选其一门。",
+    "系统维护中，请稍后访问。",
+]
+
+
+def classify_errInfo_before(err):
+    if err == "token无效":
+        return InvalidTokenError, None
+    elif err == "您尚未登录或者会话超时,请重新登录.":
+        return SessionExpiredError, None
+    elif err == "请不要用刷课机刷课，否则会受到学校严厉处分！":
+        return CaughtCheatingError, None
+    elif err == "索引错误。":
+        return CourseIndexError, None
+    elif err == "验证码不正确。":
+        return CaptchaError, None
+    elif err == "无验证信息。":
+        return NoAuthInfoError, None
+    elif err == "你与他人共享了回话，请退出浏览器重新登录。":
+        return SharedSessionError, None
+    elif err == "只有同意选课协议才可以继续选课！":
+        return NotAgreedToSelectionAgreement, None
+    elif _regexErrorOperatingTime.search(err):
+        return NotInOperationTimeError, err
+    else:
+        return SystemException, err
+
+
+def classify_tips_before(tips):
+    if tips == "您已经选过该课程了。":
+        return ElectionRepeatedError, None
+    elif tips == "对不起，超时操作，请重新登录。":
+        return OperationTimeoutError, None
+    elif tips == "选课操作失败，请稍后再试。":
+        return ElectionFailedError, None
+    elif tips == "您本学期所选课程的总学分已经超过规定学分上限。":
+        return CreditsLimitedError, None
+    elif tips == "学校规定每学期只能修一门英语课，因此您不能选择该课。":
+        return MultiEnglishCourseError, None
+    elif tips.startswith("上课时间冲突"):
+        return TimeConflictError, tips
+    elif tips.startswith("考试时间冲突"):
+        return ExamTimeConflictError, tips
+    elif tips.startswith("该课程在补退选阶段开始后的约一周开放选课"):
+        return ElectionPermissionError, tips
+    elif tips.startswith("该课程选课人数已满"):
+        return QuotaLimitedError, tips
+    elif tips.startswith("学校规定每学期只能修一门体育课"):
+        return MultiPECourseError, tips
+    elif _regexElectionSuccess.search(tips):
+        return ElectionSuccess, tips
+    elif _regexMutex.search(tips):
+        return MutexCourseError, tips
+    else:
+        return None
+
+
+def classify_after(classifier, msg):
+    rule = classifier.classify(msg)
+    if rule is None:
+        return None
+    return rule.exception, (msg if rule.with_msg else None)
+
+
+def main():
+    classifiers = load_message_classifiers(user_file=None)
+    print("%-10s  %-56s  %12s  %12s" % ("kind", "message", "if/elif", "classifier"))
+    for kind, messages, before in (
+            ("errInfo", ERR_INFOS, classify_errInfo_before),
+            ("tips", TIPS, classify_tips_before),
+        ):
+        classifier = classifiers[kind]
+        for msg in messages:
+            assert before(msg) == classify_after(classifier, msg), msg
+            t_before = measure(lambda: before(msg))
+            t_after = measure(lambda: classifier.classify(msg))
+            print("%-10s  %-56s  %12s  %12s" % (kind, msg[:28], format_time(t_before), format_time(t_after)))
+
+
+if __name__ == '__main__':
+    main()
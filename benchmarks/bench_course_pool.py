@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_course_pool.py
+# modified: 2026-10-18
+"""
+用 tracemalloc 统计稳态下每回合解析补退选页时 Course 相关的内存分配，
+对比 CoursePool 与每行新建 Course 的旧做法
+
+    python -m benchmarks.bench_course_pool
+
+CoursePool 每回合新分配且仍存活的内存超过 MAX_BLOCKS_PER_LOOP / MAX_BYTES_PER_LOOP 时退出码为 1
+(稳态下只剩每回合的结果列表，与每行一个 Course 的旧做法相差两个数量级)
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from autoelective.course import Course, CoursePool
+from autoelective.parser import get_tree, get_tables, get_courses, get_courses_with_detail
+from ._fixtures import random_page
+
+N_PLANS = 1000
+N_LOOPS = 20
+WARMUP_LOOPS = 3
+MAX_BLOCKS_PER_LOOP = 32
+MAX_BYTES_PER_LOOP = 24 * N_PLANS  # two result lists of N_PLANS pointers, with slack
+
+
+class FreshPool(object):
+    """ 旧做法：每行都新建 Course """
+
+    def get(self, name, class_no, school):
+        return Course(name, class_no, school)
+
+    def get_with_detail(self, name, class_no, school, status, href, seen=None):
+        return Course(name, class_no, school, tuple(map(int, status.split("/"))), href)
+
+
+def run_loops(pool, tables, n):
+    """
+    模拟 n 个刷新回合，上一回合的解析结果在本回合解析完成后才被释放，与 loop.py 中一致
+
+    返回 (每回合新分配且仍存活的 blocks, bytes, 每回合峰值增量 bytes, 每回合耗时, gen0 GC 次数)
+    """
+    filters = [ tracemalloc.Filter(True, "*/autoelective/*") ]
+    previous = None
+    blocks = size = peak = 0
+    gc0 = gc.get_stats()[0]["collections"]
+    t0 = time.perf_counter()
+    for _ in range(n):
+        before = tracemalloc.take_snapshot().filter_traces(filters)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = ( get_courses_with_detail(tables[0], pool), get_courses(tables[1], pool) )
+        _, p = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot().filter_traces(filters)
+        for stat in after.compare_to(before, "filename"):
+            if stat.count_diff > 0:
+                blocks += stat.count_diff
+                size += stat.size_diff
+        peak += p - current
+        previous = result  # release the results of the previous loop
+    elapsed = time.perf_counter() - t0
+    gcn = gc.get_stats()[0]["collections"] - gc0
+    del previous
+    return blocks / n, size / n, peak / n, elapsed / n, gcn
+
+
+def main():
+    tables = get_tables(get_tree(random_page(N_PLANS)))
+
+    print("plans: %d, loops: %d" % (N_PLANS, N_LOOPS))
+    print("%12s  %14s  %14s  %14s  %10s" % ("", "blocks/loop", "bytes/loop", "peak/loop", "gen0 GCs"))
+
+    failed = False
+    for label, pool in (("fresh", FreshPool()), ("CoursePool", CoursePool())):
+        for _ in range(WARMUP_LOOPS):
+            get_courses_with_detail(tables[0], pool)
+            get_courses(tables[1], pool)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            blocks, size, peak, _, gcn = run_loops(pool, tables, N_LOOPS)
+        finally:
+            tracemalloc.stop()
+        print("%12s  %14.1f  %14.1f  %14.1f  %10d" % (label, blocks, size, peak, gcn))
+        if isinstance(pool, CoursePool) and (blocks > MAX_BLOCKS_PER_LOOP or size > MAX_BYTES_PER_LOOP):
+            failed = True
+
+    if failed:
+        print()
+        print("CoursePool allocates more than %d blocks / %d bytes per loop at steady state"
+              % (MAX_BLOCKS_PER_LOOP, MAX_BYTES_PER_LOOP))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_datagrid.py
+# modified: 2026-10-17
+"""
+datagrid 解析的前后对比：每次现场求值的字符串 XPath 与 header.index，
+对比预编译的 etree.XPath 与按表头签名缓存的列位置
+
+    python -m benchmarks.bench_datagrid
+"""
+
+from autoelective.course import CoursePool
+from autoelective.parser import get_tree, get_tables, get_courses_with_detail
+from ._common import measure, format_time
+from ._fixtures import random_page
+
+ROW_SIZES = (100, 500, 2000, 10000)
+MAX_ROWS_OLD_TABLES = 500  # 旧的 get_tables 在更大的表格上需要数秒甚至更久
+
+
+def get_tables_uncompiled(tree):
+    return tree.xpath('.//table//table[@class="datagrid"]')
+
+
+def get_courses_with_detail_uncompiled(table, pool):
+    header = table.xpath('.//tr[@class="datagrid-header"]/th/text()')
+    trs = table.xpath('.//tr[@class="datagrid-odd" or @class="datagrid-even"]')
+    ixs = tuple(map(header.index, ["课程名","班号","开课单位","限数/已选","补选"]))
+    cs = []
+    for tr in trs:
+        t = tr.xpath('./th | ./td')
+        name, class_no, school, status, _ = map(lambda ix: t[ix].xpath('.//text()')[0], ixs)
+        href = t[ixs[-1]].xpath('./a/@href')[0]
+        c = pool.get_with_detail(name, class_no, school, status, href)
+        cs.append(c)
+    return cs
+
+
+def main():
+    print("%8s  %14s  %14s  %14s  %14s" % ("rows", "tables before", "tables after", "rows before", "rows after"))
+    for n in ROW_SIZES:
+        tree = get_tree(random_page(n))
+        table = get_tables(tree)[0]
+        pool = CoursePool()
+        assert get_courses_with_detail_uncompiled(table, pool) == get_courses_with_detail(table, pool)
+
+        if n <= MAX_ROWS_OLD_TABLES:
+            t_tables_before = format_time(measure(lambda: get_tables_uncompiled(tree), number=1, repeat=3))
+        else:
+            t_tables_before = "-"
+        t_tables_after = measure(lambda: get_tables(tree))
+        t_rows_before = measure(lambda: get_courses_with_detail_uncompiled(table, pool))
+        t_rows_after = measure(lambda: get_courses_with_detail(table, pool))
+        print("%8d  %14s  %14s  %14s  %14s" % (
+            n, t_tables_before, format_time(t_tables_after), format_time(t_rows_before), format_time(t_rows_after)))
+
+
+if __name__ == '__main__':
+    main()
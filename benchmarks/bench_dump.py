@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_dump.py
+# modified: 2026-10-17
+"""
+请求转储的开销与归档的查询速度
+
+  hook:    在 response hook 中 pickle + gzip 整个 Response，对比复制字段后交给后台的 DumpWriter
+  archive: 逐个 .gz 文件与归档的磁盘占用（补退选页大多只有名额变化），以及在归档中按条件查找、取出页面的耗时
+
+    python -m benchmarks.bench_dump
+"""
+
+import os
+import glob
+import shutil
+import random
+import tempfile
+import datetime
+import requests
+from requests.models import Response
+from autoelective.utils import pickle_gzip_dump, pickle_gzip_load
+from autoelective.dump import DumpWriter
+from autoelective.archive import Archive, RequestDump
+from ._common import measure, format_time
+from ._fixtures import random_page
+
+ROW_SIZES = (20, 200, 2000)
+NUMBER = 10
+ARCHIVE_REQUESTS = 2000
+ARCHIVE_PAGES = 50   # 不同的补退选页数，其余请求为重复的页面或较小的接口
+ROTATE_MAX_BYTES = 256 * 1024
+
+ENDPOINTS = ["SupplyCancel.do", "DrawServlet", "validate.do", "electSupplement.do"]
+BASE_URL = "https://elective.pku.edu.cn/elective2008/edu/pku/stu/elective/controller/supplement/"
+
+
+def make_response(content, url=BASE_URL + "SupplyCancel.do", status_code=200):
+    req = requests.Request("GET", url, headers={"User-Agent": "Mozilla/5.0", "Cookie": "JSESSIONID=xxxx"}).prepare()
+    r = Response()
+    r.request = req
+    r.url = req.url
+    r.status_code = status_code
+    r.reason = "OK"
+    r.headers["Content-Type"] = "text/html;charset=UTF-8"
+    r.encoding = "UTF-8"
+    r._content = content
+    r.elapsed = datetime.timedelta(seconds=0.123)
+    return r
+
+
+def bench_hook(tmp):
+    print("%8s  %10s  %14s  %14s" % ("rows", "page", "hook before", "hook after"))
+    for n in ROW_SIZES:
+        content = random_page(n)
+        r = make_response(content)
+        old = os.path.join(tmp, "old.gz")
+        t_before = measure(lambda: pickle_gzip_dump(r, old), number=NUMBER, repeat=3)
+        directory = os.path.join(tmp, "hook_%d" % n)
+        os.mkdir(directory)
+        writer = DumpWriter(directory, maxsize=NUMBER * 3)
+        t_after = measure(lambda: writer.submit(r), number=NUMBER, repeat=3)
+        assert writer.flush(timeout=600)
+        print("%8d  %7d KB  %14s  %14s" % (n, len(content) // 1024, format_time(t_before), format_time(t_after)))
+
+
+def make_traffic(seed=0):
+    rd = random.Random(seed)
+    pages = [ random_page(200, seed=i) for i in range(ARCHIVE_PAGES) ]
+    for i in range(ARCHIVE_REQUESTS):
+        endpoint = ENDPOINTS[i % len(ENDPOINTS)]
+        if endpoint == "SupplyCancel.do":
+            content = pages[min(i * ARCHIVE_PAGES // ARCHIVE_REQUESTS, ARCHIVE_PAGES - 1)]
+        else:
+            content = b'{"valid": "%d"}' % rd.choice((0, 2))
+        r = make_response(content, BASE_URL + endpoint, rd.choice((200,) * 19 + (500,)))
+        yield RequestDump.from_response(r, "CaptchaError" if content == b'{"valid": "0"}' else None)
+
+
+def bench_archive(tmp):
+    loose = os.path.join(tmp, "loose")
+    os.mkdir(loose)
+    path = os.path.join(tmp, "archive")
+    with Archive(path, "a") as archive:
+        for i, dump in enumerate(make_traffic()):
+            pickle_gzip_dump(dump.to_dict(), os.path.join(loose, "%06d.gz" % i))
+            archive.append(dump)
+    loose_size = sum( os.path.getsize(f) for f in glob.glob(os.path.join(loose, "*.gz")) )
+
+    archive = Archive(path)
+    ixs = archive.query(endpoint="SupplyCancel.do", status=200)
+    assert len(ixs) > 0
+    body = archive.get_body(ixs[-1])
+    assert body == archive.get(ixs[-1]).content
+
+    print()
+    print("%d requests, %d distinct SupplyCancel pages" % (ARCHIVE_REQUESTS, ARCHIVE_PAGES))
+    print("%-34s %12s" % ("loose .gz files", "%d KB" % (loose_size // 1024)))
+    print("%-34s %12s" % ("archive", "%d KB" % (archive.size // 1024)))
+    print("%-34s %12s" % ("open archive (read index)", format_time(measure(lambda: Archive(path)))))
+    print("%-34s %12s" % ("query endpoint + status", format_time(measure(lambda: archive.query(endpoint="SupplyCancel.do", status=200)))))
+    print("%-34s %12s" % ("query exception", format_time(measure(lambda: archive.query(exception="Captcha*")))))
+    print("%-34s %12s" % ("extract one page", format_time(measure(lambda: archive.get_body(ixs[-1])))))
+    files = sorted(glob.glob(os.path.join(loose, "*.gz")))
+    def scan_loose():  # what finding a page took before: unpickle the files one by one
+        for f in reversed(files):
+            d = RequestDump.from_dict(pickle_gzip_load(f))
+            if d.url.endswith("SupplyCancel.do") and d.status_code == 200:
+                return d
+    print("%-34s %12s" % ("find in loose files (last match)", format_time(measure(scan_loose, repeat=3))))
+    print("%-34s %12s" % ("find in loose files (all)", format_time(measure(lambda: [
+        f for f in files if "SupplyCancel" in RequestDump.from_dict(pickle_gzip_load(f)).url
+    ], number=1, repeat=1))))
+
+
+def bench_rotate(tmp):
+    directory = os.path.join(tmp, "rotate")
+    os.mkdir(directory)
+    writer = DumpWriter(directory, max_bytes=ROTATE_MAX_BYTES, segment_max_bytes=ROTATE_MAX_BYTES // 8)
+    for i, dump in enumerate(make_traffic(seed=1)):
+        if i >= 400:
+            break
+        writer.submit(make_response(dump.content, dump.url))
+        writer.flush()
+    stats = writer.stats()
+    print()
+    print("rotation: limit %d KB, %d segments kept (%d KB), %d removed" % (
+        ROTATE_MAX_BYTES // 1024, stats["segments"], stats["total_bytes"] // 1024, stats["removed"]))
+    assert stats["total_bytes"] <= ROTATE_MAX_BYTES + ROTATE_MAX_BYTES // 8
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        bench_hook(tmp)
+        bench_archive(tmp)
+        bench_rotate(tmp)
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_environ.py
+# modified: 2026-10-17
+"""
+Environ 在并发读写下的正确性与开销：写线程模拟 elective 回合（计数、记录错误、加入 ignored），
+读线程模拟 monitor 轮询；旧的实现为普通属性、defaultdict 与 dict
+
+    python -m benchmarks.bench_environ
+"""
+
+import threading
+from collections import defaultdict
+from autoelective.environ import Environ
+from ._common import measure, format_time
+
+WRITERS = 2
+READERS = 4
+LOOPS_PER_WRITER = 20000
+
+
+class PlainEnviron(object):
+    """ 修改前的 Environ """
+
+    def __init__(self):
+        self.elective_loop = 0
+        self.errors = defaultdict(lambda: 0)
+        self.ignored = {}
+
+
+def _writer_plain(env, wid):
+    for i in range(LOOPS_PER_WRITER):
+        env.elective_loop += 1
+        env.errors["Error%d" % (i % 8)] += 1
+        env.ignored[(wid, i)] = "Elected"
+
+def _writer_cow(env, wid):
+    for i in range(LOOPS_PER_WRITER):
+        env.next_elective_loop()
+        env.add_error("Error%d" % (i % 8))
+        env.ignored[(wid, i)] = "Elected"
+
+
+def _reader_plain(env, stop, result):
+    while not stop.is_set():
+        try:
+            { str(k): v for k, v in env.ignored.items() }
+            dict(env.errors)
+            result["reads"] += 1
+        except RuntimeError:  # dictionary changed size during iteration
+            result["failures"] += 1
+
+def _reader_cow(env, stop, result):
+    while not stop.is_set():
+        snapshot = env.snapshot()
+        { str(k): v for k, v in snapshot["ignored"].items() }
+        # 计数与错误总数在同一次写入前后成对变化，一致的快照中两者之差不超过写线程数
+        if snapshot["elective_loop"] - sum(snapshot["errors"].values()) > WRITERS:
+            result["failures"] += 1
+        result["reads"] += 1
+
+
+def run(env, writer, reader):
+    stop = threading.Event()
+    results = [ {"reads": 0, "failures": 0} for _ in range(READERS) ]
+    readers = [ threading.Thread(target=reader, args=(env, stop, r)) for r in results ]
+    writers = [ threading.Thread(target=writer, args=(env, wid)) for wid in range(WRITERS) ]
+    for t in readers + writers:
+        t.start()
+    for t in writers:
+        t.join()
+    stop.set()
+    for t in readers:
+        t.join()
+    return {
+        "loops": env.elective_loop,
+        "errors": sum(dict(env.errors).values()),
+        "ignored": len(env.ignored),
+        "reads": sum( r["reads"] for r in results ),
+        "failures": sum( r["failures"] for r in results ),
+    }
+
+
+def main():
+    expected = WRITERS * LOOPS_PER_WRITER
+    print("%d writers x %d loops, %d readers, expected count %d" % (WRITERS, LOOPS_PER_WRITER, READERS, expected))
+    print("%8s  %8s  %8s  %8s  %8s  %9s" % ("", "loops", "errors", "ignored", "reads", "failures"))
+    for name, env, writer, reader in (
+            ("before", PlainEnviron(), _writer_plain, _reader_plain),
+            ("after", Environ(), _writer_cow, _reader_cow),
+        ):
+        if isinstance(env, Environ):
+            env.reset()
+        r = run(env, writer, reader)
+        print("%8s  %8d  %8d  %8d  %8d  %9d" % (name, r["loops"], r["errors"], r["ignored"], r["reads"], r["failures"]))
+
+    # 单线程下每次操作的开销，ignored 中保留 200 门课程，与实际规模相当
+    env = Environ()
+    env.reset()
+    for i in range(200):
+        env.ignored[i] = "Elected"
+    plain = PlainEnviron()
+    plain.ignored = dict(env.ignored.snapshot())
+    print()
+    print("%-22s %12s %12s" % ("operation", "before", "after"))
+    print("%-22s %12s %12s" % ("increment counter",
+        format_time(measure(lambda: setattr(plain, "elective_loop", plain.elective_loop + 1))),
+        format_time(measure(env.next_elective_loop))))
+    print("%-22s %12s %12s" % ("add error",
+        format_time(measure(lambda: plain.errors.__setitem__("E", plain.errors["E"] + 1))),
+        format_time(measure(lambda: env.add_error("E")))))
+    print("%-22s %12s %12s" % ("set ignored (200)",
+        format_time(measure(lambda: plain.ignored.__setitem__(0, "Elected"))),
+        format_time(measure(lambda: env.ignored.__setitem__(0, "Elected")))))
+    print("%-22s %12s %12s" % ("contains ignored",
+        format_time(measure(lambda: 0 in plain.ignored)),
+        format_time(measure(lambda: 0 in env.ignored))))
+    print("%-22s %12s %12s" % ("snapshot",
+        format_time(measure(lambda: (plain.elective_loop, dict(plain.errors), dict(plain.ignored)))),
+        format_time(measure(env.snapshot))))
+    env.reset()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_events.py
+# modified: 2026-10-17
+"""
+EventBus 的发布开销与订阅者数量的关系：事件只序列化一次，订阅者共享同一个环形缓冲区，
+发布端的耗时不应随订阅者数量线性增长；落后超过缓冲区大小的订阅者以 "dropped" 事件得知丢失的数量
+
+    python -m benchmarks.bench_events
+"""
+
+import json
+import time
+import threading
+from autoelective.events import EventBus
+
+SUBSCRIBERS = (0, 1, 10, 50)
+N_EVENTS = 2000
+
+
+def run(n_subscribers):
+    bus = EventBus()
+    received = [0] * n_subscribers
+    dropped = [0] * n_subscribers
+    ready = threading.Barrier(n_subscribers + 1)
+
+    def subscriber(ix):
+        stream = bus.subscribe(keepalive=0.5)
+        next(stream)  # retry: ...
+        ready.wait()
+        for frame in stream:
+            if frame.startswith(b"id:"):
+                received[ix] += 1
+            elif frame.startswith(b"event: dropped"):
+                dropped[ix] += json.loads(frame.split(b"data: ", 1)[1])["count"]
+
+    threads = [ threading.Thread(target=subscriber, args=(ix,), daemon=True) for ix in range(n_subscribers) ]
+    for t in threads:
+        t.start()
+    ready.wait()
+
+    t0 = time.perf_counter()
+    for i in range(N_EVENTS):
+        bus.publish("course_available", course="Course(数据库概论, 1, 信息科学技术学院, 100 / %d)" % (i % 100))
+    elapsed = time.perf_counter() - t0
+
+    bus.close()
+    for t in threads:
+        t.join(5)
+    assert all( r + d == N_EVENTS for r, d in zip(received, dropped) )
+    return elapsed / N_EVENTS, min(received) if received else 0
+
+
+def main():
+    print("%12s  %14s  %20s" % ("subscribers", "publish", "min received"))
+    for n in SUBSCRIBERS:
+        t, received = run(n)
+        print("%12d  %11.2f us  %14d / %d" % (n, t * 1e6, received, N_EVENTS))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_extractor.py
+# modified: 2026-10-18
+"""
+补退选页 datagrid 提取的前后对比：
+  tree:   get_tables(get_tree_from_response(r)) 建立整页文档树后再解析两张表格
+  stream: extractor.extract_datagrids(r) 流式解析，逐行释放，读完已选课程表后停止
+
+分别比较耗时与峰值内存。lxml 在 C 层的分配不计入 tracemalloc，这里在 fork 出的子进程中读取
+/proc/self/status 的 VmHWM - VmRSS 作为峰值内存增量，仅在 Linux 下可用
+
+    python -m benchmarks.bench_extractor [dumped pages ...]
+"""
+
+import os
+import sys
+import multiprocessing
+from autoelective.course import CoursePool
+from autoelective.parser import get_tree_from_response, get_tables, get_courses, get_courses_with_detail
+from autoelective.extractor import extract_datagrids, get_title_from_response
+from .bench_response_parse import make_response, load_page
+from ._common import measure, format_time
+from ._fixtures import random_page, with_tbody
+
+SYNTHETIC_SIZES = (20, 200, 2000)
+FOOTER_SIZE = 200 * 1024
+
+
+def with_footer(content):
+    """ 真实页面在两张表格之后还有大量的脚本与页脚 """
+    footer = b'<div class="footer">' + b'<p>footer</p>' * (FOOTER_SIZE // 13) + b'</div></body>'
+    return content.replace(b'</body>', footer, 1)
+
+
+def extract_tree(content, content_type, pool):
+    r = make_response(content, content_type)
+    r._tree = None
+    tables = get_tables(get_tree_from_response(r))
+    return [ get_courses_with_detail(tables[0], pool), get_courses(tables[1], pool) ]
+
+
+def extract_stream(content, content_type, pool):
+    r = make_response(content, content_type)
+    r._tree = None
+    get_title_from_response(r)
+    return extract_datagrids(r, pool=pool)
+
+
+def _read_status_kb(field):
+    with open("/proc/self/status") as fp:
+        for line in fp:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+
+def _reset_hwm():
+    with open("/proc/self/clear_refs", "w") as fp:
+        fp.write("5")  # reset VmHWM to the current RSS
+
+def _peak_memory_child(func, queue):
+    _reset_hwm()
+    rss = _read_status_kb("VmRSS")
+    func()
+    queue.put(_read_status_kb("VmHWM") - rss)
+
+def peak_memory(func):
+    """ func 执行期间的峰值内存增量 (KB)，不可用时返回 None """
+    if not os.path.exists("/proc/self/clear_refs"):
+        return None
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue()
+    p = ctx.Process(target=_peak_memory_child, args=(func, queue))
+    p.start()
+    p.join()
+    return queue.get() if p.exitcode == 0 else None
+
+def format_kb(kb):
+    return "-" if kb is None else "%.0fK" % kb
+
+
+def main():
+    pages = []
+    if len(sys.argv) > 1:
+        for file in sys.argv[1:]:
+            pages.append((file, *load_page(file)))
+    else:
+        for n in SYNTHETIC_SIZES:
+            pages.append(("synthetic %d rows + footer" % n, with_footer(random_page(n)), "text/html;charset=UTF-8"))
+        pages.append(("synthetic 200 rows, <tbody>", with_tbody(random_page(200)), "text/html;charset=UTF-8"))
+        pages.append(("synthetic 200 rows, <thead>", with_tbody(random_page(200), thead=True), "text/html;charset=UTF-8"))
+
+    print("%-32s  %9s  %10s  %10s  %8s  %11s  %11s" % (
+        "page", "size", "tree", "stream", "speedup", "tree peak", "stream peak"))
+    for label, content, content_type in pages:
+        pool = CoursePool()
+        expected = extract_tree(content, content_type, pool)
+        assert len(expected) == 2 and expected == extract_stream(content, content_type, pool), label
+        t_tree = measure(lambda: extract_tree(content, content_type, pool))
+        t_stream = measure(lambda: extract_stream(content, content_type, pool))
+        m_tree = peak_memory(lambda: extract_tree(content, content_type, pool))
+        m_stream = peak_memory(lambda: extract_stream(content, content_type, pool))
+        print("%-32s  %8.1fK  %10s  %10s  %7.2fx  %11s  %11s" % (
+            label[-32:], len(content) / 1024, format_time(t_tree), format_time(t_stream), t_tree / t_stream,
+            format_kb(m_tree), format_kb(m_stream)))
+
+
+if __name__ == '__main__':
+    main()
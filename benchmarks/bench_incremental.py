@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_incremental.py
+# modified: 2026-10-18
+"""
+连续刷新补退选页时的增量解析：对比每次都完整解析的 extract_datagrids 与按行指纹复用的 IncrementalExtractor，
+并校验两者在随机变化的页面序列上结果一致
+
+    python -m benchmarks.bench_incremental
+"""
+
+import random
+from autoelective.course import CoursePool
+from autoelective.extractor import IncrementalExtractor, extract_datagrids
+from .bench_response_parse import make_response
+from ._common import measure, format_time
+from ._fixtures import supply_cancel_page, random_plans, with_tbody
+
+ROW_SIZES = (200, 2000)
+N_ELECTED = 10
+N_CHECK_REFRESHES = 50
+
+
+def make_page(plans, tbody=None):
+    """ tbody: None / "tbody" / "thead"，见 _fixtures.with_tbody """
+    elected = [ p[:3] for p in plans[:N_ELECTED] ]
+    content = supply_cancel_page(plans, elected).encode("utf-8")
+    if tbody is not None:
+        content = with_tbody(content, thead=(tbody == "thead"))
+    return content
+
+
+def change_quotas(plans, k, rnd):
+    plans = list(plans)
+    for i in rnd.sample(range(len(plans)), k):
+        name, class_no, school, maxi, used = plans[i]
+        plans[i] = (name, class_no, school, maxi, (used + 1) % (maxi + 1))
+    return plans
+
+
+def dump(tables):
+    return [ [ (c._ident, c._status, c._href) for c in t ] for t in tables ]
+
+
+def check(n, tbody=None):
+    rnd = random.Random(n)
+    plans = random_plans(n, seed=n)
+    extractor = IncrementalExtractor(pool=CoursePool())
+    pool = CoursePool()
+    for _ in range(N_CHECK_REFRESHES):
+        plans = change_quotas(plans, rnd.choice((0, 0, 1, 3)), rnd)
+        if rnd.random() < 0.1:
+            plans.pop(rnd.randrange(len(plans)))
+        content = make_page(plans, tbody)
+        expected = dump(extract_datagrids(make_response(content), pool=pool))
+        assert len(expected) == 2 and len(expected[0]) == len(plans)
+        assert dump(extractor.extract(make_response(content))) == expected
+
+
+def main():
+    print("%8s  %10s  %14s  %14s  %14s  %14s" % ("rows", "changed", "full", "incremental", "speedup", "delta"))
+    for n in ROW_SIZES:
+        for tbody in (None, "tbody", "thead"):
+            check(n, tbody)
+        rnd = random.Random(0)
+        plans = random_plans(n)
+        pool = CoursePool()
+        for k in (0, 1, 10, n):
+            before = make_page(plans)
+            after = make_page(change_quotas(plans, k, rnd))
+            extractor = IncrementalExtractor(pool=CoursePool())
+
+            def incremental():
+                extractor.extract(make_response(before))
+                extractor.extract(make_response(after))
+
+            def full():
+                extract_datagrids(make_response(before), pool=pool)
+                extract_datagrids(make_response(after), pool=pool)
+
+            incremental()
+            delta = extractor.deltas[0]
+            t_full = measure(full) / 2
+            t_incremental = measure(incremental) / 2
+            print("%8d  %10d  %14s  %14s  %13.2fx  %14s" % (
+                n, k, format_time(t_full), format_time(t_incremental), t_full / t_incremental,
+                "%d changed" % len(delta.changed)))
+
+
+if __name__ == '__main__':
+    main()
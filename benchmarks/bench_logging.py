@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_logging.py
+# modified: 2026-10-17
+"""
+选课线程中一次 cout.info 的耗时：handler 直接写出，对比放入 AsyncLogListener 的队列，
+写出端为每条记录 flush 的文件（与 StreamHandler 相同），以及模拟终端阻塞的慢速 handler；
+另外给出短时间大量输出时各 drop policy 的丢弃数
+
+    python -m benchmarks.bench_logging
+"""
+
+import os
+import time
+import logging
+import tempfile
+from autoelective.logger import AsyncLogListener, _LogQueueHandler, BaseLogger
+from ._common import format_time
+
+RECORDS = 5000
+BURST = 20000
+BURST_QUEUE_SIZE = 1000
+SLOW_WRITE = 50e-6  # 50us per record, e.g. a console that is being scrolled
+
+
+class SlowHandler(logging.StreamHandler):
+
+    def emit(self, record):
+        super().emit(record)
+        time.sleep(SLOW_WRITE)
+
+
+def _make_logger(name, handler, listener=None):
+    handler.setFormatter(BaseLogger.default_format)
+    logger = logging.getLogger("bench.%s" % name)
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.handlers[:] = []
+    logger.addHandler(handler if listener is None else _LogQueueHandler(handler, listener))
+    return logger
+
+
+def _per_call(logger, n):
+    t0 = time.perf_counter()
+    for i in range(n):
+        logger.info("Course(%s, %d, %s) is AVAILABLE now !", "数据库概论", i, "信息科学技术学院")
+    return (time.perf_counter() - t0) / n
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    print("%-12s %14s %14s" % ("sink", "sync", "async"))
+    for sink, clz, n in (("file", logging.StreamHandler, RECORDS), ("slow", SlowHandler, RECORDS // 5)):
+        times = []
+        for mode in ("sync", "async"):
+            fp = open(os.path.join(tmp, "%s_%s.log" % (sink, mode)), "w", encoding="utf-8")
+            listener = None
+            if mode == "async":
+                listener = AsyncLogListener(n * 2, "block")
+                listener.start()
+            logger = _make_logger("%s_%s" % (sink, mode), clz(fp), listener)
+            times.append(_per_call(logger, n))
+            if listener is not None:
+                listener.stop()
+            fp.close()
+            with open(fp.name, encoding="utf-8") as f:
+                assert sum(1 for _ in f) == n
+        print("%-12s %14s %14s" % (sink, format_time(times[0]), format_time(times[1])))
+
+    print()
+    print("burst of %d INFO records into a queue of %d, slow sink" % (BURST, BURST_QUEUE_SIZE))
+    print("%-12s %14s %10s %10s" % ("policy", "per call", "written", "dropped"))
+    for policy in ("drop_new", "drop_old", "block"):
+        n = BURST if policy != "block" else BURST // 10
+        fp = open(os.path.join(tmp, "burst_%s.log" % policy), "w", encoding="utf-8")
+        listener = AsyncLogListener(BURST_QUEUE_SIZE, policy)
+        listener.start()
+        logger = _make_logger("burst_%s" % policy, SlowHandler(fp), listener)
+        t = _per_call(logger, n)
+        logger.warning("the last warning is never dropped")
+        listener.stop()
+        fp.close()
+        with open(fp.name, encoding="utf-8") as f:
+            lines = f.readlines()
+        assert "never dropped" in lines[-1] or policy == "drop_old"
+        assert any( "never dropped" in line for line in lines )
+        assert len(lines) + listener.dropped == n + 1
+        print("%-12s %14s %10d %10d" % (policy if n == BURST else "%s (%d)" % (policy, n),
+            format_time(t), len(lines), listener.dropped))
+
+
+if __name__ == '__main__':
+    main()
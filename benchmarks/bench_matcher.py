@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_matcher.py
+# modified: 2026-10-17
+"""
+目标课程匹配的微基准：对比逐行扫描 plans 与按 ident 建索引的单次匹配
+
+    python -m benchmarks.bench_matcher
+"""
+
+import random
+import numpy as np
+from autoelective.course import Course
+from autoelective.parser import QUOTA_DTYPE
+from autoelective.matcher import PageIndex, NO_DELAY, match_goals
+from ._common import measure, format_time
+
+N_GOALS = 20
+N_ELECTED = 10
+PLAN_SIZES = (100, 500, 1000, 2000, 5000)
+GOAL_SIZES = (20, 100, 500, 1000)
+N_PLANS = 5000
+
+
+def make_page(n_plans, n_goals=N_GOALS, n_elected=N_ELECTED, seed=0):
+    rnd = random.Random(seed)
+    plans = []
+    for i in range(n_plans):
+        maxi = rnd.randint(30, 200)
+        used = rnd.randint(maxi - 3, maxi)
+        plans.append(Course("课程%05d" % i, i % 7 + 1, "学院%d" % (i % 31), (maxi, used), "/href/%d" % i))
+    rows = rnd.sample(plans, n_goals + n_elected)
+    goals = [c.to_simplified() for c in rows[:n_goals]]
+    elected = [c.to_simplified() for c in rows[n_goals:]]
+    goals.extend(elected[:n_elected // 2])  # some goals are already elected
+    return goals, plans, elected
+
+
+def make_index(goal_ixs, plans, elected):
+    quotas = np.array([ (*c._status, goal_ixs.get(c._ident, -1)) for c in plans ], dtype=QUOTA_DTYPE)
+    return PageIndex(plans, elected, quotas)
+
+
+def make_delays(goals, seed=0):
+    rnd = random.Random(seed)
+    return np.array([ rnd.choice((NO_DELAY, NO_DELAY, 1, 2)) for _ in goals ], dtype=np.int32)
+
+
+def match_linear(goals, plans, elected, ignored, delays):
+    """ 旧实现：goals x plans 逐行比较 """
+    available = []
+    for ix, c in enumerate(goals):
+        if c in ignored:
+            continue
+        elif c in elected:
+            continue
+        for c0 in plans:
+            if c0 == c:
+                if c0.is_available():
+                    delay = delays[ix]
+                    if not (delay != NO_DELAY and c0.remaining_quota > delay):
+                        available.append((ix, c0))
+                break
+    return available
+
+
+def match_indexed(goals, goal_ixs, plans, elected, ignored, delays):
+    index = make_index(goal_ixs, plans, elected)
+    return match_goals(goals, goal_ixs, index, ignored, delays).available
+
+
+def main():
+    print("goals: %d, elected: %d" % (N_GOALS + N_ELECTED // 2, N_ELECTED))
+    print("%8s  %14s  %14s  %14s" % ("plans", "linear", "indexed", "match only"))
+    for n in PLAN_SIZES:
+        goals, plans, elected = make_page(n)
+        ignored = {}
+        delays = make_delays(goals)
+        goal_ixs = { c._ident: ix for ix, c in enumerate(goals) }
+        assert match_linear(goals, plans, elected, ignored, delays) == \
+            match_indexed(goals, goal_ixs, plans, elected, ignored, delays)
+        index = make_index(goal_ixs, plans, elected)
+        t_linear = measure(lambda: match_linear(goals, plans, elected, ignored, delays))
+        t_indexed = measure(lambda: match_indexed(goals, goal_ixs, plans, elected, ignored, delays))
+        t_match = measure(lambda: match_goals(goals, goal_ixs, index, ignored, delays))
+        print("%8d  %14s  %14s  %14s" % (n, format_time(t_linear), format_time(t_indexed), format_time(t_match)))
+
+    print("")
+    print("plans: %d" % N_PLANS)
+    print("%8s  %14s" % ("goals", "match only"))
+    for n in GOAL_SIZES:
+        goals, plans, elected = make_page(N_PLANS, n_goals=n)
+        delays = make_delays(goals)
+        goal_ixs = { c._ident: ix for ix, c in enumerate(goals) }
+        index = make_index(goal_ixs, plans, elected)
+        t_match = measure(lambda: match_goals(goals, goal_ixs, index, {}, delays))
+        print("%8d  %14s" % (len(goals), format_time(t_match)))
+
+
+if __name__ == '__main__':
+    main()
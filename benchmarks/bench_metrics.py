@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_metrics.py
+# modified: 2026-10-17
+"""
+阶段计时本身的开销：Histogram.observe 与 with stage_latency.timer(...)，
+以及多线程同时记录时的开销
+
+    python -m benchmarks.bench_metrics
+"""
+
+import threading
+from autoelective.metrics import LatencyRecorder
+from ._common import measure, format_time
+
+N_THREADS = (1, 4)
+N_OBSERVES = 20000
+
+
+def main():
+    recorder = LatencyRecorder()
+    h = recorder.histogram("observe")
+    timer = recorder.timer
+
+    def empty_timer():
+        with timer("timer"):
+            pass
+
+    print("%-24s  %12s" % ("", "per call"))
+    print("%-24s  %12s" % ("Histogram.observe", format_time(measure(lambda: h.observe(0.01)))))
+    print("%-24s  %12s" % ("stage_latency.timer", format_time(measure(empty_timer))))
+
+    for n in N_THREADS:
+        def worker():
+            for _ in range(N_OBSERVES):
+                h.observe(0.01)
+
+        def run():
+            threads = [ threading.Thread(target=worker) for _ in range(n) ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        t = measure(run, number=1, repeat=3) / (n * N_OBSERVES)
+        print("%-24s  %12s" % ("observe, %d threads" % n, format_time(t)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_model_registry.py
+# modified: 2026-10-18
+"""
+模拟 RELOADS 次 refreshsettings()，比较每次新建 TwoStageClassifier 与通过 model_registry 共享模型的耗时、
+加载次数和常驻内存 (不含导入 torch 本身)，各自在新的子进程中运行
+
+    python -m benchmarks.bench_model_registry
+"""
+
+import os
+import sys
+import json
+import subprocess
+from ._common import format_time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RELOADS = 20
+
+_CHILD = r"""
+import sys, json, time
+from autoelective._internal import get_abs_path
+paths = (get_abs_path("models/color_model.pth"), get_abs_path("models/line_model.pth"))
+
+def rss():
+    with open("/proc/self/status") as fp:
+        for line in fp:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+rss0 = rss()
+t0 = time.perf_counter()
+import torch
+t1 = time.perf_counter()
+rss1 = rss()
+if sys.argv[1] == "new":
+    from autoelective.captcha.model import TwoStageClassifier
+    classifiers = [ TwoStageClassifier(*paths) for _ in range(int(sys.argv[2])) ]  # held by old recognizers
+    loads = len(classifiers)
+else:
+    from autoelective.captcha.registry import model_registry
+    classifiers = [ model_registry.get(*paths) for _ in range(int(sys.argv[2])) ]
+    loads = model_registry.loads
+t2 = time.perf_counter()
+print(json.dumps({ "torch_time": t1 - t0, "torch_rss": rss1 - rss0, "time": t2 - t1, "loads": loads, "rss": rss() - rss1 }))
+"""
+
+
+def run(mode, reloads):
+    r = subprocess.run([sys.executable, "-c", _CHILD, mode, str(reloads)], cwd=ROOT, stdout=subprocess.PIPE,
+                       stderr=subprocess.PIPE, encoding="utf-8", timeout=300)
+    if r.returncode != 0:
+        raise RuntimeError(r.stderr.strip().splitlines()[-1])
+    return json.loads(r.stdout.strip().splitlines()[-1])
+
+
+def main():
+    print("%d reloads" % RELOADS)
+    print("%-10s %12s %8s %12s" % ("mode", "time", "loads", "rss delta"))
+    for mode in ("new", "registry"):
+        r = run(mode, RELOADS)
+        print("%-10s %12s %8d %9.1f MB" % (mode, format_time(r["time"]), r["loads"], r["rss"] / 2**20))
+    print("%-10s %12s %8s %9.1f MB  (paid once, at the first captcha)" % (
+        "torch", format_time(r["torch_time"]), "-", r["torch_rss"] / 2**20))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_monitor.py
+# modified: 2026-10-18
+"""
+频繁抓取 monitor 时对选课线程的影响：在后台线程中反复解析补退选页（模拟 run_elective_loop），
+另一个进程中的 N_SCRAPERS 个抓取端每 SCRAPE_INTERVAL 秒请求一次（与浏览器 / Prometheus 一样不占用本进程的 GIL），
+比较无抓取、抓取 debug 模式的开发服务器（每个请求一个线程，逐条打印请求日志）、抓取 PooledWSGIServer 时
+每次解析的耗时，以及 monitor 每个请求在本进程中消耗的 CPU 时间（占用 GIL 的上限）
+
+各配置交替运行 ROUNDS 轮，取中位数。单核机器上抓取进程本身也会与选课线程争抢 CPU
+
+    python -m benchmarks.bench_monitor
+"""
+
+import sys
+import time
+import statistics
+import threading
+import subprocess
+from werkzeug.serving import make_server
+from werkzeug.debug import DebuggedApplication
+from autoelective.course import CoursePool
+from autoelective.extractor import extract_datagrids
+from autoelective.monitor import monitor, make_monitor_server
+from .bench_response_parse import make_response
+from ._fixtures import random_page
+
+N_PLANS = 500
+N_SCRAPERS = 4
+SCRAPE_INTERVAL = 0.02  # seconds between two scrapes of each scraper, i.e. 200 requests/s in total
+DURATION = 3.0
+ROUNDS = 3
+PATHS = ("/stat/loop", "/stat/course", "/stat/error", "/stat/latency", "/metrics")
+
+_SCRAPER = r"""
+import sys, time, threading, urllib.request
+port, interval, deadline = int(sys.argv[1]), float(sys.argv[2]), time.time() + float(sys.argv[3])
+paths = sys.argv[5:]
+counts = []
+def scraper():
+    while time.time() < deadline:
+        for path in paths:
+            with urllib.request.urlopen("http://127.0.0.1:%d%s" % (port, path)) as r:
+                r.read()
+            counts.append(1)
+            time.sleep(interval)
+threads = [ threading.Thread(target=scraper) for _ in range(int(sys.argv[4])) ]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+print(len(counts))
+"""
+
+
+def worker_loop(content, stop, durations, cpu):
+    pool = CoursePool()
+    c0 = time.thread_time()
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        extract_datagrids(make_response(content), pool=pool)
+        durations.append(time.perf_counter() - t0)
+    cpu.append(time.thread_time() - c0)
+
+
+def run(server):
+    """ (loop p50, loop p99, scrapes/s, monitor 每个请求的 CPU 时间) """
+    content = random_page(N_PLANS)
+    stop = threading.Event()
+    durations = []
+    loop_cpu = []
+    worker = threading.Thread(target=worker_loop, args=(content, stop, durations, loop_cpu))
+    scraper = None
+    if server is not None:
+        port = server.socket.getsockname()[1]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        scraper = subprocess.Popen([sys.executable, "-c", _SCRAPER, str(port), str(SCRAPE_INTERVAL), str(DURATION),
+                                    str(N_SCRAPERS), *PATHS], stdout=subprocess.PIPE, encoding="utf-8")
+    c0 = time.process_time()
+    worker.start()
+    time.sleep(DURATION)
+    stop.set()
+    worker.join()
+    cpu = time.process_time() - c0 - loop_cpu[0]
+    scrapes = 0
+    if server is not None:
+        scrapes = int(scraper.communicate()[0].strip() or 0)
+        server.shutdown()
+        server.server_close()
+    durations.sort()
+    per_scrape = cpu / scrapes if scrapes > 0 else None
+    return durations[len(durations) // 2], durations[int(len(durations) * 0.99)], scrapes / DURATION, per_scrape
+
+
+def main():
+    configs = (
+        ("no scraping", lambda: None),
+        ("debug dev server", lambda: make_server("127.0.0.1", 0, DebuggedApplication(monitor), threaded=True)),
+        ("PooledWSGIServer", lambda: make_monitor_server("127.0.0.1", 0, 4)),
+    )
+    results = { label: [] for label, _ in configs }
+    for _ in range(ROUNDS):
+        for label, factory in configs:
+            results[label].append(run(factory()))
+
+    print("%-24s  %12s  %12s  %12s  %16s" % ("", "loop p50", "loop p99", "scrapes/s", "cpu per scrape"))
+    for label, _ in configs:
+        p50, p99, rate, per_scrape = ( statistics.median(r[i] for r in results[label]) if results[label][0][i] is not None
+                                       else None for i in range(4) )
+        print("%-24s  %9.2f ms  %9.2f ms  %12.0f  %16s" % (label, p50 * 1e3, p99 * 1e3, rate,
+              "-" if per_scrape is None else "%.0f us" % (per_scrape * 1e6)))
+
+
+if __name__ == '__main__':
+    main()
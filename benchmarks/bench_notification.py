@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_notification.py
+# modified: 2026-10-17
+"""
+选课线程中一次推送的耗时：直接 requests.post，对比放入 NotificationDispatcher 的队列；
+推送服务由本地的 HTTP 服务模拟，每个请求耗时 SERVER_DELAY 秒
+
+另外给出连续出现相同错误时实际发出的请求数
+
+    python -m benchmarks.bench_notification
+"""
+
+import time
+import threading
+import requests
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from autoelective.notification.dispatcher import NotificationDispatcher
+from ._common import format_time
+
+SERVER_DELAY = 0.2
+MESSAGES = 10
+REPEATS = 200
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    requests = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(SERVER_DELAY)
+        __class__.requests += 1
+        body = b'{"code": 200}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    server = HTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:%d/" % server.server_port
+
+    def send(session, token, body, timeout):
+        r = session.post(url + token, data={"body": body}, timeout=timeout)
+        assert r.json()["code"] == 200
+
+    t0 = time.perf_counter()
+    for i in range(MESSAGES):
+        requests.post(url + "token", data={"body": "message %d" % i})
+    t_sync = (time.perf_counter() - t0) / MESSAGES
+
+    dispatcher = NotificationDispatcher()
+    dispatcher._session = requests.Session()  # plain http for the local server
+    t0 = time.perf_counter()
+    for i in range(MESSAGES):
+        dispatcher.submit("token", "message %d" % i, send)
+    t_async = (time.perf_counter() - t0) / MESSAGES
+    assert dispatcher.flush(timeout=MESSAGES * SERVER_DELAY * 5)
+
+    print("server delay %s, %d distinct messages" % (format_time(SERVER_DELAY), MESSAGES))
+    print("%-26s %12s" % ("requests.post per call", format_time(t_sync)))
+    print("%-26s %12s" % ("dispatcher per call", format_time(t_async)))
+
+    _Handler.requests = 0
+    t0 = time.perf_counter()
+    for i in range(REPEATS):
+        dispatcher.submit("token", "出现未知异常", send)
+    t_repeat = (time.perf_counter() - t0) / REPEATS
+    assert dispatcher.flush(timeout=SERVER_DELAY * 10)
+    print()
+    print("%d identical messages: %d requests sent, %s per call" % (REPEATS, _Handler.requests, format_time(t_repeat)))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_numpy_backend.py
+# modified: 2026-10-18
+"""
+比较验证码类型判别模型的 torch / numpy 两种实现
+
+1. 一致性：对随机噪声和模拟的验证码图片 (三种颜色、有无干扰线) 比较两者的 logits 和判别结果，
+   不一致时退出码为 1
+2. 单张图片的判别耗时
+3. 在新的子进程中导入并加载模型、判别一张图片所需的时间和常驻内存
+
+    python -m benchmarks.bench_numpy_backend [--images 200]
+"""
+
+import os
+import sys
+import json
+import subprocess
+from optparse import OptionParser
+import numpy as np
+from PIL import Image, ImageDraw
+from autoelective._internal import get_abs_path
+from ._common import measure, format_time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ATOL = 1e-4
+
+MODELS = {
+    "torch": (get_abs_path("models/color_model.pth"), get_abs_path("models/line_model.pth")),
+    "numpy": (get_abs_path("models/color_model.npz"), get_abs_path("models/line_model.npz")),
+}
+COLORS = [(20, 60, 200), (10, 10, 10), (245, 245, 245)]  # 蓝 / 黑 / 白
+
+
+def captcha_images(n, seed=0):
+    """ 噪声图片与模拟验证码交替 """
+    rnd = np.random.default_rng(seed)
+    images = []
+    for i in range(n):
+        if i % 2 == 0:
+            images.append(Image.fromarray(rnd.integers(0, 256, (52, 130, 3), dtype=np.uint8), "RGB"))
+            continue
+        fg = COLORS[rnd.integers(len(COLORS))]
+        bg = tuple(int(v) for v in rnd.integers(0, 256, 3))
+        im = Image.new("RGB", (130, 52), bg)
+        draw = ImageDraw.Draw(im)
+        for j in range(4):
+            draw.text((10 + 28 * j + int(rnd.integers(-3, 4)), 14 + int(rnd.integers(-6, 7))),
+                      chr(int(rnd.integers(ord("A"), ord("Z") + 1))), fill=fg)
+        if rnd.random() < 0.5:
+            for _ in range(int(rnd.integers(1, 4))):
+                draw.line([tuple(int(v) for v in rnd.integers(0, 130, 2)), tuple(int(v) for v in rnd.integers(0, 52, 2))],
+                          fill=fg, width=int(rnd.integers(1, 3)))
+        images.append(im)
+    return images
+
+
+def check_parity(images):
+    """ 返回 (logits 的最大误差, 判别结果不一致的图片数) """
+    import torch
+    from autoelective.captcha.model import TwoStageClassifier
+    from autoelective.captcha.numpy_model import NumpyTwoStageClassifier
+    tc = TwoStageClassifier(*MODELS["torch"])
+    nc = NumpyTwoStageClassifier(*MODELS["numpy"])
+    max_err = 0.0
+    mismatches = 0
+    for im in images:
+        x = nc._preprocess_image(im)
+        with torch.no_grad():
+            t = tc._preprocess_image(im)
+            expected = [ tc.color_model(t)[0].numpy(), tc.line_model(t)[0].numpy() ]
+        actual = [ nc.color_model(x), nc.line_model(x) ]
+        for e, a in zip(expected, actual):
+            max_err = max(max_err, float(np.abs(e - a).max()))
+        if tc.predict(im) != nc.predict(im):
+            mismatches += 1
+    return max_err, mismatches
+
+
+_CHILD = r"""
+import sys, json, time
+
+def rss():
+    with open("/proc/self/status") as fp:
+        for line in fp:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+import numpy as np
+from PIL import Image
+image = Image.fromarray(np.zeros((52, 130, 3), dtype=np.uint8), "RGB")
+rss0 = rss()
+t0 = time.perf_counter()
+from autoelective.captcha.registry import model_registry
+model_registry.get(sys.argv[2], sys.argv[3], sys.argv[1]).predict(image)
+print(json.dumps({ "time": time.perf_counter() - t0, "rss": rss() - rss0, "torch": "torch" in sys.modules }))
+"""
+
+
+def cold_start(backend):
+    r = subprocess.run([sys.executable, "-c", _CHILD, backend, *MODELS[backend]], cwd=ROOT, stdout=subprocess.PIPE,
+                       stderr=subprocess.PIPE, encoding="utf-8", timeout=300)
+    if r.returncode != 0:
+        raise RuntimeError(r.stderr.strip().splitlines()[-1])
+    return json.loads(r.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = OptionParser(usage="python -m benchmarks.bench_numpy_backend [options]")
+    parser.add_option("--images", type="int", default=200, help="number of images in the parity check (default 200)")
+    options, _ = parser.parse_args(argv)
+
+    images = captcha_images(options.images)
+    max_err, mismatches = check_parity(images)
+    print("parity: %d images, max |logits diff| %.2e, %d prediction mismatches" % (len(images), max_err, mismatches))
+
+    from autoelective.captcha.registry import model_registry
+    print()
+    print("%-8s %12s %12s %12s %12s" % ("backend", "preprocess", "predict", "cold start", "rss delta"))
+    for backend, paths in MODELS.items():
+        classifier = model_registry.get(*paths, backend)
+        image = images[1]
+        t_pre = measure(lambda: classifier._preprocess_image(image), repeat=5)
+        t_predict = measure(lambda: classifier.predict(image), repeat=5)
+        cold = cold_start(backend)
+        print("%-8s %12s %12s %12s %9.1f MB%s" % (backend, format_time(t_pre), format_time(t_predict),
+              format_time(cold["time"]), cold["rss"] / 2**20, "" if cold["torch"] == (backend == "torch") else "  (torch imported!)"))
+
+    if max_err > ATOL or mismatches > 0:
+        print()
+        print("numpy backend differs from torch (atol %.0e)" % ATOL)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
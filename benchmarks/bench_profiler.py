@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_profiler.py
+# modified: 2026-10-18
+"""
+采样分析器的开销：名为 Elective 的线程以 autoelective.simulator 连续处理补退选页，
+对比关闭与以不同间隔开启 SamplingProfiler 时的每页耗时，并检查写出的 collapsed stack 文件
+
+    python -m benchmarks.bench_profiler
+"""
+
+import time
+import shutil
+import tempfile
+import threading
+from autoelective.environ import Environ
+from autoelective.profiler import SamplingProfiler
+from autoelective.simulator import make_simulation
+from ._common import format_time
+
+PAGES = 300
+EVERY = 100
+INTERVALS = (None, 0.01, 0.001)  # None: off
+
+environ = Environ()
+
+
+def run(interval, directory):
+    """ 返回 (每页耗时, SamplingProfiler 或 None) """
+    sim = make_simulation(500, 50, 10, mutex_size=3, delay_ratio=0.2)
+    sim.step()
+
+    def worker():
+        for _ in range(PAGES):
+            sim.step()
+            environ.next_elective_loop()
+
+    profiler = None
+    if interval is not None:
+        profiler = SamplingProfiler(EVERY, interval, directory=directory)
+        profiler.start()
+    t = threading.Thread(target=worker, name="Elective")
+    t0 = time.perf_counter()
+    t.start()
+    t.join()
+    elapsed = time.perf_counter() - t0
+    if profiler is not None:
+        profiler.stop()
+    return elapsed / PAGES, profiler
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        print("%d pages of 500 courses in a thread named Elective, output every %d loops" % (PAGES, EVERY))
+        print("%-14s %12s %8s" % ("profiler", "per page", "files"))
+        for interval in INTERVALS:
+            per_page, profiler = run(interval, tmp)
+            name = "off" if interval is None else "every %s" % format_time(interval)
+            print("%-14s %12s %8s" % (name, format_time(per_page), "-" if profiler is None else len(profiler.files)))
+            if profiler is not None:
+                assert len(profiler.files) >= PAGES // EVERY
+                with open(profiler.files[0], "r", encoding="utf-8") as fp:
+                    lines = fp.read().splitlines()
+                assert all( l.startswith("Elective;") for l in lines )
+        top = sorted(lines, key=lambda l: -int(l.rsplit(" ", 1)[1]))[0]
+        print()
+        print("hottest stack in the last window:")
+        print("  " + top.replace(";", "\n    ")[-600:])
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
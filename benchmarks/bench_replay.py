@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_replay.py
+# modified: 2026-10-17
+"""
+以录制的流量离线回放完整的选课循环 (autoelective.replay)，给出每回合耗时与各阶段延迟
+
+合成一个归档：补退选页含 config.ini 中的全部课程与 PLANS 门其他课程，前 FULL_LOOPS 回合全部满员，
+之后第一门课出现空位，补选成功后一直返回选上后的页面；回放两次，第二次以 --expect 比对第一次的结果
+
+    python -m benchmarks.bench_replay [-c config.ini]
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+from optparse import OptionParser
+from autoelective.environ import Environ
+from autoelective.archive import Archive, RequestDump
+from ._fixtures import supply_cancel_page, random_plans
+
+PLANS = 200
+FULL_LOOPS = 50
+LOOPS = 200
+
+BASE_URL = "https://elective.pku.edu.cn/elective2008/edu/pku/stu/elective/controller/supplement/"
+HEADERS = [("Content-Type", "text/html;charset=UTF-8")]
+
+
+def make_dump(endpoint, content):
+    return RequestDump(0.0, "GET", BASE_URL + endpoint, [], None, 200, "OK", HEADERS, "UTF-8", content, 0.0)
+
+
+def make_archive(path, courses):
+    """ 返回场景脚本中的 endpoints """
+    goals = [ (c.name, "%d" % c.class_no, c.school) for c in courses ]
+    others = random_plans(PLANS)
+    elected = [ p[:3] for p in others[:5] ]
+    full = [ g + (30, 30) for g in goals ] + others
+    available = [ goals[0] + (30, 29) ] + full[1:]
+    tips = "补选（或者候补）课程%s成功，请查看已选上列表确认，并查看选课结果。" % goals[0][0]
+    with Archive(path, "a") as archive:
+        archive.append(make_dump("SupplyCancel.do", supply_cancel_page(full, elected).encode("utf-8")))
+        archive.append(make_dump("SupplyCancel.do", supply_cancel_page(available, elected).encode("utf-8")))
+        archive.append(make_dump("electSupplement.do", supply_cancel_page(full, elected + goals[:1], tips).encode("utf-8")))
+        archive.append(make_dump("SupplyCancel.do", supply_cancel_page(full, elected + goals[:1]).encode("utf-8")))
+    name = os.path.basename(path)
+    return {
+        "SupplyCancel.do": ["%s:0*%d" % (name, FULL_LOOPS), "%s:1" % name, "%s:3" % name],
+        "electSupplement.do": ["%s:2" % name],
+    }
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option("-c", "--config", dest="config_ini", metavar="FILE")
+    options, _ = parser.parse_args()
+    Environ().config_ini = options.config_ini
+
+    from autoelective.config import AutoElectiveConfig
+    courses = list(AutoElectiveConfig().courses.values())
+    assert len(courses) > 0, "config.ini has no course"
+
+    tmp = tempfile.mkdtemp()
+    try:
+        endpoints = make_archive(os.path.join(tmp, "recorded"), courses)
+        scenario = os.path.join(tmp, "scenario.json")
+        with open(scenario, "w", encoding="utf-8") as fp:
+            json.dump({"archive": "recorded", "endpoints": endpoints}, fp, indent=2)
+
+        result = os.path.join(tmp, "result.json")
+        cmd = [sys.executable, "-m", "autoelective.replay", scenario, "--loops", str(LOOPS)]
+        if options.config_ini is not None:
+            cmd += ["-c", options.config_ini]
+        print("%d goals + %d other plans, first goal available at loop %d, %d loops" % (len(courses), PLANS, FULL_LOOPS + 1, LOOPS))
+        for extra in (["--save", result], ["--expect", result]):
+            p = subprocess.run(cmd + extra, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, encoding="utf-8")
+            print(p.stdout[p.stdout.rfind("\nloops: ") + 1:].rstrip())
+            print()
+            assert p.returncode == 0
+        with open(result, "r", encoding="utf-8") as fp:
+            print("ignored: %s" % json.load(fp)["ignored"])
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_response_parse.py
+# modified: 2026-10-17
+"""
+补退选页响应解析的前后对比：
+  before: etree.HTML(r.text)，先由 requests 解码整个页面
+  after:  parser.get_tree_from_response(r)，以已知编码直接解析 r.content，title / tips 共用一棵树
+
+两者查找 datagrid 的代价相同，不计入对比
+
+    python -m benchmarks.bench_response_parse [dumped pages ...]
+
+可以传入 .html 页面（python -m autoelective.archive extract 从转储归档中取出）或旧版本的 .gz 请求转储，
+不传时使用合成页面
+"""
+
+import sys
+from lxml import etree
+from requests.models import Response
+from requests.utils import get_encoding_from_headers
+from autoelective.parser import get_tree_from_response, get_title, get_tips
+from autoelective.utils import pickle_gzip_load
+from autoelective.archive import RequestDump
+from ._common import measure, format_time
+from ._fixtures import random_page
+
+SYNTHETIC_SIZES = (20, 200, 2000)
+
+
+def make_response(content, content_type="text/html;charset=UTF-8"):
+    r = Response()
+    r.status_code = 200
+    r._content = content
+    r.headers["Content-Type"] = content_type
+    r.encoding = get_encoding_from_headers(r.headers)
+    return r
+
+
+def load_page(file):
+    if file.endswith(".gz"):
+        r = pickle_gzip_load(file)
+        if isinstance(r, dict):  # RequestDump.to_dict()
+            r = RequestDump.from_dict(r)
+            return r.content, dict(r.headers).get("Content-Type", "text/html")
+        return r.content, r.headers.get("Content-Type", "text/html")
+    with open(file, "rb") as fp:
+        return fp.read(), "text/html;charset=UTF-8"
+
+
+def parse_before(content, content_type):
+    r = make_response(content, content_type)
+    tree = etree.HTML(r.text)
+    get_title(tree)
+    get_tips(tree)
+    return tree
+
+
+def parse_after(content, content_type):
+    r = make_response(content, content_type)
+    r._tree = None  # hook.with_etree
+    get_title(get_tree_from_response(r))
+    get_tips(get_tree_from_response(r))
+    return get_tree_from_response(r)
+
+
+def main():
+    pages = []
+    if len(sys.argv) > 1:
+        for file in sys.argv[1:]:
+            pages.append((file, *load_page(file)))
+    else:
+        for n in SYNTHETIC_SIZES:
+            pages.append(("synthetic %d rows" % n, random_page(n), "text/html;charset=UTF-8"))
+
+    print("%-40s  %10s  %12s  %12s  %8s" % ("page", "size", "before", "after", "speedup"))
+    for label, content, content_type in pages:
+        assert etree.tostring(parse_before(content, content_type)) == etree.tostring(parse_after(content, content_type))
+        t_before = measure(lambda: parse_before(content, content_type))
+        t_after = measure(lambda: parse_after(content, content_type))
+        print("%-40s  %9.1fK  %12s  %12s  %7.2fx" % (
+            label[-40:], len(content) / 1024, format_time(t_before), format_time(t_after), t_before / t_after))
+
+
+if __name__ == '__main__':
+    main()
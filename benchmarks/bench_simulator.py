@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_simulator.py
+# modified: 2026-10-17
+"""
+以 autoelective.simulator 在不同规模下处理连续变化的补退选页，给出每页各阶段 (解析 / 匹配 / 决策) 的平均耗时
+
+    python -m benchmarks.bench_simulator
+"""
+
+from autoelective.simulator import QuotaModel, make_simulation
+from ._common import format_time
+
+SCALES = [  # (courses, goals, mutex groups)
+    (200, 20, 5),
+    (1000, 100, 25),
+    (2000, 500, 100),
+    (5000, 2000, 500),
+]
+ITERATIONS = 200
+STAGES = ("render", "parse", "match", "decide", "elect")
+
+
+def main():
+    print("%d pages per scale, 20%% of goals with a delay rule, mutex groups of 3" % ITERATIONS)
+    print("%8s %6s %8s %9s" % ("courses", "goals", "mutexes", "pages/s") + "".join( " %10s" % s for s in STAGES ))
+    for courses, goals, groups in SCALES:
+        sim = make_simulation(courses, goals, groups, mutex_size=3, delay_ratio=0.2, model=QuotaModel(), seed=0)
+        sim.step()  # builds the extractor's row cache
+        sim.latency.reset()
+        n, elapsed = sim.run(ITERATIONS)
+        stages = sim.latency.snapshot()
+        print("%8d %6d %8d %9.0f" % (courses, goals, groups, n / elapsed)
+              + "".join( " %10s" % format_time(stages[s]["mean"]) for s in STAGES ))
+
+    print()
+    print("churn patterns, 2000 courses / 200 goals:")
+    patterns = [
+        ("quiet", QuotaModel(refill_rate=0.9, drop_rate=0.0002, burst_rate=0.0, anomaly_rate=0.0)),
+        ("drops", QuotaModel(refill_rate=0.5, drop_rate=0.01, burst_rate=0.0, anomaly_rate=0.0)),
+        ("bursts", QuotaModel(refill_rate=0.2, drop_rate=0.0, burst_rate=0.2, burst_size=10, anomaly_rate=0.0)),
+        ("anomaly 180/0", QuotaModel(refill_rate=0.5, drop_rate=0.002, burst_rate=0.0, anomaly_rate=0.01)),
+    ]
+    for name, model in patterns:
+        sim = make_simulation(2000, 200, 50, mutex_size=3, delay_ratio=0.2, model=model, seed=0)
+        n, elapsed = sim.run(ITERATIONS)
+        counts = ", ".join( "%s %d" % kv for kv in sorted(sim.counts.items()) if kv[1] > 0 )
+        print("  %-14s %6.0f pages/s  %s" % (name, n / elapsed, counts))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: bench_startup.py
+# modified: 2026-10-18
+"""
+在新的子进程中导入各入口模块，给出导入耗时，并检查导入时没有副作用：
+不导入 torch、不创建目录、不启动线程 (日志监听 / 推送分发)
+
+    python -m benchmarks.bench_startup [--budget 0.5]
+
+有副作用或超过 budget (秒) 时退出码为 1
+"""
+
+import os
+import sys
+import json
+import time
+import subprocess
+from optparse import OptionParser
+from ._common import format_time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+REPEAT = 5
+
+MODULES = [
+    "autoelective.cli",
+    "autoelective.config",
+    "config.config_manager",
+    "autoelective.loop",
+    "autoelective.captcha",
+    "autoelective.monitor",
+]
+
+_CHILD = r"""
+import os, sys, json, time, threading
+mkdirs = []
+_mkdir, _makedirs = os.mkdir, os.makedirs
+def mkdir(path, *args, **kwargs):
+    mkdirs.append(str(path))
+    return _mkdir(path, *args, **kwargs)
+def makedirs(path, *args, **kwargs):
+    mkdirs.append(str(path))
+    return _makedirs(path, *args, **kwargs)
+os.mkdir, os.makedirs = mkdir, makedirs
+t0 = time.perf_counter()
+__import__(sys.argv[1])
+elapsed = time.perf_counter() - t0
+print(json.dumps({
+    "time": elapsed,
+    "torch": "torch" in sys.modules,
+    "mkdirs": mkdirs,
+    "threads": [ t.name for t in threading.enumerate() if t is not threading.main_thread() ],
+}))
+"""
+
+
+def import_module(name):
+    r = subprocess.run([sys.executable, "-c", _CHILD, name], cwd=ROOT, stdout=subprocess.PIPE,
+                       stderr=subprocess.PIPE, encoding="utf-8", timeout=120)
+    if r.returncode != 0:
+        raise RuntimeError(r.stderr.strip().splitlines()[-1])
+    return json.loads(r.stdout.strip().splitlines()[-1])
+
+
+def run_command(args):
+    """ 整个子进程的耗时 """
+    t0 = time.perf_counter()
+    subprocess.run(args, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=120)
+    return time.perf_counter() - t0
+
+
+def main(argv=None):
+    parser = OptionParser(usage="python -m benchmarks.bench_startup [options]")
+    parser.add_option("--budget", type="float", default=0.5, help="maximum import time of a module in seconds (default 0.5)")
+    options, _ = parser.parse_args(argv)
+
+    failed = []
+    print("%-24s %10s  %s" % ("module", "import", "side effects"))
+    for name in MODULES:
+        results = [ import_module(name) for _ in range(REPEAT) ]
+        t = min( r["time"] for r in results )
+        r = results[-1]
+        effects = []
+        if r["torch"]:
+            effects.append("imports torch")
+        if len(r["mkdirs"]) > 0:
+            effects.append("mkdir %s" % ", ".join(os.path.relpath(p, ROOT) for p in r["mkdirs"]))
+        if len(r["threads"]) > 0:
+            effects.append("starts %s" % ", ".join(r["threads"]))
+        if t > options.budget:
+            effects.append("over budget")
+        if len(effects) > 0:
+            failed.append(name)
+        print("%-24s %10s  %s" % (name, format_time(t), "; ".join(effects) or "-"))
+
+    print()
+    bare = min( run_command([sys.executable, "-c", "pass"]) for _ in range(REPEAT) )
+    help = min( run_command([sys.executable, "main.py", "--help"]) for _ in range(REPEAT) )
+    print("%-24s %10s" % ("python -c pass", format_time(bare)))
+    print("%-24s %10s" % ("main.py --help", format_time(help)))
+
+    if len(failed) > 0:
+        print()
+        print("%d module(s) with import side effects or over budget" % len(failed))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
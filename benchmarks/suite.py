@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# filename: suite.py
+# modified: 2026-10-18
+"""
+热点路径的基准用例，由 python -m benchmarks 统一运行、保存为 JSON 并与之前的结果比较
+
+每个用例是一个工厂函数，完成准备工作后返回被测的无参函数；名称中 [...] 为规模参数
+"""
+
+import os
+import logging
+import requests
+import numpy as np
+from requests.models import Response
+from autoelective.course import Course, CoursePool
+from autoelective.parser import get_tree, get_tables, get_courses_with_detail, QUOTA_DTYPE
+from autoelective.matcher import PageIndex, MutexGroups, NO_DELAY, match_goals, find_elected_mutex
+from ._fixtures import random_page, random_plans, supply_cancel_page
+
+CASES = []  # [(name, factory, number)]
+
+SMALL_PAGE = 20
+HUGE_PAGE = 5000
+
+
+def case(name, number=None):
+    """ number: 每次计时的调用次数，None 时由 timeit 自动决定 """
+    def decorator(factory):
+        CASES.append((name, factory, number))
+        return factory
+    return decorator
+
+
+def _response(content, url="https://elective.pku.edu.cn/elective2008/edu/pku/stu/elective/controller/supplement/SupplyCancel.do"):
+    r = Response()
+    r.request = requests.Request("GET", url).prepare()
+    r.url = url
+    r.status_code = 200
+    r.headers["Content-Type"] = "text/html;charset=UTF-8"
+    r.encoding = "utf-8"
+    r._content = content
+    return r
+
+
+## parser
+
+def _courses_with_detail(n):
+    table = get_tables(get_tree(random_page(n)))[0]
+    pool = CoursePool()
+    return lambda: get_courses_with_detail(table, pool)
+
+case("parser.get_courses_with_detail[%d]" % SMALL_PAGE)(lambda: _courses_with_detail(SMALL_PAGE))
+case("parser.get_courses_with_detail[%d]" % HUGE_PAGE, number=3)(lambda: _courses_with_detail(HUGE_PAGE))
+
+
+## hook
+
+def _hook_case(check, content):
+    from autoelective.parser import get_tree_from_response
+    from autoelective.exceptions import ElectiveException
+    r = _response(content)
+    get_tree_from_response(r)  # built once by the with_etree hook
+    def func():
+        try:
+            check(r)
+        except ElectiveException:
+            pass
+    return func
+
+ERR_PAGE = (
+    '<html><head><title>系统异常</title></head><body><table><tr><td><table><tr><td><table><tr><td>'
+    '<strong>出错提示:</strong>验证码不正确。</td></tr></table></td></tr></table></td></tr></table></body></html>'
+).encode("utf-8")
+
+@case("hook.check_elective_title[page]")
+def _():
+    from autoelective.hook import check_elective_title
+    return _hook_case(check_elective_title, random_page(200))
+
+@case("hook.check_elective_title[errInfo]")
+def _():
+    from autoelective.hook import check_elective_title
+    return _hook_case(check_elective_title, ERR_PAGE)
+
+@case("hook.check_elective_tips[none]")
+def _():
+    from autoelective.hook import check_elective_tips
+    return _hook_case(check_elective_tips, random_page(200))
+
+@case("hook.check_elective_tips[success]")
+def _():
+    from autoelective.hook import check_elective_tips
+    plans = random_plans(200)
+    tips = "补选（或者候补）课程%s成功，请查看已选上列表确认，并查看选课结果。" % plans[0][0]
+    return _hook_case(check_elective_tips, supply_cancel_page(plans, [], tips).encode("utf-8"))
+
+
+## decision engine
+
+def _goal_page(n_plans, n_goals, n_elected=10, seed=0):
+    """ 与 loop.py 中相同的输入：goals, goal_ixs, PageIndex, delays """
+    rnd = np.random.default_rng(seed)
+    plans = [ Course(name, class_no, school, (maxi, used), "/href/%d" % i)
+              for i, (name, class_no, school, maxi, used) in enumerate(random_plans(n_plans, seed)) ]
+    rows = rnd.choice(n_plans, n_goals + n_elected, replace=False)
+    goals = [ plans[i].to_simplified() for i in rows[:n_goals] ]
+    elected = [ plans[i].to_simplified() for i in rows[n_goals:] ]
+    goal_ixs = { c._ident: ix for ix, c in enumerate(goals) }
+    quotas = np.array([ (*c._status, goal_ixs.get(c._ident, -1)) for c in plans ], dtype=QUOTA_DTYPE)
+    delays = np.where(rnd.random(n_goals) < 0.2, 2, NO_DELAY).astype(np.int32)
+    return goals, goal_ixs, PageIndex(plans, elected, quotas), elected, delays
+
+for n_plans, n_goals in ((200, 20), (5000, 500)):
+    @case("loop.match_goals[%d/%d]" % (n_plans, n_goals))
+    def _(n_plans=n_plans, n_goals=n_goals):
+        goals, goal_ixs, index, _, delays = _goal_page(n_plans, n_goals)
+        ignored = { c: "Mutex rules" for c in goals[::4] }
+        return lambda: match_goals(goals, goal_ixs, index, ignored, delays)
+
+for n_goals in (20, 500):
+    @case("loop.mutex_filter[%d]" % n_goals)
+    def _(n_goals=n_goals):
+        """ 每回合的互斥判断：每门候选课程的互斥课程是否在已选列表中 """
+        goals, _, _, elected, _ = _goal_page(n_goals * 10, n_goals)
+        rnd = np.random.default_rng(1)
+        mutexes = MutexGroups(n_goals)
+        for _ in range(n_goals // 4):
+            mutexes.add_group(rnd.choice(n_goals, 3, replace=False).tolist())
+        elected = elected + goals[::7]
+        def func():
+            for ix in range(n_goals):
+                find_elected_mutex(ix, goals, mutexes, elected)
+        return func
+
+
+## Course
+
+@case("course.hash")
+def _():
+    c = Course("数据库概论", 1, "信息科学技术学院")
+    return lambda: hash(c)
+
+@case("course.eq")
+def _():
+    c1 = Course("数据库概论", 1, "信息科学技术学院")
+    c2 = Course("数据库概论", "01", "信息科学技术学院", (100, 90), "/href")
+    return lambda: c1 == c2
+
+@case("course.in_ignored[100]")
+def _():
+    ignored = { Course("课程%05d" % i, 1, "学院") : "Elected" for i in range(100) }
+    c = Course("课程%05d" % 50, 1, "学院", (10, 9))
+    return lambda: c in ignored
+
+
+## captcha
+
+def _captcha_image():
+    from PIL import Image
+    rnd = np.random.default_rng(0)
+    return Image.fromarray(rnd.integers(0, 256, (52, 130, 3), dtype=np.uint8), "RGB")
+
+def _two_stage_classifier():
+    from autoelective._internal import get_abs_path
+    from autoelective.captcha.model import TwoStageClassifier
+    return TwoStageClassifier(get_abs_path("models/color_model.pth"), get_abs_path("models/line_model.pth"))
+
+@case("captcha.preprocess_image")
+def _():
+    classifier = _two_stage_classifier()
+    image = _captcha_image()
+    return lambda: classifier._preprocess_image(image)
+
+@case("captcha.predict")
+def _():
+    classifier = _two_stage_classifier()
+    image = _captcha_image()
+    return lambda: classifier.predict(image)
+
+@case("captcha.predict[numpy]")
+def _():
+    from autoelective._internal import get_abs_path
+    from autoelective.captcha.numpy_model import NumpyTwoStageClassifier
+    classifier = NumpyTwoStageClassifier(get_abs_path("models/color_model.npz"), get_abs_path("models/line_model.npz"))
+    image = _captcha_image()
+    return lambda: classifier.predict(image)
+
+
+## logging
+
+LOG_BATCH = 1000
+
+def _logger(name, listener):
+    from autoelective.logger import BaseLogger, _LogQueueHandler
+    handler = logging.StreamHandler(open(os.devnull, "w", encoding="utf-8"))
+    handler.setFormatter(BaseLogger.default_format)
+    logger = logging.getLogger("benchmarks.suite.%s" % name)
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.handlers[:] = []
+    logger.addHandler(handler if listener is None else _LogQueueHandler(handler, listener))
+    return logger
+
+def _log_batch(logger, listener=None):
+    def func():
+        for i in range(LOG_BATCH):
+            logger.info("Course(%s, %d, %s) is AVAILABLE now !", "数据库概论", i, "信息科学技术学院")
+        if listener is not None:
+            listener.queue.join()  # until every record is written
+    return func
+
+@case("logger.sync[%d records]" % LOG_BATCH, number=5)
+def _():
+    return _log_batch(_logger("sync", None))
+
+@case("logger.async[%d records]" % LOG_BATCH, number=5)
+def _():
+    from autoelective.logger import AsyncLogListener
+    listener = AsyncLogListener(LOG_BATCH * 2, "block")
+    listener.start()
+    return _log_batch(_logger("async", listener), listener)
@@ -55,14 +55,18 @@ class ConfigManager:
                         'login_loop_interval': config.getfloat('client', 'login_loop_interval', fallback=1.0),
                         'print_mutex_rules': config.getboolean('client', 'print_mutex_rules', fallback=False),
                         'debug_print_request': config.getboolean('client', 'debug_print_request', fallback=False),
-                        'debug_dump_request': config.getboolean('client', 'debug_dump_request', fallback=False)
+                        'debug_dump_request': config.getboolean('client', 'debug_dump_request', fallback=False),
+                        'log_queue_size': config.getint('client', 'log_queue_size', fallback=10000),
+                        'log_drop_policy': config.get('client', 'log_drop_policy', fallback='drop_new'),
+                        'captcha_backend': config.get('client', 'captcha_backend', fallback='torch')
                     }
                 
                 # 加载监控设置
                 if 'monitor' in config:
                     config_data['monitor'] = {
                         'host': config.get('monitor', 'host', fallback='localhost'),
-                        'port': config.getint('monitor', 'port', fallback=5000)
+                        'port': config.getint('monitor', 'port', fallback=5000),
+                        'threads': config.getint('monitor', 'threads', fallback=4)
                     }
                 
                 # 加载通知设置
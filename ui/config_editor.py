@@ -761,6 +761,12 @@ class ConfigEditor(QWidget):
                     client_data.get('debug_print_request', False))
                 self.debug_dump_check.setChecked(
                     client_data.get('debug_dump_request', False))
+                self.log_queue_size_spin.setValue(
+                    client_data.get('log_queue_size', 10000))
+                self.log_drop_policy_combo.setCurrentText(
+                    client_data.get('log_drop_policy', 'drop_new'))
+                self.captcha_backend_combo.setCurrentText(
+                    client_data.get('captcha_backend', 'torch'))
 
             # 加载监控设置
             if 'monitor' in config_data:
@@ -768,6 +774,7 @@ class ConfigEditor(QWidget):
                 self.monitor_host_edit.setText(
                     monitor_data.get('host', 'localhost'))
                 self.monitor_port_spin.setValue(monitor_data.get('port', 5000))
+                self.monitor_threads_spin.setValue(monitor_data.get('threads', 4))
 
             # 加载通知设置
             if 'notification' in config_data:
@@ -856,6 +863,12 @@ class ConfigEditor(QWidget):
             self.save_non_course_configs)
         self.debug_dump_check.stateChanged.connect(
             self.save_non_course_configs)
+        self.log_queue_size_spin.valueChanged.connect(
+            self.save_non_course_configs)
+        self.log_drop_policy_combo.currentIndexChanged.connect(
+            self.save_non_course_configs)
+        self.captcha_backend_combo.currentIndexChanged.connect(
+            self.save_non_course_configs)
 
         # 刷新间隔相关额外连接刷新间隔标签更新
         self.refresh_interval_spin.valueChanged.connect(
@@ -868,6 +881,8 @@ class ConfigEditor(QWidget):
             self.save_non_course_configs)
         self.monitor_port_spin.valueChanged.connect(
             self.save_non_course_configs)
+        self.monitor_threads_spin.valueChanged.connect(
+            self.save_non_course_configs)
 
         # 通知设置
         self.yanxx_voice_check.stateChanged.connect(
@@ -980,13 +995,17 @@ class ConfigEditor(QWidget):
             'login_loop_interval': self.login_loop_interval_spin.value(),
             'print_mutex_rules': self.print_mutex_check.isChecked(),
             'debug_print_request': self.debug_request_check.isChecked(),
-            'debug_dump_request': self.debug_dump_check.isChecked()
+            'debug_dump_request': self.debug_dump_check.isChecked(),
+            'log_queue_size': self.log_queue_size_spin.value(),
+            'log_drop_policy': self.log_drop_policy_combo.currentText(),
+            'captcha_backend': self.captcha_backend_combo.currentText()
         }
 
     def get_monitor_config(self):
         return {
             'host': self.monitor_host_edit.text(),
-            'port': self.monitor_port_spin.value()
+            'port': self.monitor_port_spin.value(),
+            'threads': self.monitor_threads_spin.value()
         }
 
     def get_notification_config(self):
@@ -1243,6 +1262,12 @@ class ConfigEditor(QWidget):
         self.print_mutex_check = QCheckBox()
         self.debug_request_check = QCheckBox()
         self.debug_dump_check = QCheckBox()
+        self.log_queue_size_spin = MQSpinBox()
+        self.log_queue_size_spin.setRange(100, 1000000)
+        self.log_drop_policy_combo = QComboBox()
+        self.log_drop_policy_combo.addItems(["drop_new", "drop_old", "block"])
+        self.captcha_backend_combo = QComboBox()
+        self.captcha_backend_combo.addItems(["torch", "numpy"])
 
         group_layout.addWidget(self.create_3_inputs_a_line((self.create_label_with_tooltip(
             "IAAA超时(秒):", "IAAA 客户端最长请求超时"), self.iaaa_timeout_spin), (self.create_label_with_tooltip(
@@ -1254,7 +1279,11 @@ class ConfigEditor(QWidget):
                     "打印互斥规则:", "是否在每次循环时打印完整的互斥规则列表"), self.print_mutex_check)))
         group_layout.addWidget(self.create_3_inputs_a_line((self.create_label_with_tooltip(
             "调试请求:", "是否打印请求细节"), self.debug_request_check), (self.create_label_with_tooltip(
-                "调试转储:", "是否将重要接口的请求以日志的形式记录到本地（包括补退选页、提交选课等接口）"), self.debug_dump_check)))
+                "调试转储:", "是否将重要接口的请求以日志的形式记录到本地（包括补退选页、提交选课等接口）"), self.debug_dump_check), (self.create_label_with_tooltip(
+                    "日志队列长度:", "日志队列的最大长度，日志由后台线程写出"), self.log_queue_size_spin)))
+        group_layout.addWidget(self.create_3_inputs_a_line((self.create_label_with_tooltip(
+            "日志队列满时:", "drop_new 丢弃新的记录，drop_old 丢弃最早的记录，block 等待；WARNING 及以上的记录总是保留"), self.log_drop_policy_combo), (self.create_label_with_tooltip(
+                "验证码模型推理:", "验证码类型判别模型的推理方式，numpy 不需要安装 torch，启动更快、占用内存更少"), self.captcha_backend_combo)))
 
         group.setLayout(group_layout)
         layout.addWidget(group)
@@ -1283,9 +1312,11 @@ class ConfigEditor(QWidget):
         self.monitor_host_edit = MQLineEdit()
         self.monitor_port_spin = MQSpinBox()
         self.monitor_port_spin.setRange(1, 65535)
+        self.monitor_threads_spin = MQSpinBox()
+        self.monitor_threads_spin.setRange(1, 32)
 
         group_layout.addWidget(self.create_3_inputs_a_line((self.create_label_with_tooltip(
-            "监控主机:", "你的主机地址"), self.monitor_host_edit), (self.create_label_with_tooltip("监控端口:", "选课网工作端口"), self.monitor_port_spin)))
+            "监控主机:", "你的主机地址"), self.monitor_host_edit), (self.create_label_with_tooltip("监控端口:", "选课网工作端口"), self.monitor_port_spin), (self.create_label_with_tooltip("监控线程数:", "处理监控请求的线程数"), self.monitor_threads_spin)))
 
         group.setLayout(group_layout)
         layout.addWidget(group)
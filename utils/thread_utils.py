@@ -15,8 +15,8 @@ def cleanup_environment(environ):
         if hasattr(environ, 'monitor_thread'):
             environ.monitor_thread = None
         
-        # 重置环境状态
-        environ.__init__()
+        # 重置环境状态，goals / ignored 等容器原地清空，loop 模块中持有的引用仍然有效
+        environ.reset()
         
         # 清理全局队列
         cleanup_global_queues()
@@ -30,25 +30,20 @@ def cleanup_global_queues():
     """清理全局队列"""
     try:
         # 清空队列
-        if hasattr(autoelective.loop, 'electivePool'):
+        if getattr(autoelective.loop, 'electivePool', None) is not None:
             while not autoelective.loop.electivePool.empty():
                 try:
                     autoelective.loop.electivePool.get_nowait()
                 except:
                     break
         
-        if hasattr(autoelective.loop, 'reloginPool'):
+        if getattr(autoelective.loop, 'reloginPool', None) is not None:
             while not autoelective.loop.reloginPool.empty():
                 try:
                     autoelective.loop.reloginPool.get_nowait()
                 except:
                     break
         
-        # 重置环境变量
-        if hasattr(autoelective.loop, 'environ'):
-            from autoelective.environ import Environ
-            autoelective.loop.environ = Environ()
-        
         return True
         
     except Exception as e:
@@ -58,10 +53,10 @@ def verify_clean_state(environ):
     """验证清理状态"""
     try:
         # 检查队列是否为空
-        if hasattr(autoelective.loop, 'electivePool') and not autoelective.loop.electivePool.empty():
+        if getattr(autoelective.loop, 'electivePool', None) is not None and not autoelective.loop.electivePool.empty():
             return False
         
-        if hasattr(autoelective.loop, 'reloginPool') and not autoelective.loop.reloginPool.empty():
+        if getattr(autoelective.loop, 'reloginPool', None) is not None and not autoelective.loop.reloginPool.empty():
             return False
         
         # 检查环境状态